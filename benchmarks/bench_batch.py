@@ -0,0 +1,64 @@
+"""
+Cost of syncing contacts one request per contact versus one batch request.
+
+Each round reads, updates and deletes ``--size`` contacts in equal thirds, once through
+``GET``/``PATCH``/``DELETE /api/contacts/{id}`` and once through ``POST /api/contacts/batch``,
+against ``main:app`` in process.
+
+Usage:
+    python -m benchmarks.bench_batch --url sqlite:///./bench.db --sizes 30 150 450
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.load import in_process_client
+from benchmarks.seed import PASSWORD, seed, user_name
+
+
+async def per_contact(client, headers: dict, ids: list) -> None:
+    third = len(ids) // 3
+    for contact_id in ids[:third]:
+        await client.get(f"/api/contacts/{contact_id}", headers=headers)
+    for contact_id in ids[third:2 * third]:
+        await client.patch(f"/api/contacts/{contact_id}", json={"name": "Synced"}, headers=headers)
+    for contact_id in ids[2 * third:]:
+        await client.delete(f"/api/contacts/{contact_id}", headers=headers)
+
+
+async def batched(client, headers: dict, ids: list) -> None:
+    third = len(ids) // 3
+    operations = [{"op": "get", "id": contact_id} for contact_id in ids[:third]]
+    operations += [{"op": "update", "id": contact_id, "body": {"name": "Synced"}} for contact_id in ids[third:2 * third]]
+    operations += [{"op": "delete", "id": contact_id} for contact_id in ids[2 * third:]]
+    response = await client.post("/api/contacts/batch", json={"operations": operations}, headers=headers)
+    assert response.status_code == 200, response.text
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///./bench.db")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[30, 150, 450])
+    args = parser.parse_args()
+
+    # every round deletes a third of its contacts, so each size and path gets fresh ids
+    seed(args.url, 1, 2 * sum(args.sizes))
+    next_id = 1
+    async with in_process_client(args.url) as client:
+        response = await client.post("/api/users/login", data={"username": user_name(1), "password": PASSWORD})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        print(f"{'contacts':>10}{'one per request ms':>21}{'batch ms':>11}{'speedup':>9}")
+        for size in args.sizes:
+            timings = []
+            for func in (per_contact, batched):
+                ids = list(range(next_id, next_id + size))
+                next_id += size
+                start = time.perf_counter()
+                await func(client, headers, ids)
+                timings.append((time.perf_counter() - start) * 1000)
+            old, new = timings
+            print(f"{size:>10}{old:>21.1f}{new:>11.1f}{old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+"""
+Insert rate of per-row create_contact versus the chunked create_contacts bulk path.
+
+Usage:
+    python -m benchmarks.bench_bulk_import --url sqlite:///./bench.db --contacts 20000
+"""
+import argparse
+import asyncio
+import time
+from datetime import date
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from src.database.db import async_database_url
+from src.database.models import Base, User
+from src.repository import contacts as repository_contacts
+from src.schemas import CreteContact
+
+
+def make_bodies(prefix: str, count: int) -> list:
+    return [CreteContact(name=f"name{i}", second_name=f"second{i}", email=f"{prefix}{i}@example.com",
+                         phone=f"{prefix}{i:09d}", born_date=date(1990, 1 + i % 12, 1 + i % 28), owner_id=1)
+            for i in range(count)]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///./bench.db", help="synchronous database URL")
+    parser.add_argument("--contacts", type=int, default=20000)
+    parser.add_argument("--per-row", type=int, default=1000, help="contacts inserted one by one")
+    parser.add_argument("--chunk", type=int, default=1000)
+    args = parser.parse_args()
+
+    engine = create_async_engine(async_database_url(args.url))
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with factory() as db:
+        db.add(User(id=1, user_name="bench", email="bench@example.com", hashes_password="x"))
+        await db.commit()
+
+        bodies = make_bodies("row", args.per_row)
+        start = time.perf_counter()
+        for body in bodies:
+            await repository_contacts.create_contact(body, 1, db)
+        elapsed = time.perf_counter() - start
+        print({"path": "create_contact per row", "rows": len(bodies), "rows_per_second": round(len(bodies) / elapsed)})
+
+        bodies = make_bodies("bulk", args.contacts)
+        start = time.perf_counter()
+        for offset in range(0, len(bodies), args.chunk):
+            await repository_contacts.create_contacts(bodies[offset:offset + args.chunk], 1, db)
+        await db.commit()
+        elapsed = time.perf_counter() - start
+        print({"path": "create_contacts bulk", "rows": len(bodies), "rows_per_second": round(len(bodies) / elapsed)})
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+"""
+Cost of authenticating one request's bearer token.
+
+``jose`` and ``pyjwt`` verify the HMAC and parse the claims on every call, as
+``decode_access_token`` did before the cache; ``cached`` is ``decode_access_token``
+for a token that was already verified once.
+
+Usage:
+    python -m benchmarks.bench_jwt --requests 20000
+"""
+import argparse
+import statistics
+import time
+
+from src.repository import utils
+from src.schema_user import TokenData
+
+
+def uncached(backend: str):
+    decode = utils.jwt_backend(backend)
+    return lambda token: TokenData(username=decode(token)["sub"])
+
+
+def timed(func, token: str, requests: int, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(requests):
+            func(token)
+        samples.append((time.perf_counter() - start) / requests)
+    return statistics.median(samples) * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    token = utils.create_access_token({"sub": "deadpool"})
+    cases = {"jose": uncached("jose")}
+    try:
+        cases["pyjwt"] = uncached("pyjwt")
+    except ImportError:
+        print("PyJWT is not installed, skipping the pyjwt backend")
+    cases["cached"] = utils.decode_access_token
+    print(f"{'case':<10}{'us/request':>12}")
+    for name, func in cases.items():
+        print(f"{name:<10}{timed(func, token, args.requests, args.repeat):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Cost of loading and serializing a list of contacts, the old path versus the row path.
+
+``orm + response_model`` loads ``Contact`` objects and serializes them the way FastAPI
+does for ``response_model=List[ResponseContact]``: validation with ``from_attributes``,
+a JSON-mode dump and ``json.dumps`` in ``JSONResponse``. ``rows + RowsResponse`` selects
+the columns as mappings and encodes them with pydantic-core in one call.
+
+Usage:
+    python -m benchmarks.bench_serialization --url sqlite:///./bench.db --sizes 100 10000 100000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date
+from typing import List
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from src.database.db import async_database_url
+from src.database.models import Base, Contact, User
+from src.repository import contacts as repository_contacts
+from src.schemas import ResponseContact
+from src.services.serialization import RowsResponse
+
+response_adapter = TypeAdapter(List[ResponseContact])
+
+
+def seed(url: str, contacts: int, batch: int = 10000) -> None:
+    """
+    Recreate the schema and insert one user owning the given number of contacts.
+
+    Args:
+        url (str): The synchronous database URL.
+        contacts (int): How many contacts to insert.
+        batch (int): Rows per executemany batch.
+    """
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [dict(id=1, user_name="bench", email="bench@example.com", hashes_password="x")])
+        for offset in range(0, contacts, batch):
+            conn.execute(insert(Contact), [
+                dict(name=f"name{i}", second_name=f"second{i}", email=f"c{i}@example.com", phone=f"+380{i:09d}",
+                     born_date=date(1990, 1 + i % 12, 1 + i % 28), owner_id=1)
+                for i in range(offset, min(offset + batch, contacts))
+            ])
+    engine.dispose()
+
+
+async def orm_path(session_maker, limit: int) -> int:
+    async with session_maker() as db:
+        contacts = await repository_contacts.get_contacts(1, db, limit=limit)
+    validated = response_adapter.validate_python(contacts, from_attributes=True)
+    return len(JSONResponse(response_adapter.dump_python(validated, mode="json")).body)
+
+
+async def rows_path(session_maker, limit: int) -> int:
+    async with session_maker() as db:
+        rows = await repository_contacts.get_contacts(1, db, limit=limit,
+                                                      fields=list(repository_contacts.CONTACT_FIELDS))
+    return len(RowsResponse(rows).body)
+
+
+async def timed(func, session_maker, limit: int, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func(session_maker, limit)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///./bench.db")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        seed(args.url, max(args.sizes))
+    engine = create_async_engine(async_database_url(args.url))
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    assert await orm_path(session_maker, 10) == await rows_path(session_maker, 10)
+
+    print(f"{'contacts':>10}{'orm + response_model ms':>26}{'rows + RowsResponse ms':>25}{'speedup':>9}")
+    for size in args.sizes:
+        old = await timed(orm_path, session_maker, size, args.repeat)
+        new = await timed(rows_path, session_maker, size, args.repeat)
+        print(f"{size:>10}{old:>26.1f}{new:>25.1f}{old / new:>8.1f}x")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
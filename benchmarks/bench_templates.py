@@ -0,0 +1,60 @@
+"""
+Cost of rendering a confirmation email, per message.
+
+``per-call environment`` reproduces the old fastapi-mail path: a Jinja environment is
+built and the template loaded for every message. ``precompiled`` renders both the HTML
+and the text part through ``EmailTemplates`` after ``preload``.
+
+Usage:
+    python -m benchmarks.bench_templates --messages 10000
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from src.services.templating import EmailTemplates
+
+TEMPLATE = "email.template.html"
+CONTEXT = {"host": "http://localhost:8000/", "username": "deadpool", "token": "x" * 160}
+
+
+def per_call_environment(directory: str) -> None:
+    env = Environment(loader=FileSystemLoader(directory), autoescape=select_autoescape())
+    env.globals["fragment"] = lambda name: env.get_template(name).render()
+    env.get_template(TEMPLATE).render(**CONTEXT)
+
+
+def timed(func, messages: int, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(messages):
+            func()
+        samples.append((time.perf_counter() - start) / messages)
+    return statistics.median(samples) * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--directory", default="templates")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        templates = EmailTemplates(args.directory, cache_dir)
+        templates.preload()
+        cases = {
+            "per-call environment": lambda: per_call_environment(args.directory),
+            "precompiled": lambda: templates.render(TEMPLATE, CONTEXT),
+        }
+        print(f"{'case':<24}{'us/message':>12}")
+        for name, func in cases.items():
+            print(f"{name:<24}{timed(func, args.messages, args.repeat):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Async HTTP load driver for the contacts API.
+
+``--concurrency`` virtual users log in as the seeded users and then send a weighted mix
+of list, search, birthday, create and login requests until ``--duration`` runs out.
+By default ``main:app`` is driven in process through httpx's ASGI transport, with the
+database dependencies pointed at ``--url``; with ``--base-url`` a running server is
+driven instead. Requests per second and p50/p95/p99 latency are reported per scenario
+and written as JSON, pass an earlier result as ``--baseline`` to print the change.
+
+Creating contacts is rate limited to 10 per minute per user, so most ``create``
+requests of a long run are answered with 429 — they are counted, not treated as errors.
+
+Usage:
+    python -m benchmarks.seed --url sqlite:///./bench.db --users 50 --contacts 1000
+    python -m benchmarks.load --url sqlite:///./bench.db --users 50 --concurrency 20 --duration 30
+    python -m benchmarks.load --base-url http://localhost:8000 --users 50 --baseline benchmarks/results/load-1.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+from benchmarks.seed import FIRST_NAMES, LAST_NAMES, PASSWORD, user_name
+
+SCENARIOS = {"list": 40, "search": 30, "birthday": 15, "create": 10, "login": 5}
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+class Recorder:
+    """
+    Latencies and status codes per scenario.
+    """
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    async def request(self, scenario: str, client: httpx.AsyncClient, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, "error"
+        self.latencies[scenario].append(time.perf_counter() - start)
+        self.statuses[scenario][status] += 1
+        return response
+
+    def summary(self, elapsed: float) -> dict:
+        """
+        Summarize the run per scenario.
+
+        Args:
+            elapsed (float): The run duration in seconds.
+
+        Returns:
+            dict: Request count, req/s, latency percentiles in ms and status counts per scenario.
+        """
+        result = {}
+        for scenario, samples in sorted(self.latencies.items()):
+            cuts = statistics.quantiles(samples, n=100) if len(samples) > 1 else samples * 99
+            result[scenario] = {
+                "requests": len(samples),
+                "rps": round(len(samples) / elapsed, 1),
+                "p50_ms": round(cuts[49] * 1000, 2),
+                "p95_ms": round(cuts[94] * 1000, 2),
+                "p99_ms": round(cuts[98] * 1000, 2),
+                "statuses": {str(status): count for status, count in self.statuses[scenario].items()},
+            }
+        return result
+
+
+async def login(recorder: Recorder, client: httpx.AsyncClient, name: str) -> dict:
+    response = await recorder.request("login", client, "POST", "/api/users/login",
+                                      data={"username": name, "password": PASSWORD})
+    if response is None or response.status_code != 200:
+        raise RuntimeError(f"login as {name} failed, is the database seeded with benchmarks.seed?")
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def virtual_user(index: int, args, client: httpx.AsyncClient, recorder: Recorder, deadline: float) -> None:
+    rng = random.Random(index)
+    name = user_name(1 + index % args.users)
+    headers = await login(recorder, client, name)
+    scenarios, weights = list(SCENARIOS), list(SCENARIOS.values())
+    created = 0
+    while time.perf_counter() < deadline:
+        scenario = rng.choices(scenarios, weights)[0]
+        if scenario == "list":
+            await recorder.request(scenario, client, "GET", "/api/contacts/", params={"limit": args.page_size},
+                                   headers=headers)
+        elif scenario == "search":
+            query = rng.choice(FIRST_NAMES + LAST_NAMES)[:rng.randint(3, 6)]
+            await recorder.request(scenario, client, "GET", "/api/contacts/search",
+                                   params={"q": query, "limit": args.page_size}, headers=headers)
+        elif scenario == "birthday":
+            await recorder.request(scenario, client, "GET", "/api/contacts/birth", params={"days": 7},
+                                   headers=headers)
+        elif scenario == "create":
+            created += 1
+            tag = f"{index}-{created}-{time.time_ns()}"
+            body = {"name": "Load", "second_name": "Test", "email": f"load-{tag}@example.com",
+                    "phone": f"+1{time.time_ns() % 10 ** 12:012d}{index}", "born_date": "1990-05-17", "owner_id": 0}
+            await recorder.request(scenario, client, "POST", "/api/contacts/", json=body, headers=headers)
+        else:
+            headers = await login(recorder, client, name)
+
+
+def in_process_client(url: str) -> httpx.AsyncClient:
+    """
+    Build a client calling ``main:app`` in process with its database dependencies on ``url``.
+
+    Args:
+        url (str): The synchronous database URL of the seeded database.
+
+    Returns:
+        httpx.AsyncClient: The client.
+    """
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from main import app
+    from src.database.db import async_database_url, get_db, get_session_maker
+
+    engine = create_async_engine(async_database_url(url))
+    session_maker = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_maker() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_maker] = lambda: session_maker
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+
+def print_summary(summary: dict, baseline: dict | None) -> None:
+    print(f"{'scenario':<10}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  statuses")
+    for scenario, row in summary.items():
+        print(f"{scenario:<10}{row['requests']:>10}{row['rps']:>10}{row['p50_ms']:>10}{row['p95_ms']:>10}"
+              f"{row['p99_ms']:>10}  {row['statuses']}")
+        old = (baseline or {}).get(scenario)
+        if old:
+            changes = "".join(f"{(row[key] / old[key] - 1) * 100 if old[key] else 0:>+9.1f}%"
+                              for key in ("rps", "p50_ms", "p95_ms", "p99_ms"))
+            print(f"{'  vs base':<20}{changes}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///./bench.db", help="Seeded database for the in-process app")
+    parser.add_argument("--base-url", help="Drive a running server instead of main:app in process")
+    parser.add_argument("--users", type=int, default=100, help="Number of seeded users to log in as")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--output", type=Path, help="Result file, benchmarks/results/load-<time>.json by default")
+    parser.add_argument("--baseline", type=Path, help="An earlier result to compare with")
+    args = parser.parse_args()
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=30)
+    else:
+        client = in_process_client(args.url)
+    recorder = Recorder()
+    async with client:
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*(virtual_user(index, args, client, recorder, deadline)
+                               for index in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+    summary = recorder.summary(elapsed)
+    baseline = json.loads(args.baseline.read_text())["scenarios"] if args.baseline else None
+    print_summary(summary, baseline)
+    output = args.output or RESULTS_DIR / f"load-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "run": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()}
+        | {"started_at": datetime.now().isoformat(timespec="seconds"), "elapsed_s": round(elapsed, 2)},
+        "scenarios": summary,
+    }, indent=2))
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+"""
+pytest-benchmark micro-benchmarks for the contact repository and the token helpers.
+
+The queries run against a temporary SQLite database seeded by ``benchmarks.seed``.
+The file is not collected by the test suite, run it explicitly and keep the JSON to
+compare runs:
+
+Usage:
+    python -m pytest benchmarks/micro_benchmarks.py --benchmark-json=benchmarks/results/micro.json
+    python -m pytest benchmarks/micro_benchmarks.py --benchmark-autosave
+    python -m pytest benchmarks/micro_benchmarks.py --benchmark-compare --benchmark-compare-fail=median:10%
+"""
+import asyncio
+from datetime import date
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from benchmarks.seed import seed, user_name
+from src.database.db import async_database_url
+from src.repository import contacts as repository_contacts
+from src.repository import utils
+
+pytest.importorskip("pytest_benchmark")
+
+USERS = 20
+CONTACTS_PER_USER = 2000
+FIELDS = list(repository_contacts.CONTACT_FIELDS)
+
+
+@pytest.fixture(scope="module")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+def session_maker(tmp_path_factory, loop):
+    url = f"sqlite:///{tmp_path_factory.mktemp('bench') / 'micro.db'}"
+    seed(url, USERS, CONTACTS_PER_USER)
+    engine = create_async_engine(async_database_url(url))
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    loop.run_until_complete(engine.dispose())
+
+
+@pytest.fixture
+def run_query(loop, session_maker):
+    """
+    Return a function running a repository call in a fresh session and returning its result.
+    """
+    def run(func, *args, **kwargs):
+        async def call():
+            async with session_maker() as db:
+                return await func(*args, db=db, **kwargs)
+        return loop.run_until_complete(call())
+    return run
+
+
+def test_get_contacts_orm(benchmark, run_query):
+    contacts = benchmark(run_query, repository_contacts.get_contacts, 1, limit=100)
+    assert len(contacts) == 100
+
+
+def test_get_contacts_rows(benchmark, run_query):
+    rows = benchmark(run_query, repository_contacts.get_contacts, 1, limit=100, fields=FIELDS)
+    assert len(rows) == 100
+
+
+def test_get_contacts_next_page(benchmark, run_query):
+    rows = benchmark(run_query, repository_contacts.get_contacts, 1, limit=100, after_id=1000, fields=FIELDS)
+    assert rows[0]["id"] > 1000
+
+
+def test_search_contacts(benchmark, run_query):
+    rows = benchmark(run_query, repository_contacts.search_contacts, "Shev", 1, limit=50, fields=FIELDS)
+    assert rows
+
+
+def test_search_contacts_by_email(benchmark, run_query):
+    rows = benchmark(run_query, repository_contacts.search_contacts, "example.com", 1, limit=50, fields=FIELDS)
+    assert rows
+
+
+def test_birthday(benchmark, run_query):
+    benchmark(run_query, repository_contacts.birthday, 1, days=7, fields=FIELDS)
+
+
+def test_contacts_fingerprint(benchmark, run_query):
+    latest, count = benchmark(run_query, repository_contacts.contacts_fingerprint, 1)
+    assert count == CONTACTS_PER_USER
+
+
+def test_birthday_window(benchmark):
+    assert benchmark(repository_contacts.birthday_window, date(2025, 12, 28), 7) == (1228, 104)
+
+
+def test_cursor_round_trip(benchmark):
+    cursor = {"after_id": 123456, "sort": "id"}
+    assert benchmark(lambda: repository_contacts.decode_cursor(repository_contacts.encode_cursor(cursor))) == cursor
+
+
+def test_create_access_token(benchmark):
+    assert benchmark(utils.create_access_token, {"sub": user_name(1)})
+
+
+def test_decode_access_token_cached(benchmark):
+    token = utils.create_access_token({"sub": user_name(1)})
+    assert benchmark(utils.decode_access_token, token).username == user_name(1)
+
+
+def test_decode_access_token_uncached(benchmark):
+    token = utils.create_access_token({"sub": user_name(1)})
+
+    def decode():
+        utils.access_token_cache.clear()
+        return utils.decode_access_token(token)
+    assert benchmark(decode).username == user_name(1)
+
+
+@pytest.mark.parametrize("backend", ["jose", "pyjwt"])
+def test_jwt_backend_decode(benchmark, backend):
+    if backend == "pyjwt":
+        pytest.importorskip("jwt")
+    decode = utils.jwt_backend(backend)
+    token = utils.create_access_token({"sub": user_name(1)})
+    assert benchmark(decode, token)["sub"] == user_name(1)
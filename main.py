@@ -1,26 +1,53 @@
-import redis.asyncio as redis
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI, Depends
-from fastapi_limiter import FastAPILimiter
-from fastapi_limiter.depends import RateLimiter
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.staticfiles import StaticFiles
 
 from src.routes.contacts import router as contacts_router
 from src.routes.users import router as users_router
+from src.routes.metrics import router as metrics_router
 from src.conf.config import settings
+from src.database.db import engine
+from src.services.metrics import MetricsMiddleware, instrument_engine, registry
+from src.services import avatars, rate_limit, token_store
+from src.services.email import outbox_worker
+from src.services.templating import email_templates
+from src.services.rate_limit import RateLimiter
+from src.services.redis_pool import close_redis
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Initialize shared services on startup and release them on shutdown.
 
-app = FastAPI()
+    Args:
+        app (FastAPI): The application.
+    """
+    await rate_limit.init()
+    await token_store.init()
+    avatars.init_storage()
+    email_templates.preload()
+    if settings.email_worker_enabled:
+        outbox_worker.start()
+    yield
+    await outbox_worker.stop()
+    await close_redis()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(contacts_router, prefix='/api')
 app.include_router(users_router, prefix='/api')
+app.include_router(metrics_router, prefix='/api')
+if settings.avatar_storage == 'local':
+    app.mount(settings.avatar_local_url, StaticFiles(directory=settings.avatar_local_dir, check_dir=False),
+              name='avatars')
 
-
-# @app.on_event("startup")
-# async def startup():
-#     # r = await redis.Redis(host=settings.redis_host, port=settings.redis_port, db=0, encoding="utf-8",
-#     #                       decode_responses=True)
-#     await FastAPILimiter.init(r)
 origins = [
     "http://localhost:8000"
     ]
@@ -31,7 +58,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+# Added before the metrics middleware, so response sizes are recorded after compression
+app.add_middleware(GZipMiddleware, minimum_size=settings.gzip_minimum_size, compresslevel=settings.gzip_level)
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine.sync_engine)
 
 @app.get("/", dependencies=[Depends(RateLimiter(times=2, seconds=5))])
 async def index():
@@ -57,6 +89,17 @@ def read_root():
     return {"message": "Hello World"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """
+    Prometheus metrics endpoint.
+
+    Returns:
+        str: Request latency, response size, in-flight requests, SQL per request and pool state.
+    """
+    return registry.render()
+
+
 if __name__ == '__main__':
     """
     Main entry point for the FastAPI application.
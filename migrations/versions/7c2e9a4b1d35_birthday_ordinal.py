@@ -0,0 +1,33 @@
+"""birthday ordinal
+
+Revision ID: 7c2e9a4b1d35
+Revises: 1f0e0d0cdd89
+Create Date: 2026-10-17 10:12:41.508233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e9a4b1d35'
+down_revision: Union[str, None] = '1f0e0d0cdd89'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('contacts', sa.Column('birthday_ordinal', sa.Integer(), nullable=True))
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("UPDATE contacts SET birthday_ordinal = CAST(strftime('%m%d', born_date) AS INTEGER)")
+    else:
+        op.execute("UPDATE contacts SET birthday_ordinal = "
+                   "CAST(EXTRACT(MONTH FROM born_date) AS INTEGER) * 100 + CAST(EXTRACT(DAY FROM born_date) AS INTEGER)")
+    op.create_index('ix_contacts_owner_id_birthday_ordinal', 'contacts', ['owner_id', 'birthday_ordinal'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_owner_id_birthday_ordinal', table_name='contacts')
+    op.drop_column('contacts', 'birthday_ordinal')
@@ -0,0 +1,52 @@
+"""contact search indexes
+
+Revision ID: b4f81d6e2a90
+Revises: 7c2e9a4b1d35
+Create Date: 2026-10-17 11:03:17.221940
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4f81d6e2a90'
+down_revision: Union[str, None] = '7c2e9a4b1d35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = ('name', 'second_name', 'email')
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5("
+                   "name, second_name, email, content='contacts', content_rowid='id', tokenize='trigram')")
+        op.execute("CREATE TRIGGER IF NOT EXISTS contacts_fts_insert AFTER INSERT ON contacts BEGIN "
+                   "INSERT INTO contacts_fts(rowid, name, second_name, email) "
+                   "VALUES (new.id, new.name, new.second_name, new.email); END")
+        op.execute("CREATE TRIGGER IF NOT EXISTS contacts_fts_delete AFTER DELETE ON contacts BEGIN "
+                   "INSERT INTO contacts_fts(contacts_fts, rowid, name, second_name, email) "
+                   "VALUES ('delete', old.id, old.name, old.second_name, old.email); END")
+        op.execute("CREATE TRIGGER IF NOT EXISTS contacts_fts_update AFTER UPDATE ON contacts BEGIN "
+                   "INSERT INTO contacts_fts(contacts_fts, rowid, name, second_name, email) "
+                   "VALUES ('delete', old.id, old.name, old.second_name, old.email); "
+                   "INSERT INTO contacts_fts(rowid, name, second_name, email) "
+                   "VALUES (new.id, new.name, new.second_name, new.email); END")
+        op.execute("INSERT INTO contacts_fts(contacts_fts) VALUES ('rebuild')")
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in SEARCH_COLUMNS:
+        op.create_index(f'ix_contacts_{column}_trgm', 'contacts', [column], unique=False,
+                        postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        for trigger in ('contacts_fts_insert', 'contacts_fts_delete', 'contacts_fts_update'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS contacts_fts')
+        return
+    for column in SEARCH_COLUMNS:
+        op.drop_index(f'ix_contacts_{column}_trgm', table_name='contacts')
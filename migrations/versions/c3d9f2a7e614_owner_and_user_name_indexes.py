@@ -0,0 +1,27 @@
+"""owner and user name indexes
+
+Revision ID: c3d9f2a7e614
+Revises: e5a07c3f9b12
+Create Date: 2026-10-17 15:12:40.318072
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d9f2a7e614'
+down_revision: Union[str, None] = 'e5a07c3f9b12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_contacts_owner_id_id', 'contacts', ['owner_id', 'id'], unique=False)
+    op.create_index('ix_users_user_name', 'users', ['user_name'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_user_name', table_name='users')
+    op.drop_index('ix_contacts_owner_id_id', table_name='contacts')
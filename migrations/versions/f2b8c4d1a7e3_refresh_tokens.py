@@ -0,0 +1,41 @@
+"""refresh tokens
+
+Revision ID: f2b8c4d1a7e3
+Revises: c3d9f2a7e614
+Create Date: 2026-10-17 18:12:40.518331
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8c4d1a7e3'
+down_revision: Union[str, None] = 'c3d9f2a7e614'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('refresh_tokens',
+    sa.Column('jti', sa.String(length=32), nullable=False),
+    sa.Column('user_name', sa.String(), nullable=False),
+    sa.Column('expires_at', sa.Float(), nullable=False),
+    sa.Column('used_at', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('jti')
+    )
+    op.create_index(op.f('ix_refresh_tokens_user_name'), 'refresh_tokens', ['user_name'], unique=False)
+    op.create_table('token_revocations',
+    sa.Column('user_name', sa.String(), nullable=False),
+    sa.Column('revoked_at', sa.Float(), nullable=False),
+    sa.Column('expires_at', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('user_name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('token_revocations')
+    op.drop_index(op.f('ix_refresh_tokens_user_name'), table_name='refresh_tokens')
+    op.drop_table('refresh_tokens')
@@ -1,5 +1,10 @@
+from pathlib import Path
+
 from pydantic_settings import BaseSettings
 
+# the project root, relative paths in the settings are resolved against it
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
 
 class Settings(BaseSettings):
     sqlalchemy_database_url: str
@@ -10,15 +15,61 @@ class Settings(BaseSettings):
     mail_from: str
     mail_port: int
     mail_server: str
+    mail_from_name: str = 'Contact App'
+    mail_ssl_tls: bool = True
+    mail_starttls: bool = False
+    email_worker_enabled: bool = True
+    email_concurrency: int = 2
+    email_rate_per_second: float = 10
+    email_batch_size: int = 50
+    email_max_attempts: int = 5
+    email_retry_base_seconds: int = 30
+    email_lease_seconds: int = 300
+    email_poll_interval: float = 5
+    email_template_dir: str = 'templates'
+    email_template_cache_dir: str | None = None
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_null_pool: bool = False
+    sql_query_budget: int = 0
+    sql_log_duplicates: bool = False
     redis_host: str = 'localhost'
     redis_port: int = 6379
+    redis_enabled: bool = False
     cloudinary_name: str
     cloudinary_api_key: str
     cloudinary_api_secret: str
+    avatar_storage: str = 'cloudinary'
+    avatar_local_dir: str = 'static/avatars'
+    avatar_local_url: str = '/static/avatars'
+    avatar_max_bytes: int = 5 * 1024 * 1024
+    avatar_max_pixels: int = 25_000_000
+    avatar_workers: int = 2
+    user_cache_size: int = 1024
+    user_cache_ttl: int = 60
+    token_cache_size: int = 10000
+    jwt_backend: str = 'jose'
+    hash_pool_size: int = 4
+    hash_queue_limit: int = 64
+    hash_retry_after: int = 1
+    gzip_minimum_size: int = 1000
+    gzip_level: int = 6
+    contacts_page_size: int = 50
+    contacts_page_max: int = 500
+    bulk_import_chunk_size: int = 1000
+    bulk_import_max_rows: int = 100000
+    contacts_batch_max: int = 500
+    contact_cache_size: int = 4096
+    contact_cache_ttl: int = 60
+    typeahead_enabled: bool = True
+    typeahead_max_entries: int = 1000000
 
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
 
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -1,17 +1,149 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 from src.conf.config import settings
 
 SQLALCHEMY_DATABASE_URL = settings.sqlalchemy_database_url
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """
+    Convert a synchronous database URL into its async driver equivalent.
+
+    Alembic keeps using the synchronous URL from the settings, the application
+    talks to the same database through asyncpg (PostgreSQL) or aiosqlite (SQLite).
+
+    Args:
+        url (str): The database URL from the settings.
+
+    Returns:
+        str: The URL with an async driver.
+    """
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+class PoolStats:
+    """
+    Counters for how long requests wait to check a connection out of the pool.
+    """
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, wait: float, timed_out: bool = False) -> None:
+        """
+        Record one checkout attempt.
+
+        Args:
+            wait (float): The seconds spent waiting for a connection.
+            timed_out (bool): Whether the attempt ended with a pool timeout.
+        """
+        self.checkouts += 1
+        self.timeouts += timed_out
+        self.wait_seconds_total += wait
+        self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    The default async queue pool, timing every connection checkout into ``pool_stats``.
+    """
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_stats.record(time.perf_counter() - start)
+        return connection
+
+
+def engine_options() -> dict:
+    """
+    Build the engine pool options from the settings.
+
+    With ``DB_NULL_POOL`` connections are not pooled in the application at all, which is
+    what an external pooler such as pgbouncer in transaction mode expects.
+
+    Returns:
+        dict: Keyword arguments for ``create_async_engine``.
+    """
+    if settings.db_null_pool:
+        return {"poolclass": NullPool, "pool_pre_ping": settings.db_pool_pre_ping}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL), **engine_options())
+
+SessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+def pool_status() -> dict:
+    """
+    Report the current state of the connection pool and the checkout wait statistics.
+
+    Returns:
+        dict: Pool size, checked out and overflow connections, and wait times in seconds.
+    """
+    pool = engine.pool
+    if not isinstance(pool, AsyncAdaptedQueuePool):
+        return {"pool": type(pool).__name__}
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": settings.db_max_overflow,
+        "checkouts": pool_stats.checkouts,
+        "timeouts": pool_stats.timeouts,
+        "wait_seconds_total": round(pool_stats.wait_seconds_total, 6),
+        "wait_seconds_max": round(pool_stats.wait_seconds_max, 6),
+    }
 
 
 # Dependency
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    """
+    Provide an async database session for a single request.
+
+    Yields:
+        AsyncSession: The SQLAlchemy async session.
+    """
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+def get_session_maker() -> async_sessionmaker:
+    """
+    Provide the session factory for work that outlives the request's session.
+
+    Streaming responses and background jobs run after ``get_db`` has closed its session,
+    so they open their own session from this factory.
+
+    Returns:
+        async_sessionmaker: The application session factory.
+    """
+    return SessionLocal
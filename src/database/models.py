@@ -1,10 +1,36 @@
-from sqlalchemy import Column, Integer, String, Boolean, func, Table, Date, DateTime, ForeignKey
+from datetime import date, datetime, timezone
+
+from sqlalchemy import Column, Integer, String, Boolean, func, Table, Date, DateTime, ForeignKey, Index, DDL, event, \
+    JSON, Text, Float
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 
 Base = declarative_base()
 
 
+def to_birthday_ordinal(born_date: date) -> int:
+    """
+    Return the month*100+day ordinal of a birth date, e.g. 1231 for 31 December.
+
+    Args:
+        born_date (date): The birth date.
+
+    Returns:
+        int: The ordinal used for indexed upcoming-birthday lookups.
+    """
+    return born_date.month * 100 + born_date.day
+
+
+def utcnow() -> datetime:
+    """
+    Return the current UTC time without a time zone, as stored in ``DateTime`` columns.
+
+    Returns:
+        datetime: The naive UTC time.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class Contact(Base):
     __tablename__ = "contacts"
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -13,16 +39,50 @@ class Contact(Base):
     email = Column(String(150), nullable=False, unique=True)
     phone = Column(String(50), nullable=False, unique=True)
     born_date = Column(Date, nullable=False)
+    birthday_ordinal = Column(Integer, nullable=True)
     crete_at = Column(DateTime, default=func.now())
     update_at = Column(DateTime, default=func.now(), onupdate=func.now())
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     owner = relationship("User", back_populates="contacts")
 
+    __table_args__ = (
+        Index("ix_contacts_owner_id_id", "owner_id", "id"),
+        Index("ix_contacts_owner_id_birthday_ordinal", "owner_id", "birthday_ordinal"),
+    )
+
+    @validates("born_date")
+    def _set_birthday_ordinal(self, key, value):
+        self.birthday_ordinal = to_birthday_ordinal(value) if value is not None else None
+        return value
+
+
+# SQLite has no pg_trgm, contact search uses an FTS5 trigram index kept in sync by triggers.
+# On PostgreSQL the trigram GIN indexes are created by the migrations instead.
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5("
+    "name, second_name, email, content='contacts', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS contacts_fts_insert AFTER INSERT ON contacts BEGIN "
+    "INSERT INTO contacts_fts(rowid, name, second_name, email) "
+    "VALUES (new.id, new.name, new.second_name, new.email); END",
+    "CREATE TRIGGER IF NOT EXISTS contacts_fts_delete AFTER DELETE ON contacts BEGIN "
+    "INSERT INTO contacts_fts(contacts_fts, rowid, name, second_name, email) "
+    "VALUES ('delete', old.id, old.name, old.second_name, old.email); END",
+    "CREATE TRIGGER IF NOT EXISTS contacts_fts_update AFTER UPDATE ON contacts BEGIN "
+    "INSERT INTO contacts_fts(contacts_fts, rowid, name, second_name, email) "
+    "VALUES ('delete', old.id, old.name, old.second_name, old.email); "
+    "INSERT INTO contacts_fts(rowid, name, second_name, email) "
+    "VALUES (new.id, new.name, new.second_name, new.email); END",
+)
+
+for statement in SQLITE_FTS_DDL:
+    event.listen(Contact.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Contact.__table__, "before_drop", DDL("DROP TABLE IF EXISTS contacts_fts").execute_if(dialect="sqlite"))
+
 
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    user_name = Column(String, nullable=False)
+    user_name = Column(String, nullable=False, index=True)
     email = Column(String, nullable=False, unique=True)
     hashes_password = Column(String(200), nullable=False, unique=True)
     confirmed = Column(Boolean, default=False)
@@ -30,3 +90,43 @@ class User(Base):
     contacts = relationship("Contact", back_populates="owner")
     avatar = Column(String, nullable=True)
 
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    recipient = Column(String(150), nullable=False)
+    subject = Column(String(255), nullable=False)
+    template = Column(String(100), nullable=False)
+    context = Column(JSON, nullable=False)
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=utcnow)
+    last_error = Column(Text, nullable=True)
+    crete_at = Column(DateTime, default=func.now())
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+
+class RefreshToken(Base):
+    """
+    An issued refresh token, kept when Redis is not configured. Times are Unix timestamps,
+    like the JWT ``iat`` and ``exp`` claims they are compared with.
+    """
+    __tablename__ = "refresh_tokens"
+    jti = Column(String(32), primary_key=True)
+    user_name = Column(String, nullable=False, index=True)
+    expires_at = Column(Float, nullable=False)
+    used_at = Column(Float, nullable=True)
+
+
+class TokenRevocation(Base):
+    """
+    The time before which every token of a user is revoked, kept when Redis is not configured.
+    """
+    __tablename__ = "token_revocations"
+    user_name = Column(String, primary_key=True)
+    revoked_at = Column(Float, nullable=False)
+    expires_at = Column(Float, nullable=False)
@@ -1,108 +1,357 @@
-from typing import List
+import base64
+import calendar
+import json
+from typing import AsyncIterator, List
 
-from sqlalchemy import or_, func
-from sqlalchemy.orm import Session
-from src.database.models import Contact
-from src.schemas import CreteContact
+from sqlalchemy import or_, func, select, case, literal_column, text, desc, table, column, update, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database.models import Contact, to_birthday_ordinal
+from src.schemas import ContactUpdate, CreteContact
+from src.services import contact_cache
+from src.services.typeahead import typeahead
 from datetime import date, timedelta
 
+contacts_fts = table("contacts_fts", column("rowid"))
 
-async def search_contacts(query: str, user_id: int, db: Session):
+CONTACT_FIELDS = ("id", "name", "second_name", "email", "phone", "born_date", "crete_at", "update_at")
+UPDATABLE_FIELDS = ("name", "second_name", "email", "phone", "born_date")
+
+
+def encode_cursor(data: dict) -> str:
+    """
+    Encode pagination state into an opaque cursor string.
+
+    Args:
+        data (dict): The pagination state, e.g. the last seen contact id.
+
+    Returns:
+        str: A URL-safe cursor.
     """
-    Search for contacts by a query string within a specific user's contacts.
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor (str): The opaque cursor from the client.
+
+    Returns:
+        dict: The pagination state.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as err:
+        raise ValueError("Invalid cursor") from err
+    if not isinstance(data, dict):
+        raise ValueError("Invalid cursor")
+    return data
+
+
+def _dialect_name(db: AsyncSession) -> str:
+    return db.get_bind().dialect.name
+
+
+def _select_contacts(fields: List[str] | None):
+    if fields:
+        return select(Contact.id, *(getattr(Contact, field) for field in fields if field != "id"))
+    return select(Contact)
+
+
+def _contacts_or_rows(result, fields: List[str] | None) -> List[Contact] | List[dict]:
+    if fields:
+        return [dict(row) for row in result.mappings().all()]
+    return result.scalars().all()
+
+
+async def search_contacts(query: str, user_id: int, db: AsyncSession, limit: int | None = None,
+                          offset: int = 0, fields: List[str] | None = None) -> List[Contact] | List[dict]:
+    """
+    Search a user's contacts by a prefix or substring of the name, second name, or email.
+
+    On PostgreSQL the substring match is served by ``pg_trgm`` GIN indexes and ranked by
+    trigram similarity. On SQLite an FTS5 trigram index is used and ranked by bm25, queries
+    shorter than three characters fall back to LIKE. Prefix matches rank first in both.
 
     Args:
         query (str): The search query (matches name, second name, or email).
         user_id (int): The ID of the user whose contacts are searched.
-        db (Session): The SQLAlchemy session.
+        db (AsyncSession): The SQLAlchemy async session.
+        limit (int | None): The maximum number of contacts to return, None for all.
+        offset (int): The number of ranked results to skip.
+        fields (List[str] | None): The contact fields to select as plain dicts, None for whole contacts.
+
+    Returns:
+        List[Contact] | List[dict]: A list of contacts matching the query, best matches first.
+    """
+    columns = (Contact.name, Contact.second_name, Contact.email)
+    prefix = case((or_(*(field.istartswith(query, autoescape=True) for field in columns)), 1), else_=0)
+    stmt = _select_contacts(fields).filter(Contact.owner_id == user_id)
+    dialect = _dialect_name(db)
+    if dialect == "sqlite" and len(query) >= 3:
+        stmt = stmt.join(contacts_fts, contacts_fts.c.rowid == Contact.id) \
+            .filter(text("contacts_fts MATCH :fts_query").bindparams(fts_query='"' + query.replace('"', '""') + '"')) \
+            .order_by(desc(prefix), literal_column("bm25(contacts_fts)"), Contact.id)
+    else:
+        stmt = stmt.filter(or_(*(field.icontains(query, autoescape=True) for field in columns)))
+        if dialect == "postgresql":
+            similarity = func.greatest(*(func.similarity(field, query) for field in columns))
+            stmt = stmt.order_by(desc(prefix), desc(similarity), Contact.id)
+        else:
+            stmt = stmt.order_by(desc(prefix), Contact.id)
+    stmt = stmt.offset(offset)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    result = await db.execute(stmt)
+    return _contacts_or_rows(result, fields)
+
+
+async def contacts_fingerprint(user_id: int, db: AsyncSession) -> tuple:
+    """
+    Return the latest update time and the number of a user's contacts.
+
+    Any insert, update or delete changes at least one of them, which makes the pair a
+    cheap validator for reads over all of a user's contacts.
+
+    Args:
+        user_id (int): The ID of the user whose contacts are checked.
+        db (AsyncSession): The SQLAlchemy async session.
 
     Returns:
-        List[Contact]: A list of contacts matching the query.
+        tuple: The maximum ``update_at`` and the contact count.
     """
-    q = db.query(Contact).filter(Contact.owner_id == user_id, (Contact.name.ilike(query))
-                                 | (Contact.second_name.ilike(query))
-                                 | (Contact.email.ilike(query)))
-    return q.all()
+    stmt = select(func.max(Contact.update_at), func.count(Contact.id)).filter(Contact.owner_id == user_id)
+    result = await db.execute(stmt)
+    return tuple(result.one())
 
 
-async def get_contact(contact_id: int, user_id: int, db: Session) -> Contact:
+async def get_contact(contact_id: int, user_id: int, db: AsyncSession) -> Contact:
     """
     Retrieve a specific contact by its ID for a given user.
 
     Args:
         contact_id (int): The ID of the contact to retrieve.
         user_id (int): The ID of the user who owns the contact.
-        db (Session): The SQLAlchemy session.
+        db (AsyncSession): The SQLAlchemy async session.
 
     Returns:
         Contact: The retrieved contact object, or None if not found.
     """
-    contact = db.query(Contact).filter(Contact.id == contact_id, Contact.owner_id == user_id).first()
-    return contact
+    stmt = select(Contact).filter(Contact.id == contact_id, Contact.owner_id == user_id)
+    result = await db.execute(stmt)
+    return result.scalar_one_or_none()
 
 
-async def update_contact(contact_id: int, user_id: int, body: Contact, db: Session) -> Contact | None:
+def contact_values(body: CreteContact | ContactUpdate) -> dict:
+    """
+    Return the column values a contact update writes.
+
+    Only the fields set on the body and not null are included, ``owner_id`` never is. A new
+    ``born_date`` also sets ``birthday_ordinal``, which the ORM validator cannot do
+    for an UPDATE statement.
+
+    Args:
+        body (CreteContact | ContactUpdate): A full or a partial contact.
+
+    Returns:
+        dict: The values by column name.
+    """
+    values = body.model_dump(include=set(UPDATABLE_FIELDS), exclude_unset=True, exclude_none=True)
+    if "born_date" in values:
+        values["birthday_ordinal"] = to_birthday_ordinal(values["born_date"])
+    return values
+
+
+async def update_contact(contact_id: int, user_id: int, body: CreteContact | ContactUpdate,
+                         db: AsyncSession) -> Contact | None:
     """
     Update the details of a contact for a specific user.
 
+    The contact is updated and read back by one ``UPDATE ... RETURNING`` statement. A
+    ``CreteContact`` replaces every field, a ``ContactUpdate`` only the fields it sets.
+
     Args:
         contact_id (int): The ID of the contact to update.
         user_id (int): The ID of the user who owns the contact.
-        body (Contact): The updated contact data.
-        db (Session): The SQLAlchemy session.
+        body (CreteContact | ContactUpdate): The updated contact data.
+        db (AsyncSession): The SQLAlchemy async session.
 
     Returns:
         Contact | None: The updated contact object, or None if the contact does not exist.
     """
-    contact: object = db.query(Contact).filter(Contact.id == contact_id, Contact.owner_id == user_id).first()
+    values = contact_values(body)
+    if not values:
+        return await get_contact(contact_id, user_id, db)
+    stmt = update(Contact).filter(Contact.id == contact_id, Contact.owner_id == user_id).values(**values) \
+        .returning(Contact).execution_options(populate_existing=True)
+    result = await db.execute(stmt)
+    contact = result.scalar_one_or_none()
+    await db.commit()
     if contact:
-        contact.name = body.name
-        db.commit()
+        typeahead.on_save(user_id, contact)
+        await contact_cache.bump(user_id)
     return contact
 
 
-async def remove_contact(contact_id: int, user_id: int, db: Session) -> Contact | None:
+async def remove_contact(contact_id: int, user_id: int, db: AsyncSession) -> Contact | None:
     """
     Remove a contact by its ID for a specific user.
 
+    The contact is deleted and returned by one ``DELETE ... RETURNING`` statement.
+
     Args:
         contact_id (int): The ID of the contact to remove.
         user_id (int): The ID of the user who owns the contact.
-        db (Session): The SQLAlchemy session.
+        db (AsyncSession): The SQLAlchemy async session.
 
     Returns:
         Contact | None: The removed contact object, or None if the contact does not exist.
     """
-    contact = db.query(Contact).filter(Contact.id == contact_id, Contact.owner_id == user_id).first()
+    stmt = delete(Contact).filter(Contact.id == contact_id, Contact.owner_id == user_id).returning(Contact)
+    result = await db.execute(stmt)
+    contact = result.scalar_one_or_none()
+    await db.commit()
     if contact:
-        db.delete(contact)
-        db.commit()
+        typeahead.on_remove(user_id, contact_id)
+        await contact_cache.bump(user_id)
     return contact
 
 
-async def get_contacts(user_id: int, db: Session) -> List[Contact]:
+async def get_contacts_by_ids(contact_ids: List[int], user_id: int, db: AsyncSession) -> List[Contact]:
     """
-    Retrieve all contacts for a specific user.
+    Retrieve the contacts of a user among the given IDs with one query.
 
     Args:
-        user_id (int): The ID of the user whose contacts are retrieved.
-        db (Session): The SQLAlchemy session.
+        contact_ids (List[int]): The IDs of the contacts.
+        user_id (int): The ID of the user who owns the contacts.
+        db (AsyncSession): The SQLAlchemy async session.
 
     Returns:
-        List[Contact]: A list of all contacts for the user.
+        List[Contact]: The contacts found, IDs of other users' contacts are left out.
+    """
+    if not contact_ids:
+        return []
+    stmt = select(Contact).filter(Contact.id.in_(contact_ids), Contact.owner_id == user_id)
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
+
+async def update_contacts(bodies: dict, user_id: int, db: AsyncSession) -> set:
     """
-    contacts = db.query(Contact).filter(Contact.owner_id == user_id).all()
+    Apply partial updates to many contacts of a user without committing.
+
+    The owned IDs are selected with one query, then the updates are sent as one
+    executemany UPDATE per set of changed columns. The caller commits, so the updates
+    can share a transaction with other writes.
+
+    Args:
+        bodies (dict): The ``ContactUpdate`` or ``CreteContact`` by contact ID.
+        user_id (int): The ID of the user who owns the contacts.
+        db (AsyncSession): The SQLAlchemy async session.
+
+    Returns:
+        set: The IDs of the contacts owned by the user, whether or not they had changes.
+    """
+    if not bodies:
+        return set()
+    result = await db.execute(select(Contact.id).filter(Contact.id.in_(list(bodies)), Contact.owner_id == user_id))
+    owned = set(result.scalars().all())
+    rows = [{"id": contact_id, **values} for contact_id in owned
+            if (values := contact_values(bodies[contact_id]))]
+    if rows:
+        # the contacts are not loaded in the session, there is nothing to synchronize
+        await db.execute(update(Contact).filter(Contact.owner_id == user_id)
+                         .execution_options(synchronize_session=None), rows)
+        typeahead.invalidate(user_id)
+    return owned
+
+
+async def remove_contacts(contact_ids: List[int], user_id: int, db: AsyncSession) -> List[Contact]:
+    """
+    Delete many contacts of a user with one ``DELETE ... RETURNING`` without committing.
+
+    Args:
+        contact_ids (List[int]): The IDs of the contacts to delete.
+        user_id (int): The ID of the user who owns the contacts.
+        db (AsyncSession): The SQLAlchemy async session.
+
+    Returns:
+        List[Contact]: The deleted contacts.
+    """
+    if not contact_ids:
+        return []
+    stmt = delete(Contact).filter(Contact.id.in_(contact_ids), Contact.owner_id == user_id).returning(Contact)
+    result = await db.execute(stmt)
+    contacts = result.scalars().all()
+    for contact in contacts:
+        typeahead.on_remove(user_id, contact.id)
     return contacts
 
 
-async def create_contact(body: CreteContact, user_id: int, db: Session) -> Contact:
+async def get_contacts(user_id: int, db: AsyncSession, limit: int | None = None, after_id: int | None = None,
+                       fields: List[str] | None = None) -> List[Contact] | List[dict]:
+    """
+    Retrieve contacts for a specific user, one keyset page at a time.
+
+    Contacts are ordered by id, a page starts right after ``after_id``. When ``fields`` is
+    given only those columns (plus ``id``) are selected and plain dicts are returned
+    instead of ORM objects.
+
+    Args:
+        user_id (int): The ID of the user whose contacts are retrieved.
+        db (AsyncSession): The SQLAlchemy async session.
+        limit (int | None): The maximum number of contacts to return, None for all.
+        after_id (int | None): The id of the last contact of the previous page.
+        fields (List[str] | None): The contact fields to select, None for whole contacts.
+
+    Returns:
+        List[Contact] | List[dict]: The contacts of the page.
+    """
+    stmt = _select_contacts(fields).filter(Contact.owner_id == user_id)
+    if after_id is not None:
+        stmt = stmt.filter(Contact.id > after_id)
+    stmt = stmt.order_by(Contact.id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    result = await db.execute(stmt)
+    return _contacts_or_rows(result, fields)
+
+
+async def export_contacts(user_id: int, db: AsyncSession, batch_size: int = 1000) -> AsyncIterator[List[dict]]:
+    """
+    Stream all contacts of a user in batches through a server-side cursor.
+
+    Only one batch is held in memory at a time, whatever the number of contacts.
+
+    Args:
+        user_id (int): The ID of the user whose contacts are exported.
+        db (AsyncSession): The SQLAlchemy async session.
+        batch_size (int): The number of rows fetched from the cursor at once.
+
+    Yields:
+        List[dict]: The next batch of contact rows.
+    """
+    columns = [getattr(Contact, field) for field in CONTACT_FIELDS]
+    stmt = select(*columns).filter(Contact.owner_id == user_id).order_by(Contact.id) \
+        .execution_options(yield_per=batch_size)
+    result = await db.stream(stmt)
+    async for partition in result.mappings().partitions():
+        yield [dict(row) for row in partition]
+
+
+async def create_contact(body: CreteContact, user_id: int, db: AsyncSession) -> Contact:
     """
     Create a new contact for a specific user.
 
     Args:
         body (CreteContact): The contact data to create.
         user_id (int): The ID of the user who owns the new contact.
-        db (Session): The SQLAlchemy session.
+        db (AsyncSession): The SQLAlchemy async session.
 
     Returns:
         Contact: The created contact object.
@@ -110,36 +359,90 @@ async def create_contact(body: CreteContact, user_id: int, db: Session) -> Conta
     contact = Contact(name=body.name, second_name=body.second_name, email=body.email, phone=body.phone,
                       born_date=body.born_date, owner_id=user_id)
     db.add(contact)
-    db.commit()
-    db.refresh(contact)
+    await db.commit()
+    await db.refresh(contact)
+    typeahead.on_save(user_id, contact)
+    await contact_cache.bump(user_id)
     return contact
 
 
-async def birthday(user_id: int, db: Session):
+async def create_contacts(bodies: List[CreteContact], user_id: int, db: AsyncSession) -> set:
+    """
+    Insert many contacts for a user with one multi-row INSERT, skipping conflicts.
+
+    Rows whose email or phone already exists are left out by ``ON CONFLICT DO NOTHING``.
+    The caller commits, so a whole import can run in one transaction, and then bumps the
+    contact cache version.
+
+    Args:
+        bodies (List[CreteContact]): The validated contacts to insert.
+        user_id (int): The ID of the user who owns the new contacts.
+        db (AsyncSession): The SQLAlchemy async session.
+
+    Returns:
+        set: The emails of the contacts that were actually inserted.
+    """
+    if not bodies:
+        return set()
+    dialect = postgresql if _dialect_name(db) == "postgresql" else sqlite
+    stmt = dialect.insert(Contact).values([
+        dict(name=body.name, second_name=body.second_name, email=body.email, phone=body.phone,
+             born_date=body.born_date, birthday_ordinal=to_birthday_ordinal(body.born_date), owner_id=user_id)
+        for body in bodies
+    ]).on_conflict_do_nothing().returning(Contact.email)
+    result = await db.execute(stmt)
+    typeahead.invalidate(user_id)
+    return set(result.scalars().all())
+
+
+def birthday_window(today: date, days: int) -> tuple[int, int] | None:
+    """
+    Compute the birthday ordinal range covering ``today`` and the next ``days`` days.
+
+    The range wraps around the new year when ``start > end``. In a non-leap year a
+    window ending on 28 February is widened to include contacts born on 29 February.
+
+    Args:
+        today (date): The first day of the window.
+        days (int): The number of days after today included in the window.
+
+    Returns:
+        tuple[int, int] | None: The inclusive (start, end) ordinals, or None if the window covers the whole year.
     """
-    Retrieve contacts with upcoming birthdays within the next week for a specific user.
+    if days >= 365:
+        return None
+    date_to = today + timedelta(days=days)
+    start, end = to_birthday_ordinal(today), to_birthday_ordinal(date_to)
+    if end == 228 and not calendar.isleap(date_to.year):
+        end = 229
+    return start, end
+
+
+async def birthday(user_id: int, db: AsyncSession, days: int = 7,
+                   fields: List[str] | None = None) -> List[Contact] | List[dict]:
+    """
+    Retrieve contacts with upcoming birthdays for a specific user.
+
+    This is a range lookup on the indexed ``(owner_id, birthday_ordinal)`` pair, the
+    results are ordered by how soon the birthday comes.
 
     Args:
         user_id (int): The ID of the user whose contacts are checked.
-        db (Session): The SQLAlchemy session.
-
-    Returns:
-        List[Contact]: A list of contacts with birthdays in the next 7 days.
-    """
-    current_day = date.today()
-    date_to = date.today() + timedelta(days=7)
-    this_year = current_day.year
-    next_year = current_day.year + 1
-    contacts = db.query(Contact).filter(Contact.owner_id == user_id,
-                                        or_(
-                                            func.to_date(
-                                                func.concat(func.to_char(Contact.born_date, "DDMM"), this_year),
-                                                "DDMMYYYY").between(
-                                                current_day, date_to),
-                                            func.to_date(
-                                                func.concat(func.to_char(Contact.born_date, "DDMM"), next_year),
-                                                "DDMMYYYY").between(
-                                                current_day, date_to)
-                                        )
-                                        ).all()
-    return contacts
+        db (AsyncSession): The SQLAlchemy async session.
+        days (int): The number of days after today to look ahead.
+        fields (List[str] | None): The contact fields to select as plain dicts, None for whole contacts.
+
+    Returns:
+        List[Contact] | List[dict]: A list of contacts with birthdays in the next ``days`` days.
+    """
+    stmt = _select_contacts(fields).filter(Contact.owner_id == user_id)
+    window = birthday_window(date.today(), days)
+    if window is not None:
+        start, end = window
+        if start <= end:
+            stmt = stmt.filter(Contact.birthday_ordinal.between(start, end))
+        else:
+            stmt = stmt.filter(or_(Contact.birthday_ordinal >= start, Contact.birthday_ordinal <= end))
+        stmt = stmt.order_by(case((Contact.birthday_ordinal >= start, 0), else_=1), Contact.birthday_ordinal)
+    result = await db.execute(stmt)
+    return _contacts_or_rows(result, fields)
@@ -1,7 +1,20 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
+from src.conf.config import settings
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt releases the GIL, so a thread pool keeps the event loop free while hashing
+hash_executor = ThreadPoolExecutor(max_workers=settings.hash_pool_size, thread_name_prefix="bcrypt")
+_queue_depth = 0
+_metrics_hooks: list[Callable[[str, float, int], None]] = []
+
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -9,3 +22,66 @@ def verify_password(plain_password, hashed_password):
 
 def get_password_hash(password):
     return pwd_context.hash(password)
+
+
+def add_metrics_hook(hook: Callable[[str, float, int], None]) -> None:
+    """
+    Register a callback that is called after every pooled hash operation.
+
+    Args:
+        hook (Callable[[str, float, int], None]): Receives the operation name ("hash" or "verify"),
+            the latency in seconds including the time spent queued, and the queue depth left.
+    """
+    _metrics_hooks.append(hook)
+
+
+async def _run_in_pool(operation: str, func, *args):
+    global _queue_depth
+    if _queue_depth >= settings.hash_queue_limit:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many authentication requests, try again later",
+            headers={"Retry-After": str(settings.hash_retry_after)},
+        )
+    _queue_depth += 1
+    start = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(hash_executor, func, *args)
+    finally:
+        _queue_depth -= 1
+        latency = time.perf_counter() - start
+        for hook in _metrics_hooks:
+            hook(operation, latency, _queue_depth)
+
+
+async def async_verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password on the hashing pool without blocking the event loop.
+
+    Args:
+        plain_password (str): The password provided by the user.
+        hashed_password (str): The stored bcrypt hash.
+
+    Returns:
+        bool: True if the password matches the hash.
+
+    Raises:
+        HTTPException: 503 with Retry-After when the hashing queue is full.
+    """
+    return await _run_in_pool("verify", verify_password, plain_password, hashed_password)
+
+
+async def async_get_password_hash(password: str) -> str:
+    """
+    Hash a password on the hashing pool without blocking the event loop.
+
+    Args:
+        password (str): The password to hash.
+
+    Returns:
+        str: The bcrypt hash.
+
+    Raises:
+        HTTPException: 503 with Retry-After when the hashing queue is full.
+    """
+    return await _run_in_pool("hash", get_password_hash, password)
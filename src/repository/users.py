@@ -1,87 +1,99 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.models import User
-from src.repository.pass_utils import get_password_hash
+from src.repository.pass_utils import async_get_password_hash
 from src.schema_user import UserCreate
+from src.services import user_cache
 
 
-async def create_user(body: UserCreate, db: Session) -> User:
+async def create_user(body: UserCreate, db: AsyncSession) -> User:
     """
     Create a new user with hashed password and save it to the database.
 
     Args:
        body (UserCreate): The data for the new user.
-       db (Session): The SQLAlchemy session.
+       db (AsyncSession): The SQLAlchemy async session.
 
     Returns:
        User: The created user object.
     """
-    hashed_password = get_password_hash(body.hashes_password)
+    hashed_password = await async_get_password_hash(body.hashes_password)
     user = User(user_name=body.user_name, email=body.email, hashes_password=hashed_password)
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 
-async def get_user_by_email(email: str, db: Session):
+async def get_user_by_email(email: str, db: AsyncSession):
     """
     Retrieve a user by their email address.
 
     Args:
         email (str): The email address of the user to retrieve.
-        db (Session): The SQLAlchemy session.
+        db (AsyncSession): The SQLAlchemy async session.
 
     Returns:
         User | None: The user object if found, or None if not.
     """
-    query = db.query(User).filter(User.email == email).first()
-    return query
+    result = await db.execute(select(User).filter(User.email == email))
+    return result.scalar_one_or_none()
 
 
-async def get_user_by_username(username: str, db: Session):
+async def get_user_by_username(username: str, db: AsyncSession):
     """
     Retrieve a user by their username.
 
+    User names are not unique, the first user registered with the name is returned.
+
     Args:
         username (str): The username of the user to retrieve.
-        db (Session): The SQLAlchemy session.
+        db (AsyncSession): The SQLAlchemy async session.
 
     Returns:
         User | None: The user object if found, or None if not.
     """
-    query = db.query(User).filter(User.user_name == username).first()
-    return query
+    result = await db.execute(select(User).filter(User.user_name == username).order_by(User.id).limit(1))
+    return result.scalars().first()
 
 
-async def confirmed_email(email: str, db: Session) -> None:
+async def confirmed_email(email: str, db: AsyncSession) -> None:
     """
     Confirm a user's email address by setting the confirmed flag to True.
 
+    The flag is set with one UPDATE rather than by loading the user first.
+
     Args:
         email (str): The email address of the user to confirm.
-        db (Session): The SQLAlchemy session.
+        db (AsyncSession): The SQLAlchemy async session.
 
     Returns:
         None
     """
-    user = await get_user_by_email(email, db)
-    user.confirmed = True
-    db.commit()
+    result = await db.execute(update(User).where(User.email == email).values(confirmed=True)
+                              .returning(User.user_name))
+    user_name = result.scalar_one_or_none()
+    await db.commit()
+    if user_name is not None:
+        await user_cache.invalidate_user(user_name)
 
 
-async def update_avatar(email, url: str, db: Session) -> User:
+async def update_avatar(email, url: str, db: AsyncSession) -> User | None:
     """
     Update a user's avatar URL.
 
     Args:
         email (str): The email address of the user whose avatar is updated.
         url (str): The new avatar URL.
-        db (Session): The SQLAlchemy session.
+        db (AsyncSession): The SQLAlchemy async session.
 
     Returns:
-        User: The updated user object.
+        User | None: The updated user object, or None if there is no such user.
     """
     user = await get_user_by_email(email, db)
+    if user is None:
+        return None
     user.avatar = url
-    db.commit()
+    await db.commit()
+    await user_cache.invalidate_user(user.user_name)
     return user
@@ -1,14 +1,20 @@
+import hashlib
+import time
+import uuid
 from datetime import datetime, timedelta, timezone
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.conf.config import settings
 from src.database.db import get_db
 from src.database.models import User
 from src.repository import users as repository_users
-from src.schema_user import RoleEnum, TokenData
+from src.schema_user import RoleEnum, Token, TokenData
+from src.services import token_store, user_cache
+from src.services.user_cache import TTLCache
 
 
 ALGORITHM = "HS256"
@@ -20,6 +26,37 @@ SECRET_KEY = 'mysecretkey'
 oauth2_schema = OAuth2PasswordBearer(tokenUrl="/api/users/login")
 
 
+def jwt_backend(name: str):
+    """
+    Return a function verifying and decoding a token with the given JWT library.
+
+    ``jose`` is python-jose, ``pyjwt`` is the faster PyJWT, imported only when selected.
+    Both raise ``JWTError`` for an invalid or expired token.
+
+    Args:
+        name (str): The backend name, ``jose`` or ``pyjwt``.
+
+    Returns:
+        A function taking a token and returning its claims.
+    """
+    if name == "pyjwt":
+        import jwt as pyjwt
+
+        def decode(token: str) -> dict:
+            try:
+                return pyjwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            except pyjwt.PyJWTError as err:
+                raise JWTError(str(err)) from err
+        return decode
+    return lambda token: jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+
+decode_jwt = jwt_backend(settings.jwt_backend)
+
+# Verified access tokens by SHA-256 of the token, each entry expires with its token
+access_token_cache = TTLCache(settings.token_cache_size, ttl=0)
+
+
 def create_verification_token(email: str) -> str:
     """
     Create a verification token for email verification.
@@ -70,7 +107,7 @@ def create_access_token(data: dict):
     """
     to_encode = data.copy()
     expire = datetime.now() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": time.time()})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -79,6 +116,9 @@ def create_refresh_token(data: dict):
     """
     Create a refresh token for renewing access tokens.
 
+    The token gets a random ``jti`` unless the payload has one. Use ``issue_tokens`` to
+    also register it in the token store, an unregistered refresh token is rejected.
+
     Args:
         data (dict): The payload data to include in the refresh token.
 
@@ -87,7 +127,8 @@ def create_refresh_token(data: dict):
     """
     to_encode = data.copy()
     expire = datetime.now() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire})
+    to_encode.setdefault("jti", uuid.uuid4().hex)
+    to_encode.update({"exp": expire, "iat": time.time(), "type": "refresh"})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -96,31 +137,93 @@ def decode_access_token(token: str) -> TokenData | None:
     """
     Decode the access token and extract the token data.
 
+    A verified token is cached until its ``exp``, so a client reusing its token is
+    verified once rather than on every request. Invalid tokens are never cached.
+    Refresh tokens are not accepted as access tokens.
+
     Args:
         token (str): The JWT access token to decode.
 
     Returns:
         TokenData | None: The decoded token data if valid, or None if invalid.
     """
+    key = hashlib.sha256(token.encode()).digest()
+    token_data = access_token_cache.get(key)
+    if token_data is not None:
+        return token_data
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-        return TokenData(username=username)
+        payload = decode_jwt(token)
+    except JWTError:
+        return None
+    username: str = payload.get("sub")
+    if username is None or payload.get("type") == "refresh":
+        return None
+    token_data = TokenData(username=username, issued_at=payload.get("iat"))
+    if "exp" in payload:
+        access_token_cache.set(key, token_data, ttl=payload["exp"] - time.time())
+    return token_data
+
+
+def decode_refresh_token(token: str) -> dict | None:
+    """
+    Verify a refresh token and return its claims.
+
+    Args:
+        token (str): The JWT refresh token.
+
+    Returns:
+        dict | None: The claims with ``sub`` and ``jti``, or None if the token is invalid.
+    """
+    try:
+        payload = decode_jwt(token)
     except JWTError:
         return None
+    if payload.get("type") != "refresh" or not payload.get("sub") or not payload.get("jti"):
+        return None
+    return payload
+
+
+async def issue_tokens(username: str) -> Token:
+    """
+    Create an access and refresh token pair and register the refresh token.
+
+    Args:
+        username (str): The user name, used as the token subject.
+
+    Returns:
+        Token: The new token pair.
+    """
+    jti = uuid.uuid4().hex
+    refresh_token = create_refresh_token(data={"sub": username, "jti": jti})
+    await token_store.store.add(username, jti, timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS).total_seconds())
+    return Token(access_token=create_access_token(data={"sub": username}), refresh_token=refresh_token,
+                 token_type="bearer")
+
+
+async def revoke_tokens(username: str) -> None:
+    """
+    Log a user out everywhere: revoke every refresh token and every access token issued so far.
+
+    Args:
+        username (str): The user name.
+    """
+    await token_store.store.revoke_all(username, timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS).total_seconds())
 
 
 async def get_current_user(
-    token: str = Depends(oauth2_schema), db: Session = Depends(get_db)
+    token: str = Depends(oauth2_schema), db: AsyncSession = Depends(get_db)
 ) -> User:
     """
     Get the current authenticated user based on the provided access token.
 
+    The user row is served from the user cache when possible, so the common authenticated
+    request does not touch the database. Tokens issued before the user logged out everywhere
+    are rejected after one key lookup in the token store. FastAPI caches this dependency per
+    request, so the router-level and endpoint-level declarations resolve it only once.
+
     Args:
         token (str): The OAuth2 token provided by the client.
-        db (Session): The SQLAlchemy session.
+        db (AsyncSession): The SQLAlchemy async session.
 
     Returns:
         User: The authenticated user object.
@@ -136,9 +239,16 @@ async def get_current_user(
     token_data = decode_access_token(token)
     if token_data is None:
         raise credentials_exception
+    revoked_before = await token_store.revoked_before(token_data.username)
+    if revoked_before is not None and (token_data.issued_at or 0) < revoked_before:
+        raise credentials_exception
+    user = await user_cache.get_user(token_data.username)
+    if user is not None:
+        return user
     user = await repository_users.get_user_by_username(token_data.username, db)
     if user is None:
         raise credentials_exception
+    await user_cache.set_user(user)
     return user
 
 
@@ -197,15 +307,12 @@ class RoleChecker:
         """
         self.allowed_roles = allowed_roles
 
-    async def __call__(
-        self, token: str = Depends(oauth2_schema), db: Session = Depends(get_db)
-    ) -> User:
+    async def __call__(self, user: User = Depends(get_current_user)) -> User:
         """
         Check if the current user has one of the allowed roles.
 
         Args:
-            token (str): The OAuth2 token provided by the client.
-            db (Session): The SQLAlchemy session.
+            user (User): The currently authenticated user.
 
         Returns:
             User: The authenticated user if they have an allowed role.
@@ -213,8 +320,6 @@ class RoleChecker:
         Raises:
             HTTPException: If the user does not have the required role.
         """
-        user = await get_current_user(token, db)
-
         if user.role.name not in [role.value for role in self.allowed_roles]:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
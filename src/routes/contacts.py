@@ -1,45 +1,148 @@
-from fastapi import APIRouter, status, Depends, HTTPException, Query
-from fastapi_limiter.depends import RateLimiter
-
-from src.schemas import ResponseContact, CreteContact
-from sqlalchemy.orm import Session
-from src.database.db import get_db
+import csv
+import io
+import json
+from datetime import date
+
+from fastapi import APIRouter, status, Depends, HTTPException, Query, Response, Request
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import UploadFile
+
+from pydantic import ValidationError
+
+from src.schemas import ResponseContact, CreteContact, ResponseContactFields, BulkImportResult, BulkRowError, \
+    ContactUpdate, BatchRequest, BatchResponse, BatchItemResult
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database.db import get_db, get_session_maker
 from src.repository import contacts as repository_contacts
-from typing import List
+from typing import AsyncIterator, Iterator, List
 from src.database.models import User
 from src.repository.utils import get_current_user
+from src.services import contact_cache
+from src.services.serialization import RowsResponse, encode_rows
+from src.services.typeahead import typeahead
+from src.services.rate_limit import RateLimiter
+from src.conf.config import settings
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
 router = APIRouter(prefix='/contacts', tags=["contacts"], dependencies=[Depends(get_current_user)])
 
 
-@router.get("/search", response_model=List[ResponseContact], status_code=status.HTTP_200_OK)
-async def search_contacts(q: str = Query(None, description="Search string for name, second name, or email"),
-                          db: Session = Depends(get_db),
+def parse_fields(fields: str | None) -> List[str] | None:
+    """
+    Parse and validate a comma separated ``fields=`` projection.
+
+    Args:
+        fields (str | None): The raw query parameter.
+
+    Returns:
+        List[str] | None: The requested contact fields, or None for whole contacts.
+
+    Raises:
+        HTTPException: If an unknown field is requested.
+    """
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = set(names) - set(repository_contacts.CONTACT_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return names
+
+
+def parse_cursor(cursor: str | None) -> dict:
+    """
+    Decode a client supplied pagination cursor.
+
+    Args:
+        cursor (str | None): The opaque cursor, or None for the first page.
+
+    Returns:
+        dict: The decoded pagination state, empty for the first page.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    if cursor is None:
+        return {}
+    try:
+        return repository_contacts.decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+@router.get("/search", response_model=List[ResponseContactFields], response_model_exclude_unset=True,
+            status_code=status.HTTP_200_OK,
+            responses={304: {"description": "No contact has changed since the ETag was issued"}})
+async def search_contacts(request: Request,
+                          q: str = Query(..., min_length=1,
+                                         description="Search string for name, second name, or email"),
+                          mode: str = Query("full", pattern="^(full|prefix)$",
+                                            description="full: ranked search, prefix: fast typeahead"),
+                          limit: int = Query(settings.contacts_page_size, ge=1, le=settings.contacts_page_max),
+                          cursor: str | None = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+                          db: AsyncSession = Depends(get_db),
                           current_user: User = Depends(get_current_user)):
     """
-    Search for contacts by name, second name, or email.
+    Search for contacts by a prefix or substring of the name, second name, or email.
+
+    Results are ranked, best matches first. The cursor for the next page is returned in the
+    ``X-Next-Cursor`` header. With ``mode=prefix`` the search is answered from an in-memory
+    typeahead index over name, second name, email and phone, returns only those fields and
+    is not paginated.
+
+    The weak ``ETag`` of a full search is derived from the latest ``update_at`` and the number
+    of the user's contacts, so a matching ``If-None-Match`` gets a 304 without running the search.
 
     Args:
+        request (Request): The incoming request, read for ``If-None-Match``.
         q (str): Query string for the search.
-        db (Session): The database session.
+        mode (str): ``full`` (default) or ``prefix``.
+        limit (int): The maximum number of contacts on the page.
+        cursor (str | None): The cursor of the page to return, None for the first page.
+        db (AsyncSession): The database session.
         current_user (User): The currently authenticated user.
 
     Returns:
-        List[ResponseContact]: A list of matching contacts.
+        List[ResponseContactFields]: A page of matching contacts.
     """
     user_id = current_user.id
-    contact_s = await repository_contacts.search_contacts(q, user_id, db)
-    return contact_s
+    key = f"search:{mode}:{q}:{limit}:{cursor}"
+    typeahead_search = mode == "prefix" and settings.typeahead_enabled
+    if typeahead_search:
+        # the typeahead index is rebuilt whenever the version moves, the version alone validates it
+        version = await contact_cache.version(user_id)
+    else:
+        # a local version differs per worker and expires, so only the shared one may go into the ETag
+        key += f":{await repository_contacts.contacts_fingerprint(user_id, db)}"
+        version = await contact_cache.shared_version(user_id) or ""
+    etag = contact_cache.etag(user_id, version, key)
+    if contact_cache.not_modified(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    headers = {"ETag": etag}
+    if typeahead_search:
+        return RowsResponse(await typeahead.search(user_id, q, limit, db, version), headers=headers)
+    offset = parse_cursor(cursor).get("offset", 0)
+    if isinstance(offset, bool) or not isinstance(offset, int) or offset < 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    rows = await repository_contacts.search_contacts(q, user_id, db, limit=limit, offset=offset,
+                                                     fields=list(repository_contacts.CONTACT_FIELDS))
+    if len(rows) == limit:
+        headers["X-Next-Cursor"] = repository_contacts.encode_cursor({"offset": offset + limit})
+    return RowsResponse(rows, headers=headers)
 
 
 @router.get('/birth', response_model=List[ResponseContact], status_code=status.HTTP_200_OK)
-async def get_contact_birthday(db: Session = Depends(get_db),
+async def get_contact_birthday(days: int = Query(7, ge=0, le=366, description="Days to look ahead"),
+                               db: AsyncSession = Depends(get_db),
                                current_user: User = Depends(get_current_user)):
     """
-    Get contacts who have a birthday in the next 7 days.
+    Get contacts who have a birthday in the next ``days`` days (7 by default).
 
     Args:
-        db (Session): The database session.
+        days (int): The number of days to look ahead.
+        db (AsyncSession): The database session.
         current_user (User): The currently authenticated user.
 
     Returns:
@@ -49,20 +152,259 @@ async def get_contact_birthday(db: Session = Depends(get_db),
         HTTPException: If no contacts with upcoming birthdays are found.
     """
     user_id = current_user.id
-    contacts = await repository_contacts.birthday(user_id, db)
-    if not contacts:
+    rows = await repository_contacts.birthday(user_id, db, days, fields=list(repository_contacts.CONTACT_FIELDS))
+    if not rows:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='No contacts')
-    return contacts
+    return RowsResponse(rows)
+
+
+def _json_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _ndjson_lines(batch: List[dict]) -> str:
+    return "".join(json.dumps(row, default=_json_default) + "\n" for row in batch)
+
+
+def _csv_lines(batch: List[dict], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=repository_contacts.CONTACT_FIELDS)
+    if header:
+        writer.writeheader()
+    writer.writerows({key: value.isoformat() if isinstance(value, date) else value for key, value in row.items()}
+                     for row in batch)
+    return buffer.getvalue()
+
+
+@router.get('/export', status_code=status.HTTP_200_OK)
+async def export_contacts(export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+                          session_maker: async_sessionmaker = Depends(get_session_maker),
+                          current_user: User = Depends(get_current_user)):
+    """
+    Stream all contacts of the current user as NDJSON or CSV.
+
+    Rows are read through a server-side cursor and written out batch by batch, so memory
+    use stays flat whatever the number of contacts. The stream uses its own session,
+    because the request session is closed before the response body is sent.
+
+    Args:
+        export_format (str): ``ndjson`` (default) or ``csv``.
+        session_maker (async_sessionmaker): The factory for the streaming session.
+        current_user (User): The currently authenticated user.
+
+    Returns:
+        StreamingResponse: The exported contacts.
+    """
+    user_id = current_user.id
+
+    async def body() -> AsyncIterator[str]:
+        if export_format == "csv":
+            yield _csv_lines([], header=True)
+        async with session_maker() as db:
+            async for batch in repository_contacts.export_contacts(user_id, db):
+                yield _csv_lines(batch) if export_format == "csv" else _ndjson_lines(batch)
+
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type,
+                             headers={"Content-Disposition": f"attachment; filename=contacts.{export_format}"})
+
+
+def _iter_upload(file: UploadFile) -> Iterator[tuple[int, dict | str]]:
+    # the file is decoded while it is read, so a bad byte can surface at any row
+    text = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    try:
+        if (file.filename or "").endswith(".csv") or file.content_type == "text/csv":
+            yield from enumerate(csv.DictReader(text))
+            return
+        index = 0
+        for line in text:
+            if not line.strip():
+                continue
+            try:
+                yield index, json.loads(line)
+            except ValueError:
+                yield index, "Invalid JSON line"
+            index += 1
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File must be UTF-8 encoded")
+    except csv.Error as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid CSV file: {err}")
+
+
+async def _iter_import_rows(request: Request) -> Iterator[tuple[int, dict | str]]:
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        form = await request.form()
+        file = form.get("file")
+        if not isinstance(file, UploadFile):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing file")
+        return _iter_upload(file)
+    try:
+        rows = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a JSON array of contacts")
+    return enumerate(rows)
+
+
+@router.post('/bulk', response_model=BulkImportResult, status_code=status.HTTP_200_OK)
+async def bulk_create_contacts(request: Request,
+                               on_conflict: str = Query("skip", pattern="^(skip|abort)$"),
+                               db: AsyncSession = Depends(get_db),
+                               current_user: User = Depends(get_current_user)):
+    """
+    Import many contacts at once.
+
+    The body is either a JSON array of contacts or a multipart upload with a ``file``
+    field holding CSV (with a header row) or NDJSON. Rows are validated with
+    ``CreteContact`` and inserted in chunks with multi-row INSERTs, all in one transaction.
+    Rows whose email or phone already exists are skipped, or with ``on_conflict=abort``
+    the whole import is rolled back.
+
+    Args:
+        request (Request): The incoming request carrying the contacts.
+        on_conflict (str): ``skip`` (default) or ``abort``.
+        db (AsyncSession): The database session.
+        current_user (User): The currently authenticated user.
 
+    Returns:
+        BulkImportResult: The number of inserted and skipped rows and the per-row errors.
 
-@router.get('/{contact_id}', response_model=ResponseContact, status_code=status.HTTP_200_OK)
-async def get_contact(contact_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    Raises:
+        HTTPException: If the body is malformed, too large, or a conflict aborts the import.
+    """
+    user_id = current_user.id
+    errors: List[BulkRowError] = []
+    seen_emails, seen_phones = set(), set()
+    inserted = skipped = 0
+    chunk: List[tuple[int, CreteContact]] = []
+
+    async def flush():
+        nonlocal inserted, skipped
+        created = await repository_contacts.create_contacts([body for _, body in chunk], user_id, db)
+        inserted += len(created)
+        for index, body in chunk:
+            if body.email not in created:
+                skipped += 1
+                errors.append(BulkRowError(row=index, error="Contact with this email or phone already exists"))
+        chunk.clear()
+
+    for index, row in await _iter_import_rows(request):
+        if index >= settings.bulk_import_max_rows:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                detail=f"At most {settings.bulk_import_max_rows} contacts per import")
+        if not isinstance(row, dict):
+            errors.append(BulkRowError(row=index, error=row if isinstance(row, str) else "Expected a contact object"))
+            continue
+        try:
+            body = CreteContact.model_validate({**row, "owner_id": user_id})
+        except ValidationError as err:
+            message = "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in err.errors())
+            errors.append(BulkRowError(row=index, error=message))
+            continue
+        if body.email in seen_emails or body.phone in seen_phones:
+            skipped += 1
+            errors.append(BulkRowError(row=index, error="Duplicate email or phone within the import"))
+            continue
+        seen_emails.add(body.email)
+        seen_phones.add(body.phone)
+        chunk.append((index, body))
+        if len(chunk) >= settings.bulk_import_chunk_size:
+            await flush()
+    await flush()
+
+    if skipped and on_conflict == "abort":
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail=[error.model_dump() for error in errors])
+    await db.commit()
+    if inserted:
+        # again after the commit, a typeahead build may have read the rows before it
+        typeahead.invalidate(user_id)
+        await contact_cache.bump(user_id)
+    return BulkImportResult(inserted=inserted, skipped=skipped, errors=errors)
+
+
+@router.post('/batch', response_model=BatchResponse, status_code=status.HTTP_200_OK)
+async def batch_contacts(body: BatchRequest,
+                         db: AsyncSession = Depends(get_db),
+                         current_user: User = Depends(get_current_user)):
+    """
+    Get, update and delete many contacts in one request and one transaction.
+
+    Operations are grouped by kind and run as set-based statements, whatever their
+    number: one DELETE, one SELECT plus one executemany UPDATE per set of changed
+    columns, and one SELECT reading back the fetched and updated contacts. Each contact ID may appear once per batch.
+    Results are returned in the order of the operations, with a 404 status for contacts
+    that do not exist or belong to another user. A unique email or phone conflict rolls
+    back the whole batch.
+
+    Args:
+        body (BatchRequest): The operations.
+        db (AsyncSession): The database session.
+        current_user (User): The currently authenticated user.
+
+    Returns:
+        BatchResponse: The result of every operation.
+
+    Raises:
+        HTTPException: If the batch is too large, repeats a contact ID, or an update conflicts.
+    """
+    user_id = current_user.id
+    operations = body.operations
+    if len(operations) > settings.contacts_batch_max:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"At most {settings.contacts_batch_max} operations per batch")
+    if len({operation.id for operation in operations}) < len(operations):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Each contact ID may appear once per batch")
+    updates = {operation.id: operation.body or ContactUpdate() for operation in operations if operation.op == "update"}
+    try:
+        deleted = await repository_contacts.remove_contacts(
+            [operation.id for operation in operations if operation.op == "delete"], user_id, db)
+        await repository_contacts.update_contacts(updates, user_id, db)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail="Contact with this email or phone already exists")
+    read = await repository_contacts.get_contacts_by_ids(
+        [operation.id for operation in operations if operation.op != "delete"], user_id, db)
+    await db.commit()
+    if deleted or updates:
+        # again after the commit, a typeahead build may have read the rows before it
+        typeahead.invalidate(user_id)
+        await contact_cache.bump(user_id)
+
+    contacts = {contact.id: contact for contact in [*deleted, *read]}
+    results = []
+    for operation in operations:
+        contact = contacts.get(operation.id)
+        if contact is None:
+            results.append(BatchItemResult(op=operation.op, id=operation.id, status=status.HTTP_404_NOT_FOUND,
+                                           error="Contact not found"))
+        else:
+            results.append(BatchItemResult(op=operation.op, id=operation.id, status=status.HTTP_200_OK,
+                                           contact=ResponseContact.model_validate(contact)))
+    return BatchResponse(results=results)
+
+
+@router.get('/{contact_id}', response_model=ResponseContact, status_code=status.HTTP_200_OK,
+            responses={304: {"description": "The contact has not changed since the ETag was issued"}})
+async def get_contact(contact_id: int, request: Request, db: AsyncSession = Depends(get_db),
+                      current_user: User = Depends(get_current_user)):
     """
     Retrieve a specific contact by ID.
 
+    The serialized contact is cached per owner and contacts version, and the response has
+    an ``ETag``. A request with a matching ``If-None-Match`` gets a 304 without loading
+    the contact.
+
     Args:
         contact_id (int): The ID of the contact.
-        db (Session): The database session.
+        request (Request): The incoming request, read for ``If-None-Match``.
+        db (AsyncSession): The database session.
         current_user (User): The currently authenticated user.
 
     Returns:
@@ -72,72 +414,145 @@ async def get_contact(contact_id: int, db: Session = Depends(get_db), current_us
         HTTPException: If the contact is not found.
     """
     user_id = current_user.id
-    contact = await repository_contacts.get_contact(contact_id, user_id, db)
-    if not contact:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='No contacts')
-    return contact
-
-
-@router.get('/', response_model=List[ResponseContact], status_code=status.HTTP_200_OK)
-async def get_contacts(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    key = f"contact:{contact_id}"
+    version = await contact_cache.version(user_id)
+    etag = contact_cache.etag(user_id, version, key)
+    if contact_cache.not_modified(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    body = await contact_cache.lookup(user_id, version, key)
+    if body is None:
+        contact = await repository_contacts.get_contact(contact_id, user_id, db)
+        if not contact:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='No contacts')
+        body = ResponseContact.model_validate(contact).model_dump_json()
+        await contact_cache.store(user_id, version, key, body)
+    return RowsResponse(body, headers={"ETag": etag})
+
+
+@router.get('/', response_model=List[ResponseContactFields], response_model_exclude_unset=True,
+            status_code=status.HTTP_200_OK,
+            responses={304: {"description": "The page has not changed since the ETag was issued"}})
+async def get_contacts(request: Request,
+                       limit: int = Query(settings.contacts_page_size, ge=1, le=settings.contacts_page_max),
+                       cursor: str | None = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+                       fields: str | None = Query(None, description="Comma separated contact fields to return"),
+                       db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
     """
-    Retrieve all contacts for the current user.
+    Retrieve a page of contacts for the current user.
+
+    The cursor for the next page is returned in the ``X-Next-Cursor`` header, the header is
+    absent on the last page. Pages are cached and carry an ``ETag`` like single contacts.
 
     Args:
-        db (Session): The database session.
+        request (Request): The incoming request, read for ``If-None-Match``.
+        limit (int): The maximum number of contacts on the page.
+        cursor (str | None): The cursor of the page to return, None for the first page.
+        fields (str | None): Comma separated fields to return, None for whole contacts.
+        db (AsyncSession): The database session.
         current_user (User): The currently authenticated user.
 
     Returns:
-        List[ResponseContact]: A list of the user's contacts.
+        List[ResponseContactFields]: A page of the user's contacts.
 
     Raises:
-        HTTPException: If no contacts are found.
+        HTTPException: If the user has no contacts, or the cursor or fields are invalid.
     """
     user_id = current_user.id
-    contacts = await repository_contacts.get_contacts(user_id, db)
-    if not contacts:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='No contacts')
-    return contacts
+    after_id = parse_cursor(cursor).get("id")
+    # bool is an int subclass, but a JSON true or false is no contact ID
+    if after_id is not None and (isinstance(after_id, bool) or not isinstance(after_id, int)):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    field_names = parse_fields(fields)
+    key = f"page:{limit}:{after_id}:{','.join(field_names or ())}"
+    version = await contact_cache.version(user_id)
+    etag = contact_cache.etag(user_id, version, key)
+    if contact_cache.not_modified(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    page = await contact_cache.lookup(user_id, version, key)
+    if page is None:
+        rows = await repository_contacts.get_contacts(user_id, db, limit=limit, after_id=after_id,
+                                                      fields=field_names or list(repository_contacts.CONTACT_FIELDS))
+        if not rows and cursor is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='No contacts')
+        page = {"body": encode_rows(rows)}
+        if len(rows) == limit:
+            page["next"] = repository_contacts.encode_cursor({"id": rows[-1]["id"]})
+        await contact_cache.store(user_id, version, key, page)
+    headers = {"ETag": etag}
+    if "next" in page:
+        headers["X-Next-Cursor"] = page["next"]
+    return RowsResponse(page["body"], headers=headers)
+
+
+async def _update_contact(contact_id: int, user_id: int, body: CreteContact | ContactUpdate, db: AsyncSession):
+    try:
+        contact = await repository_contacts.update_contact(contact_id, user_id, body, db)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail="Contact with this email or phone already exists")
+    if contact is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
+    return contact
 
 
 @router.put("/{contact_id}", response_model=ResponseContact)
 async def update_contact(body: CreteContact,
                          contact_id: int,
                          current_user: User = Depends(get_current_user),
-                         db: Session = Depends(get_db)
+                         db: AsyncSession = Depends(get_db)
                          ):
     """
-    Update a contact's details.
+    Replace a contact's details.
 
     Args:
         body (CreteContact): The updated contact data.
         contact_id (int): The ID of the contact to update.
         current_user (User): The currently authenticated user.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         ResponseContact: The updated contact.
 
     Raises:
-        HTTPException: If the contact is not found.
+        HTTPException: If the contact is not found, or the email or phone belongs to another contact.
     """
-    user_id = current_user.id
-    contact = await repository_contacts.update_contact(contact_id, user_id, body, db)
-    if contact is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
-    return contact
+    return await _update_contact(contact_id, current_user.id, body, db)
+
+
+@router.patch("/{contact_id}", response_model=ResponseContact)
+async def patch_contact(body: ContactUpdate,
+                        contact_id: int,
+                        current_user: User = Depends(get_current_user),
+                        db: AsyncSession = Depends(get_db)):
+    """
+    Update only the given fields of a contact.
+
+    Args:
+        body (ContactUpdate): The fields to change, fields left out or null are kept.
+        contact_id (int): The ID of the contact to update.
+        current_user (User): The currently authenticated user.
+        db (AsyncSession): The database session.
+
+    Returns:
+        ResponseContact: The updated contact.
+
+    Raises:
+        HTTPException: If the contact is not found, or the email or phone belongs to another contact.
+    """
+    return await _update_contact(contact_id, current_user.id, body, db)
 
 
 @router.delete("/{contact_id}", response_model=ResponseContact)
 async def remove_contact(contact_id: int,
-                         db: Session = Depends(get_db),
+                         db: AsyncSession = Depends(get_db),
                          current_user: User = Depends(get_current_user)):
     """
     Remove a contact by ID.
 
     Args:
         contact_id (int): The ID of the contact to remove.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_user (User): The currently authenticated user.
 
     Returns:
@@ -156,14 +571,14 @@ async def remove_contact(contact_id: int,
 @router.post('/', response_model=ResponseContact, status_code=status.HTTP_201_CREATED,
              dependencies=[Depends(RateLimiter(times=10, seconds=60))])
 async def create_contact(body: CreteContact,
-                         db: Session = Depends(get_db),
+                         db: AsyncSession = Depends(get_db),
                          current_user: User = Depends(get_current_user)):
     """
     Create a new contact.
 
     Args:
         body (CreteContact): The contact data to create.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_user (User): The currently authenticated user.
 
     Returns:
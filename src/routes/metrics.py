@@ -0,0 +1,16 @@
+from fastapi import APIRouter, status
+
+from src.database.db import pool_status
+
+router = APIRouter(prefix='/metrics', tags=["metrics"])
+
+
+@router.get('/pool', status_code=status.HTTP_200_OK)
+async def get_pool_status():
+    """
+    Report the database connection pool state.
+
+    Returns:
+        dict: Checked out and overflow connections and checkout wait statistics.
+    """
+    return pool_status()
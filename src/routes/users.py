@@ -1,20 +1,19 @@
-import cloudinary
-import cloudinary.uploader
 from fastapi import APIRouter, status, Depends, HTTPException, Security, BackgroundTasks, Request, UploadFile, File
 from fastapi.security import OAuth2PasswordRequestForm, HTTPAuthorizationCredentials, HTTPBearer
 
 from src.database.models import User
-from src.repository.pass_utils import verify_password
+from src.repository.pass_utils import async_verify_password
 
-from src.repository.utils import create_access_token, create_refresh_token, decode_verification_token, \
-    get_email_from_token, get_current_user
-from src.schema_user import UserResponse, UserCreate, Token, RequestEmail, UserBase
+from src.repository.utils import decode_refresh_token, get_email_from_token, get_current_user, issue_tokens, \
+    revoke_tokens
+from src.schema_user import UserResponse, UserCreate, Token, RequestEmail, UserBase, AvatarStatus
 
-from sqlalchemy.orm import Session
-from src.database.db import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database.db import get_db, get_session_maker
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from src.repository import users as repository_users
 from src.services.email import send_email
-from src.conf.config import settings
+from src.services import avatars, token_store
 
 router = APIRouter(prefix='/users', tags=["users"])
 security = HTTPBearer()
@@ -23,14 +22,14 @@ security = HTTPBearer()
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
         user_create: UserCreate,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     """
     Register a new user.
 
     Args:
         user_create (UserCreate): The user creation data.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         UserResponse: The created user data.
@@ -51,14 +50,14 @@ async def register(
 
 @router.post("/login", response_model=Token)
 async def login_for_access_token(
-        form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+        form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)
 ):
     """
     Authenticate a user and provide access and refresh tokens.
 
     Args:
         form_data (OAuth2PasswordRequestForm): The form containing username and password.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         Token: The generated access and refresh tokens.
@@ -68,54 +67,67 @@ async def login_for_access_token(
     """
     user = await repository_users.get_user_by_username(form_data.username, db)
     print(user)
-    if not user or not verify_password(form_data.password, user.hashes_password):
+    if not user or not await async_verify_password(form_data.password, user.hashes_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token(data={"sub": user.user_name})
-    refresh_token = create_refresh_token(data={"sub": user.user_name})
-    return Token(
-        access_token=access_token, refresh_token=refresh_token, token_type="bearer"
-    )
+    return await issue_tokens(user.user_name)
 
 
 @router.get('/refresh_token', response_model=Token)
-async def refresh_token(credentials: HTTPAuthorizationCredentials = Security(security), db: Session = Depends(get_db)):
+async def refresh_token(credentials: HTTPAuthorizationCredentials = Security(security)):
     """
-    Refresh the access token using a refresh token.
+    Exchange a refresh token for a new token pair.
+
+    Every refresh token can be used once. Presenting a used refresh token means it was
+    stolen or replayed, so every token of the user is revoked. A token the store does not
+    know, e.g. an expired one, is only rejected.
 
     Args:
-        credentials (HTTPAuthorizationCredentials): The provided token.
-        db (Session): The database session.
+        credentials (HTTPAuthorizationCredentials): The provided refresh token.
 
     Returns:
         Token: The new access and refresh tokens.
 
     Raises:
-        HTTPException: If the token is invalid.
+        HTTPException: If the token is invalid, revoked or already used.
     """
-    token = credentials.credentials
-    email = await decode_verification_token(token)
-    user = await repository_users.get_user_by_email(email, db)
-    # if user.refresh_token != token:
-    #     # await repository_users.update_token(user, None, db)
-    #     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    payload = decode_refresh_token(credentials.credentials)
+    if payload is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    outcome = await token_store.store.consume(payload["sub"], payload["jti"])
+    if outcome != token_store.LIVE:
+        if outcome == token_store.USED:
+            await revoke_tokens(payload["sub"])
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    return await issue_tokens(payload["sub"])
+
+
+@router.post('/logout_all')
+async def logout_all(current_user: User = Depends(get_current_user)):
+    """
+    Revoke every access and refresh token of the current user.
+
+    Args:
+        current_user (User): The currently authenticated user.
 
-    access_token = create_access_token(data={"sub": email})
-    refresh_token_ = create_refresh_token(data={"sub": email})
-    return Token(access_token=access_token, refresh_token=refresh_token_, token_type='bearer')
+    Returns:
+        dict: A message confirming the logout.
+    """
+    await revoke_tokens(current_user.user_name)
+    return {"message": "Logged out from all sessions"}
 
 
 @router.get('/confirmed_email/{token}')
-async def confirmed_email(token: str, db: Session = Depends(get_db)):
+async def confirmed_email(token: str, db: AsyncSession = Depends(get_db)):
     """
     Confirm a user's email address using a token.
 
     Args:
         token (str): The verification token.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         dict: A message indicating the confirmation status.
@@ -134,26 +146,24 @@ async def confirmed_email(token: str, db: Session = Depends(get_db)):
 
 
 @router.post('/request_email')
-async def request_email(body: RequestEmail, background_tasks: BackgroundTasks, request: Request,
-                        db: Session = Depends(get_db)):
+async def request_email(body: RequestEmail, request: Request, db: AsyncSession = Depends(get_db)):
     """
     Request an email verification link.
 
     Args:
         body (RequestEmail): The email request data.
-        background_tasks (BackgroundTasks): The background task handler.
         request (Request): The incoming request object.
-        db (Session): The database session.
+        db (AsyncSession): The database session, the email is queued in the outbox with it.
 
     Returns:
         dict | None: A message indicating the email request status.
     """
     user = await repository_users.get_user_by_email(body.email, db)
 
-    if user.confirmed:
+    if user and user.confirmed:
         return {"message": "Your email is already confirmed"}
     if user:
-        background_tasks.add_task(send_email, user.email, user.username, request.base_url)
+        await send_email(user.email, user.user_name, str(request.base_url), db)
     return {"message": "Check your email for confirmation."}
 
 
@@ -171,29 +181,30 @@ async def read_users_me(current_user: User = Depends(get_current_user)):
     return current_user
 
 
-@router.patch('/avatar', response_model=UserBase)
-async def update_avatar_user(file: UploadFile = File(), current_user: User = Depends(get_current_user),
-                             db: Session = Depends(get_db)):
+@router.patch('/avatar', response_model=AvatarStatus, status_code=status.HTTP_202_ACCEPTED)
+async def update_avatar_user(background_tasks: BackgroundTasks, file: UploadFile = File(),
+                             current_user: User = Depends(get_current_user),
+                             session_maker: async_sessionmaker = Depends(get_session_maker)):
     """
     Update the avatar of the currently authenticated user.
 
+    The upload is spooled to a temporary file and the request returns right away. Resizing
+    to 250x250, the thumbnail, the upload to storage and the user update run afterwards in
+    the background.
+
     Args:
+        background_tasks (BackgroundTasks): The background task handler.
         file (UploadFile): The new avatar file.
         current_user (User): The currently authenticated user.
-        db (Session): The database session.
+        session_maker (async_sessionmaker): The factory for the session updating the user.
 
     Returns:
-        UserBase: The updated user data.
-    """
-    cloudinary.config(
-        cloud_name=settings.cloudinary_name,
-        api_key=settings.cloudinary_api_key,
-        api_secret=settings.cloudinary_api_secret,
-        secure=True
-    )
-
-    r = cloudinary.uploader.upload(file.file, public_id=f'ContactApp/{current_user.user_name}', overwrite=True)
-    src_url = cloudinary.CloudinaryImage(f'ContactApp/{current_user.user_name}') \
-        .build_url(width=250, height=250, crop='fill', version=r.get('version'))
-    user = await repository_users.update_avatar(current_user.email, src_url, db)
-    return user
+        AvatarStatus: ``pending`` while the avatar is processed.
+
+    Raises:
+        HTTPException: If the file is larger than the configured limit.
+    """
+    spooled = await avatars.spool_upload(file)
+    background_tasks.add_task(avatars.process_avatar, spooled, current_user.id, current_user.email,
+                              session_maker)
+    return AvatarStatus(status="pending")
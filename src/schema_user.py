@@ -29,6 +29,7 @@ class UserResponse(UserBase):
 
 class TokenData(BaseModel):
     username: str | None = None
+    issued_at: float | None = None
 
 
 class Token(BaseModel):
@@ -37,5 +38,9 @@ class Token(BaseModel):
     token_type: str
 
 
+class AvatarStatus(BaseModel):
+    status: str
+
+
 class RequestEmail(BaseModel):
     email: EmailStr
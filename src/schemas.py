@@ -1,4 +1,6 @@
 from datetime import date, datetime
+from typing import List, Literal
+
 from pydantic import BaseModel, Field, EmailStr
 
 
@@ -11,6 +13,17 @@ class CreteContact(BaseModel):
     born_date: date
 
 
+class ContactUpdate(BaseModel):
+    """
+    A partial contact update, only the fields sent are changed.
+    """
+    name: str | None = Field(None, max_length=50)
+    second_name: str | None = Field(None, max_length=50)
+    email: EmailStr | None = Field(None, max_length=150)
+    phone: str | None = Field(None, max_length=50)
+    born_date: date | None = None
+
+
 class ResponseContact(BaseModel):
     id: int
     name: str
@@ -25,3 +38,54 @@ class ResponseContact(BaseModel):
         from_attributes = True
 
 
+class ResponseContactFields(BaseModel):
+    """
+    A contact with only the requested fields, used for projected listings.
+    """
+    id: int | None = None
+    name: str | None = None
+    second_name: str | None = None
+    email: EmailStr | None = None
+    phone: str | None = None
+    born_date: date | None = None
+    crete_at: datetime | None = None
+    update_at: datetime | None = None
+
+    class Config:
+        from_attributes = True
+
+
+class BulkRowError(BaseModel):
+    row: int
+    error: str
+
+
+class BulkImportResult(BaseModel):
+    inserted: int
+    skipped: int
+    errors: List[BulkRowError]
+
+
+class BatchOperation(BaseModel):
+    """
+    One operation of a batch: read, update or delete the contact ``id``.
+    """
+    op: Literal["get", "update", "delete"]
+    id: int
+    body: ContactUpdate | None = None
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+
+
+class BatchItemResult(BaseModel):
+    op: str
+    id: int
+    status: int
+    contact: ResponseContact | None = None
+    error: str | None = None
+
+
+class BatchResponse(BaseModel):
+    results: List[BatchItemResult]
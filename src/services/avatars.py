@@ -0,0 +1,204 @@
+import asyncio
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from tempfile import SpooledTemporaryFile
+
+import cloudinary
+import cloudinary.exceptions
+import cloudinary.uploader
+from fastapi import HTTPException, UploadFile, status
+from PIL import Image, ImageOps, UnidentifiedImageError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.conf.config import settings
+from src.repository import users as repository_users
+
+logger = logging.getLogger(__name__)
+
+AVATAR_SIZE = (250, 250)
+THUMBNAIL_SIZE = (64, 64)
+CHUNK_SIZE = 64 * 1024
+
+# Pillow releases the GIL while decoding and resampling, so threads keep the event loop free
+avatar_executor = ThreadPoolExecutor(max_workers=settings.avatar_workers, thread_name_prefix="avatar")
+
+
+class CloudinaryStorage:
+    """
+    Stores avatars in Cloudinary under ``ContactApp/<user id>``.
+    """
+    def __init__(self):
+        cloudinary.config(
+            cloud_name=settings.cloudinary_name,
+            api_key=settings.cloudinary_api_key,
+            api_secret=settings.cloudinary_api_secret,
+            secure=True
+        )
+
+    def save(self, name: str, avatar: bytes, thumbnail: bytes) -> str:
+        """
+        Upload an avatar and its thumbnail.
+
+        Args:
+            name (str): The storage name, the ID of the user the avatar belongs to.
+            avatar (bytes): The 250x250 PNG avatar.
+            thumbnail (bytes): The PNG thumbnail.
+
+        Returns:
+            str: The public URL of the avatar.
+        """
+        r = cloudinary.uploader.upload(io.BytesIO(avatar), public_id=f'ContactApp/{name}', overwrite=True)
+        cloudinary.uploader.upload(io.BytesIO(thumbnail), public_id=f'ContactApp/{name}_thumb', overwrite=True)
+        return cloudinary.CloudinaryImage(f'ContactApp/{name}') \
+            .build_url(width=250, height=250, crop='fill', version=r.get('version'))
+
+
+class LocalStorage:
+    """
+    Stores avatars as files in a local directory served under ``base_url``.
+    """
+    def __init__(self, directory: str, base_url: str):
+        self.directory = Path(directory)
+        self.base_url = base_url.rstrip('/')
+
+    def _path(self, file_name: str) -> Path:
+        path = (self.directory / file_name).resolve()
+        if not path.is_relative_to(self.directory.resolve()):
+            raise ValueError(f"Avatar path {file_name!r} is outside the storage directory")
+        return path
+
+    def save(self, name: str, avatar: bytes, thumbnail: bytes) -> str:
+        """
+        Write an avatar and its thumbnail to the storage directory.
+
+        Args:
+            name (str): The storage name, the ID of the user the avatar belongs to.
+            avatar (bytes): The 250x250 PNG avatar.
+            thumbnail (bytes): The PNG thumbnail.
+
+        Returns:
+            str: The URL of the avatar.
+
+        Raises:
+            ValueError: If the name would place a file outside the storage directory.
+        """
+        avatar_path, thumbnail_path = self._path(f'{name}.png'), self._path(f'{name}_thumb.png')
+        self.directory.mkdir(parents=True, exist_ok=True)
+        avatar_path.write_bytes(avatar)
+        thumbnail_path.write_bytes(thumbnail)
+        return f'{self.base_url}/{name}.png'
+
+
+_storage: CloudinaryStorage | LocalStorage | None = None
+
+
+def init_storage() -> CloudinaryStorage | LocalStorage:
+    """
+    Create the configured avatar storage backend, configuring Cloudinary only once.
+
+    Returns:
+        CloudinaryStorage | LocalStorage: The storage backend.
+    """
+    global _storage
+    if settings.avatar_storage == 'local':
+        _storage = LocalStorage(settings.avatar_local_dir, settings.avatar_local_url)
+    else:
+        _storage = CloudinaryStorage()
+    return _storage
+
+
+def get_storage() -> CloudinaryStorage | LocalStorage:
+    """
+    Return the avatar storage backend, creating it on first use.
+
+    Returns:
+        CloudinaryStorage | LocalStorage: The storage backend.
+    """
+    return _storage or init_storage()
+
+
+async def spool_upload(file: UploadFile) -> SpooledTemporaryFile:
+    """
+    Copy an upload into a spooled temporary file, enforcing the size limit.
+
+    Args:
+        file (UploadFile): The uploaded avatar.
+
+    Returns:
+        SpooledTemporaryFile: The upload, rewound to the start.
+
+    Raises:
+        HTTPException: 413 if the upload exceeds ``avatar_max_bytes``.
+    """
+    spooled = SpooledTemporaryFile(max_size=1024 * 1024)
+    size = 0
+    while chunk := await file.read(CHUNK_SIZE):
+        size += len(chunk)
+        if size > settings.avatar_max_bytes:
+            spooled.close()
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                detail=f"Avatar is larger than {settings.avatar_max_bytes} bytes")
+        spooled.write(chunk)
+    spooled.seek(0)
+    return spooled
+
+
+def resize_avatar(source) -> tuple[bytes, bytes]:
+    """
+    Crop an image to the 250x250 avatar and make a thumbnail, both as PNG.
+
+    Args:
+        source: A binary file object with the original image.
+
+    Returns:
+        tuple[bytes, bytes]: The avatar and the thumbnail.
+
+    Raises:
+        UnidentifiedImageError: If the file is not an image.
+        Image.DecompressionBombError: If the image is far above Pillow's own pixel limit.
+        ValueError: If the image has more than ``avatar_max_pixels`` pixels.
+    """
+    with Image.open(source) as image:
+        # the size comes from the header, so an oversized image is refused before it is decoded
+        if image.width * image.height > settings.avatar_max_pixels:
+            raise ValueError(f"Image of {image.width}x{image.height} pixels is larger than "
+                             f"{settings.avatar_max_pixels} pixels")
+        avatar = ImageOps.fit(ImageOps.exif_transpose(image).convert('RGBA'), AVATAR_SIZE)
+    thumbnail = avatar.resize(THUMBNAIL_SIZE)
+    encoded = []
+    for picture in (avatar, thumbnail):
+        buffer = io.BytesIO()
+        picture.save(buffer, format='PNG', optimize=True)
+        encoded.append(buffer.getvalue())
+    return encoded[0], encoded[1]
+
+
+async def process_avatar(spooled: SpooledTemporaryFile, user_id: int, email: str,
+                         session_maker: async_sessionmaker) -> None:
+    """
+    Resize, store and assign a spooled avatar, run as a background task.
+
+    The avatar is stored under the user's ID: user names are neither unique nor safe
+    to use in a file path.
+
+    Args:
+        spooled (SpooledTemporaryFile): The uploaded image.
+        user_id (int): The ID of the owner, used as the storage name.
+        email (str): The email of the owner, used to update the user row.
+        session_maker (async_sessionmaker): The factory for the session updating the user.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        avatar, thumbnail = await loop.run_in_executor(avatar_executor, resize_avatar, spooled)
+        url = await loop.run_in_executor(avatar_executor, get_storage().save, str(user_id), avatar, thumbnail)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError,
+            cloudinary.exceptions.Error) as err:
+        logger.warning("Avatar processing failed for user %s: %s", user_id, err)
+        return
+    finally:
+        spooled.close()
+    async with session_maker() as db:
+        if await repository_users.update_avatar(email, url, db) is None:
+            logger.warning("User %s was deleted before the avatar was stored", user_id)
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import uuid
+from typing import Callable
+
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.services.redis_pool import get_redis
+from src.services.user_cache import TTLCache
+
+VERSION_PREFIX = "contacts_version:"
+ENTRY_PREFIX = "contacts:"
+
+# Serialized response bodies by "<owner>:<version>:<key>", so a write never has to find
+# and delete entries: bumping the owner's version makes all of them unreachable.
+local_cache = TTLCache(settings.contact_cache_size, settings.contact_cache_ttl)
+# Without Redis every worker has its own versions. A version is a random token that
+# expires with the cached entries, which bounds how long another worker serves stale data.
+local_versions = TTLCache(settings.contact_cache_size, settings.contact_cache_ttl)
+_bump_hooks: list[Callable[[int, str | None, str], None]] = []
+
+
+def _new_version() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+async def shared_version(owner_id: int) -> str | None:
+    """
+    Return the version of an owner's contacts that every worker sees.
+
+    Args:
+        owner_id (int): The ID of the contact owner.
+
+    Returns:
+        str | None: The Redis counter, or None when Redis is disabled or unreachable.
+    """
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        return await client.get(VERSION_PREFIX + str(owner_id)) or "0"
+    except RedisError:
+        return None
+
+
+async def version(owner_id: int) -> str:
+    """
+    Return the current version of an owner's contacts.
+
+    Args:
+        owner_id (int): The ID of the contact owner.
+
+    Returns:
+        str: The version, the shared Redis counter when Redis is enabled.
+    """
+    shared = await shared_version(owner_id)
+    if shared is not None:
+        return shared
+    value = local_versions.get(owner_id)
+    if value is None:
+        value = _new_version()
+        local_versions.set(owner_id, value)
+    return value
+
+
+def add_bump_hook(hook: Callable[[int, str | None, str], None]) -> None:
+    """
+    Register a callback that is called after every version bump.
+
+    Args:
+        hook (Callable[[int, str | None, str], None]): Receives the owner ID, the version this
+            bump replaced (None if it is unknown) and the new version.
+    """
+    _bump_hooks.append(hook)
+
+
+async def bump(owner_id: int) -> None:
+    """
+    Start a new version of an owner's contacts after a write, invalidating every cached read.
+
+    Args:
+        owner_id (int): The ID of the contact owner.
+    """
+    previous, current = local_versions.get(owner_id), _new_version()
+    local_versions.set(owner_id, current)
+    client = get_redis()
+    if client is not None:
+        try:
+            counter = await client.incr(VERSION_PREFIX + str(owner_id))
+            previous, current = str(counter - 1), str(counter)
+        except RedisError:
+            pass
+    for hook in _bump_hooks:
+        hook(owner_id, previous, current)
+
+
+def etag(owner_id: int, current_version: str, key: str) -> str:
+    """
+    Build the ETag of a read.
+
+    The ETag is weak because the same representation is sent gzip-encoded or not.
+
+    Args:
+        owner_id (int): The ID of the contact owner.
+        current_version (str): The owner's contacts version.
+        key (str): The read, e.g. ``contact:5``.
+
+    Returns:
+        str: The quoted weak ETag.
+    """
+    digest = hashlib.blake2b(f"{owner_id}:{current_version}:{key}".encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+
+async def lookup(owner_id: int, current_version: str, key: str):
+    """
+    Return a cached response body from the process cache, then from Redis.
+
+    Args:
+        owner_id (int): The ID of the contact owner.
+        current_version (str): The owner's contacts version.
+        key (str): The read, e.g. ``contact:5``.
+
+    Returns:
+        The JSON-ready body, or None on a cache miss.
+    """
+    cache_key = f"{owner_id}:{current_version}:{key}"
+    value = local_cache.get(cache_key)
+    if value is not None:
+        return value
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        cached = await client.get(ENTRY_PREFIX + cache_key)
+    except RedisError:
+        return None
+    if cached is None:
+        return None
+    value = json.loads(cached)
+    local_cache.set(cache_key, value)
+    return value
+
+
+async def store(owner_id: int, current_version: str, key: str, value) -> None:
+    """
+    Cache a response body in the process cache and in Redis.
+
+    Args:
+        owner_id (int): The ID of the contact owner.
+        current_version (str): The version the body was read at.
+        key (str): The read, e.g. ``contact:5``.
+        value: The JSON-ready body.
+    """
+    cache_key = f"{owner_id}:{current_version}:{key}"
+    local_cache.set(cache_key, value)
+    client = get_redis()
+    if client is not None:
+        try:
+            await client.set(ENTRY_PREFIX + cache_key, json.dumps(value), ex=settings.contact_cache_ttl)
+        except RedisError:
+            pass
+
+
+def not_modified(if_none_match: str | None, current_etag: str) -> bool:
+    """
+    Check an ``If-None-Match`` request header against the current ETag.
+
+    Args:
+        if_none_match (str | None): The header value.
+        current_etag (str): The ETag of the current representation.
+
+    Returns:
+        bool: True if the client already has the current representation.
+    """
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or current_etag.removeprefix("W/") in tags
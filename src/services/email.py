@@ -1,53 +1,242 @@
-import os
-from pathlib import Path
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from email.message import EmailMessage
+from typing import List
 
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
+from aiosmtplib import SMTP, SMTPException
+from jinja2 import TemplateNotFound
 from pydantic import EmailStr
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from src.repository import utils
 from src.conf.config import settings
+from src.database.models import EmailOutbox, utcnow
+from src.services.templating import email_templates
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.mail_username,
-    MAIL_PASSWORD=settings.mail_password,
-    MAIL_FROM=str(settings.mail_from),
-    MAIL_PORT=settings.mail_port,
-    MAIL_SERVER=settings.mail_server,
-    MAIL_FROM_NAME="Desired Name",
-    MAIL_STARTTLS=False,
-    MAIL_SSL_TLS=True,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-    TEMPLATE_FOLDER=Path(__file__).parent / 'templates',
-)
-
-
-async def send_email(email: EmailStr, username: str, host: str):
+logger = logging.getLogger(__name__)
+
+PENDING, SENDING, SENT, FAILED = "pending", "sending", "sent", "failed"
+
+
+async def send_email(email: EmailStr, username: str, host: str, db: AsyncSession):
     """
-    Send a confirmation email to the user.
+    Queue a confirmation email to the user in the email outbox.
+
+    The message is delivered by the outbox worker, so it survives worker restarts and is
+    retried when the SMTP server fails.
 
     Args:
         email (EmailStr): The recipient's email address.
         username (str): The recipient's username.
         host (str): The host URL for constructing the confirmation link.
+        db (AsyncSession): The session the message is queued in, committed here.
 
     Returns:
         None
+    """
+    token_verification = utils.create_email_token({"sub": email})
+    db.add(EmailOutbox(recipient=email, subject="Confirm your email ", template="email.template.html",
+                       context={"host": host, "username": username, "token": token_verification},
+                       next_attempt_at=utcnow()))
+    await db.commit()
+    outbox_worker.wake()
+
+
+def render_message(entry: EmailOutbox) -> EmailMessage:
+    """
+    Build the MIME message of an outbox entry, multipart when the template has a text part.
+
+    Args:
+        entry (EmailOutbox): The queued email.
+
+    Returns:
+        EmailMessage: The message ready to be sent.
+    """
+    message = EmailMessage()
+    message["From"] = f"{settings.mail_from_name} <{settings.mail_from}>"
+    message["To"] = entry.recipient
+    message["Subject"] = entry.subject
+    html, text = email_templates.render(entry.template, entry.context)
+    if text is None:
+        message.set_content(html, subtype="html")
+    else:
+        message.set_content(text)
+        message.add_alternative(html, subtype="html")
+    return message
+
+
+class OutboxWorker:
+    """
+    Delivers queued emails over a few long-lived SMTP connections.
 
-    Raises:
-        ConnectionErrors: If there is an issue with the email connection.
+    Due messages are claimed in batches, spread over ``concurrency`` connections and paced
+    to ``rate`` messages per second. A claim is a lease: a message left in ``sending`` by a
+    crashed worker becomes due again when the lease runs out. Failed deliveries are retried
+    with exponential backoff until ``max_attempts`` is reached. Due times are naive UTC,
+    whatever the time zone of the host or the database server.
     """
-    try:
-        token_verification = utils.create_email_token({"sub": email})
-        message = MessageSchema(
-            subject="Confirm your email ",
-            recipients=[email],
-            template_body={"host": host, "username": username, "token": token_verification},
-            subtype=MessageType.html
-        )
-
-        fm = FastMail(conf)
-        await fm.send_message(message, template_name="email_template.html")
-    except ConnectionErrors as err:
-        print(err)
+    def __init__(self, session_maker: async_sessionmaker | None = None, smtp_options: dict | None = None,
+                 concurrency: int = settings.email_concurrency, rate: float = settings.email_rate_per_second):
+        """
+        Initialize the worker.
+
+        Args:
+            session_maker (async_sessionmaker | None): The session factory, the application one by default.
+            smtp_options (dict | None): Keyword arguments for ``aiosmtplib.SMTP``, built from the settings by default.
+            concurrency (int): The number of SMTP connections used in parallel.
+            rate (float): The maximum number of messages sent per second.
+        """
+        self.session_maker = session_maker
+        self.smtp_options = smtp_options or {
+            "hostname": settings.mail_server,
+            "port": settings.mail_port,
+            "use_tls": settings.mail_ssl_tls,
+            "start_tls": settings.mail_starttls,
+            "username": settings.mail_username,
+            "password": settings.mail_password,
+        }
+        self.concurrency = concurrency
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next_send = 0.0
+        self._connections: List[SMTP | None] = [None] * concurrency
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def _sessions(self) -> async_sessionmaker:
+        if self.session_maker is None:
+            from src.database.db import SessionLocal
+            self.session_maker = SessionLocal
+        return self.session_maker
+
+    def wake(self) -> None:
+        """
+        Ask the worker to look for new messages without waiting for the next poll.
+        """
+        self._wakeup.set()
+
+    def start(self) -> None:
+        """
+        Start delivering in a background task.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop the background task and close the SMTP connections.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for index, connection in enumerate(self._connections):
+            if connection is not None and connection.is_connected:
+                try:
+                    await connection.quit()
+                except SMTPException:
+                    pass
+            self._connections[index] = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                delivered = await self.drain()
+            except Exception:
+                logger.exception("Email outbox delivery failed")
+                delivered = 0
+            if delivered:
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.email_poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim(self) -> List[EmailOutbox]:
+        now = utcnow()
+        async with self._sessions()() as db:
+            stmt = select(EmailOutbox).filter(
+                or_(EmailOutbox.status == PENDING, EmailOutbox.status == SENDING),
+                EmailOutbox.next_attempt_at <= now,
+            ).order_by(EmailOutbox.next_attempt_at).limit(settings.email_batch_size) \
+                .with_for_update(skip_locked=True)
+            entries = (await db.execute(stmt)).scalars().all()
+            for entry in entries:
+                entry.status = SENDING
+                entry.next_attempt_at = now + timedelta(seconds=settings.email_lease_seconds)
+            await db.commit()
+            return entries
+
+    async def _pace(self) -> None:
+        now = time.monotonic()
+        wait = self._next_send - now
+        self._next_send = max(now, self._next_send) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def _connection(self, index: int) -> SMTP:
+        connection = self._connections[index]
+        if connection is None or not connection.is_connected:
+            connection = SMTP(**self.smtp_options)
+            await connection.connect()
+            self._connections[index] = connection
+        return connection
+
+    async def _deliver(self, index: int, entries: List[EmailOutbox]) -> List[tuple[int, str | None]]:
+        results = []
+        for entry in entries:
+            await self._pace()
+            try:
+                message = render_message(entry)
+                connection = await self._connection(index)
+                await connection.send_message(message)
+                results.append((entry.id, None))
+            except (SMTPException, OSError) as err:
+                if not isinstance(err, TemplateNotFound):
+                    self._connections[index] = None
+                results.append((entry.id, f"{type(err).__name__}: {err}"))
+            except Exception as err:
+                # any other error still counts as an attempt, so the message ends up failed
+                # instead of being claimed again after every lease
+                logger.exception("Email outbox message %s could not be sent", entry.id)
+                results.append((entry.id, f"{type(err).__name__}: {err}"))
+        return results
+
+    async def drain(self) -> int:
+        """
+        Claim one batch of due messages and deliver it.
+
+        Returns:
+            int: The number of messages processed, sent or not.
+        """
+        entries = await self._claim()
+        if not entries:
+            return 0
+        slices = [entries[index::self.concurrency] for index in range(self.concurrency)]
+        outcomes = await asyncio.gather(*(self._deliver(index, part) for index, part in enumerate(slices) if part))
+        errors = {entry_id: error for outcome in outcomes for entry_id, error in outcome}
+        now = utcnow()
+        async with self._sessions()() as db:
+            stored = (await db.execute(select(EmailOutbox).filter(EmailOutbox.id.in_(errors)))).scalars().all()
+            for entry in stored:
+                error = errors[entry.id]
+                entry.attempts += 1
+                if error is None:
+                    entry.status, entry.sent_at, entry.last_error = SENT, now, None
+                elif entry.attempts >= settings.email_max_attempts:
+                    entry.status, entry.last_error = FAILED, error
+                else:
+                    delay = settings.email_retry_base_seconds * 2 ** (entry.attempts - 1)
+                    entry.status, entry.last_error = PENDING, error
+                    entry.next_attempt_at = now + timedelta(seconds=delay)
+            await db.commit()
+        return len(entries)
+
+
+outbox_worker = OutboxWorker()
@@ -0,0 +1,395 @@
+import logging
+import time
+from bisect import bisect_left
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.conf.config import settings
+from src.database.db import pool_status
+from src.repository import pass_utils
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """
+    A monotonically increasing value per label set.
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values: dict = {}
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        """
+        Increase the value of a label set.
+
+        Args:
+            *label_values: The label values, in the order of ``labels``.
+            amount (float): The increment.
+        """
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def set_total(self, *label_values, value: float) -> None:
+        """
+        Mirror a total that is counted elsewhere, e.g. by the connection pool.
+
+        Args:
+            *label_values: The label values, in the order of ``labels``.
+            value (float): The current total, which only ever grows.
+        """
+        self.values[label_values] = value
+
+    def samples(self):
+        for label_values, value in self.values.items():
+            yield self.name + _format_labels(self.labels, label_values), value
+
+
+class Gauge(Counter):
+    """
+    A value per label set that can go up and down.
+    """
+    kind = "gauge"
+
+    def set(self, *label_values, value: float) -> None:
+        """
+        Set the value of a label set.
+
+        Args:
+            *label_values: The label values, in the order of ``labels``.
+            value (float): The new value.
+        """
+        self.values[label_values] = value
+
+
+class Histogram:
+    """
+    Observations counted into fixed cumulative buckets per label set.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self.values: dict = {}
+
+    def observe(self, *label_values, value: float) -> None:
+        """
+        Count one observation into its bucket.
+
+        Args:
+            *label_values: The label values, in the order of ``labels``.
+            value (float): The observed value.
+        """
+        entry = self.values.get(label_values)
+        if entry is None:
+            entry = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def samples(self):
+        for label_values, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                yield self.name + "_bucket" + _format_labels(self.labels, label_values, f'le="{bound}"'), cumulative
+            yield self.name + "_count" + _format_labels(self.labels, label_values), cumulative
+            yield self.name + "_sum" + _format_labels(self.labels, label_values), total
+
+
+class Registry:
+    """
+    A set of metrics rendered in the Prometheus text exposition format.
+    """
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector) -> None:
+        """
+        Register a callable that refreshes gauges right before the metrics are rendered.
+
+        Args:
+            collector: A callable without arguments.
+        """
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text format.
+
+        Returns:
+            str: The exposition text.
+        """
+        for collector in self.collectors:
+            collector()
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name} {value}" for name, value in metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status")))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route")))
+http_response_size = registry.register(Histogram(
+    "http_response_size_bytes", "HTTP response body size by route template.", ("method", "route"), SIZE_BUCKETS))
+http_in_flight = registry.register(Gauge("http_requests_in_flight", "HTTP requests currently being served."))
+db_queries = registry.register(Histogram(
+    "db_queries_per_request", "SQL statements executed per HTTP request.", ("method", "route"), COUNT_BUCKETS))
+db_time = registry.register(Histogram(
+    "db_query_duration_seconds_per_request", "Time spent in SQL per HTTP request.", ("method", "route")))
+db_duplicate_queries = registry.register(Counter(
+    "db_duplicate_queries_total", "SQL statements repeated with the same parameters within a request, "
+    "counted while duplicates are logged or a query budget is set.",
+    ("method", "route")))
+
+password_hash_latency = registry.register(Histogram(
+    "password_hash_duration_seconds", "bcrypt latency on the hashing pool, queueing included.", ("operation",)))
+password_hash_queue = registry.register(Gauge("password_hash_queue_depth", "bcrypt operations queued or running."))
+db_pool = registry.register(Gauge("db_pool_connections", "Database pool connections by state.", ("state",)))
+db_pool_checkouts = registry.register(Counter("db_pool_checkouts_total", "Database pool checkouts.", ("result",)))
+db_pool_wait = registry.register(Gauge("db_pool_wait_seconds", "Database pool checkout wait time.", ("stat",)))
+
+
+def _observe_hash(operation: str, latency: float, queue_depth: int) -> None:
+    password_hash_latency.observe(operation, value=latency)
+    password_hash_queue.set(value=queue_depth)
+
+
+def _collect_pool_status() -> None:
+    status = pool_status()
+    if "size" not in status:
+        return
+    for state in ("size", "checked_in", "checked_out", "overflow"):
+        db_pool.set(state, value=status[state])
+    db_pool_checkouts.set_total("total", value=status["checkouts"])
+    db_pool_checkouts.set_total("timeout", value=status["timeouts"])
+    db_pool_wait.set("total", value=status["wait_seconds_total"])
+    db_pool_wait.set("max", value=status["wait_seconds_max"])
+
+
+pass_utils.add_metrics_hook(_observe_hash)
+registry.add_collector(_collect_pool_status)
+
+
+class RequestStats:
+    """
+    SQL statements counted and timed for the request, or the budgeted block, being served.
+
+    With ``track_statements`` statements are also counted by their text and parameters,
+    so a statement repeated with the same parameters (a duplicate) or with different ones
+    (an N+1 loop) shows up. Building that key costs a ``repr`` of the parameters per
+    statement, so requests only pay for it while duplicates are logged or a query
+    budget is set.
+    """
+    __slots__ = ("queries", "seconds", "statements", "track_statements")
+
+    def __init__(self, track_statements: bool = True):
+        """
+        Initialize empty stats.
+
+        Args:
+            track_statements (bool): Whether to count statements by text and parameters.
+        """
+        self.queries = 0
+        self.seconds = 0.0
+        self.statements: dict = {}
+        self.track_statements = track_statements
+
+    def record(self, statement: str, parameters, elapsed: float) -> None:
+        """
+        Count one executed statement.
+
+        Args:
+            statement (str): The SQL text.
+            parameters: The bound parameters.
+            elapsed (float): The execution time in seconds.
+        """
+        self.queries += 1
+        self.seconds += elapsed
+        if self.track_statements:
+            key = (statement, repr(parameters))
+            self.statements[key] = self.statements.get(key, 0) + 1
+
+    def duplicates(self) -> dict:
+        """
+        Return the statements executed more than once with the same parameters.
+
+        Returns:
+            dict: The execution count by (statement, parameters).
+        """
+        return {key: count for key, count in self.statements.items() if count > 1}
+
+    def report(self) -> str:
+        """
+        Describe every statement, the most repeated first.
+
+        Returns:
+            str: One ``<count> x <statement> <parameters>`` line per distinct statement.
+        """
+        ordered = sorted(self.statements.items(), key=lambda item: -item[1])
+        return "\n".join(f"{count} x {' '.join(statement.split())} {parameters}"
+                         for (statement, parameters), count in ordered)
+
+
+current_request_stats: ContextVar[RequestStats | None] = ContextVar("current_request_stats", default=None)
+# Budgets of the ``max_queries`` blocks being run. They count every statement of the
+# engine, whatever task or thread runs it, since TestClient serves requests on another thread.
+_active_budgets: list = []
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    More SQL statements were executed in a ``max_queries`` block than its budget allows.
+    """
+
+
+class max_queries(ContextDecorator):
+    """
+    Fail when a block of code, or a decorated test, executes more than ``limit`` SQL statements.
+
+    Only engines passed to ``instrument_engine`` are counted. The error lists every
+    statement with its count, so an N+1 loop or a duplicate fetch is easy to spot::
+
+        with max_queries(2):
+            client.get("/api/contacts/1", headers=headers)
+
+        @max_queries(5)
+        def test_search(client):
+            ...
+
+    Args:
+        limit (int): The number of statements allowed.
+    """
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.stats = RequestStats()
+
+    def __enter__(self):
+        self.stats = RequestStats()
+        _active_budgets.append(self.stats)
+        return self.stats
+
+    def __exit__(self, exc_type, exc, traceback):
+        _active_budgets.remove(self.stats)
+        if exc_type is None and self.stats.queries > self.limit:
+            raise QueryBudgetExceeded(
+                f"{self.stats.queries} SQL statements executed, the budget is {self.limit}:\n{self.stats.report()}")
+        return False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.record(statement, parameters, elapsed)
+    for budget in _active_budgets:
+        budget.record(statement, parameters, elapsed)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Count and time every SQL statement into the current request's stats.
+
+    Args:
+        engine (Engine): The synchronous engine, ``AsyncEngine.sync_engine`` for async engines.
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency, response size and SQL usage per route template.
+
+    The route template (e.g. ``/api/contacts/{contact_id}``) is read from the matched
+    route after the request is served, so label cardinality stays bounded.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        response = {"status": 500, "size": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["size"] += len(message.get("body", b""))
+            await send(message)
+
+        stats = RequestStats(track_statements=settings.sql_log_duplicates or settings.sql_query_budget > 0)
+        token = current_request_stats.set(stats)
+        http_in_flight.values[()] = http_in_flight.values.get((), 0) + 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_in_flight.values[()] -= 1
+            current_request_stats.reset(token)
+            route = scope.get("route")
+            labels = (scope["method"], route.path if route is not None else "unmatched")
+            http_requests.inc(*labels, response["status"])
+            http_latency.observe(*labels, value=elapsed)
+            http_response_size.observe(*labels, value=response["size"])
+            db_queries.observe(*labels, value=stats.queries)
+            db_time.observe(*labels, value=stats.seconds)
+            _check_request_queries(labels, stats)
+
+
+def _check_request_queries(labels: tuple, stats: RequestStats) -> None:
+    """
+    Count and log duplicate statements and log requests over the query budget, when enabled.
+
+    Args:
+        labels (tuple): The method and route template.
+        stats (RequestStats): The statements of the request.
+    """
+    duplicates = stats.duplicates()
+    if duplicates:
+        db_duplicate_queries.inc(*labels, amount=sum(duplicates.values()) - len(duplicates))
+        if settings.sql_log_duplicates:
+            logger.warning("%s %s repeated SQL statements:\n%s", *labels, "\n".join(
+                f"{count} x {' '.join(statement.split())} {parameters}"
+                for (statement, parameters), count in duplicates.items()))
+    if 0 < settings.sql_query_budget < stats.queries:
+        logger.warning("%s %s executed %d SQL statements, the budget is %d:\n%s",
+                       *labels, stats.queries, settings.sql_query_budget, stats.report())
@@ -0,0 +1,171 @@
+import math
+import time
+import uuid
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request, status
+from redis.exceptions import RedisError
+
+from src.repository.utils import decode_access_token
+from src.services.redis_pool import get_redis
+
+# Sliding window log: one sorted-set member per request inside the window.
+# Returns 0 when the request is allowed, otherwise the milliseconds until a slot frees up.
+SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+if redis.call('ZCARD', key) >= limit then
+    local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+    return math.max(1, math.ceil(tonumber(oldest[2]) + window - now))
+end
+redis.call('ZADD', key, now, ARGV[4])
+redis.call('PEXPIRE', key, window)
+return 0
+"""
+
+
+class MemoryBackend:
+    """
+    In-process token buckets, used when Redis is not configured.
+
+    Every bucket update runs without an ``await`` in between, so it is atomic on the event
+    loop and needs no lock. Idle buckets are dropped least recently used first.
+    """
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, list] = OrderedDict()
+
+    async def hit(self, key: str, times: int, seconds: float) -> float:
+        """
+        Take one token from a bucket.
+
+        Args:
+            key (str): The bucket key.
+            times (int): The bucket capacity.
+            seconds (float): The time to refill the whole bucket.
+
+        Returns:
+            float: 0 if the request is allowed, otherwise the seconds until a token is available.
+        """
+        now = time.monotonic()
+        rate = times / seconds
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(times), now]
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(float(times), bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0
+        return (1 - bucket[0]) / rate
+
+
+class RedisBackend:
+    """
+    A sliding window limit shared by all workers, evaluated atomically by a Lua script.
+    """
+    def __init__(self, client):
+        self.client = client
+        self.script = client.register_script(SLIDING_WINDOW_SCRIPT)
+
+    async def hit(self, key: str, times: int, seconds: float) -> float:
+        """
+        Record one request in the window.
+
+        Args:
+            key (str): The window key.
+            times (int): The number of requests allowed in the window.
+            seconds (float): The window length.
+
+        Returns:
+            float: 0 if the request is allowed, otherwise the seconds until it would be.
+        """
+        now_ms = int(time.time() * 1000)
+        wait_ms = await self.script(keys=[key], args=[now_ms, int(seconds * 1000), times, uuid.uuid4().hex])
+        return int(wait_ms) / 1000
+
+
+backend: MemoryBackend | RedisBackend = MemoryBackend()
+
+
+async def init() -> None:
+    """
+    Select the rate limit backend, Redis when it is enabled and reachable.
+
+    Called once from the application lifespan, until then the in-process backend is used.
+    """
+    global backend
+    client = get_redis()
+    if client is None:
+        backend = MemoryBackend()
+        return
+    try:
+        await client.ping()
+    except RedisError:
+        backend = MemoryBackend()
+        return
+    backend = RedisBackend(client)
+
+
+def identify(request: Request) -> str:
+    """
+    Identify the caller: the JWT subject when a valid bearer token is sent, else the client IP.
+
+    Args:
+        request (Request): The incoming request.
+
+    Returns:
+        str: The identity used in the rate limit key.
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        token_data = decode_access_token(token)
+        if token_data is not None:
+            return f"user:{token_data.username}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+class RateLimiter:
+    """
+    A dependency allowing ``times`` requests per ``seconds`` per caller and route.
+    """
+    def __init__(self, times: int, seconds: float):
+        """
+        Initialize the limit.
+
+        Args:
+            times (int): The number of requests allowed.
+            seconds (float): The period the requests are counted over.
+        """
+        self.times = times
+        self.seconds = seconds
+
+    async def __call__(self, request: Request) -> None:
+        """
+        Count the request and reject it when the caller is over the limit.
+
+        Args:
+            request (Request): The incoming request.
+
+        Raises:
+            HTTPException: 429 with Retry-After when the limit is exceeded.
+        """
+        route = request.scope.get("route")
+        key = f"rate_limit:{request.method}:{route.path if route else request.url.path}:{identify(request)}"
+        try:
+            wait = await backend.hit(key, self.times, self.seconds)
+        except RedisError:
+            wait = 0
+        if wait > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too Many Requests",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
@@ -0,0 +1,34 @@
+import redis.asyncio as redis
+
+from src.conf.config import settings
+
+_client: redis.Redis | None = None
+
+
+def get_redis() -> redis.Redis | None:
+    """
+    Return the shared Redis client, or None when Redis is not enabled.
+
+    All Redis users (caches, rate limiter, token store) share one connection pool
+    per process, so the pool is created lazily on first use.
+
+    Returns:
+        redis.Redis | None: The Redis client bound to the shared connection pool.
+    """
+    global _client
+    if not settings.redis_enabled:
+        return None
+    if _client is None:
+        pool = redis.ConnectionPool(host=settings.redis_host, port=settings.redis_port, db=0, decode_responses=True)
+        _client = redis.Redis(connection_pool=pool)
+    return _client
+
+
+async def close_redis() -> None:
+    """
+    Close the shared Redis client and its connection pool.
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,45 @@
+from typing import Any
+
+from fastapi.responses import Response
+from pydantic_core import to_json
+
+
+class RowsResponse(Response):
+    """
+    A JSON response encoded by pydantic-core straight from plain rows.
+
+    Contact rows selected as SQL mappings already have the response types, so they skip
+    the ``response_model`` validation and the generic ``jsonable_encoder`` pass: the rows
+    are encoded in one call. Bodies that are already encoded (e.g. from the contact cache)
+    are sent as they are.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        """
+        Encode the response body.
+
+        Args:
+            content: Rows or other JSON-compatible data, or an encoded body as ``str``/``bytes``.
+
+        Returns:
+            bytes: The JSON body.
+        """
+        if isinstance(content, bytes):
+            return content
+        if isinstance(content, str):
+            return content.encode()
+        return to_json(content)
+
+
+def encode_rows(rows: Any) -> str:
+    """
+    Encode rows to a JSON string, e.g. for caching a response body.
+
+    Args:
+        rows: Rows or other JSON-compatible data.
+
+    Returns:
+        str: The JSON text.
+    """
+    return to_json(rows).decode()
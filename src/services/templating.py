@@ -0,0 +1,125 @@
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template, TemplateNotFound, \
+    select_autoescape
+from markupsafe import Markup
+
+from src.conf.config import BASE_DIR, settings
+
+TEMPLATE_SUFFIXES = (".html", ".txt")
+
+
+class EmailTemplates:
+    """
+    Email templates compiled once and rendered without touching the file system.
+
+    Templates are compiled on ``preload`` (normally at startup) into an in-process table,
+    and Jinja's bytecode cache lets later processes skip the compile step. Templates
+    whose names start with ``_`` are static fragments: they are rendered once and
+    inserted into other templates with ``{{ fragment("_footer.html") }}``.
+
+    A message template ``name.html`` may have a plain-text sibling ``name.txt``.
+    """
+    def __init__(self, directory: str, cache_dir: str | None = None):
+        """
+        Initialize the environment.
+
+        Args:
+            directory (str): The directory holding the templates.
+            cache_dir (str | None): The bytecode cache directory, a temporary one by default.
+        """
+        self.directory = Path(directory)
+        self.env = Environment(
+            loader=FileSystemLoader(self.directory),
+            autoescape=select_autoescape(["html"]),
+            bytecode_cache=FileSystemBytecodeCache(cache_dir),
+            auto_reload=False,
+        )
+        self.env.globals["fragment"] = self.fragment
+        self._compiled: dict[str, Template | None] = {}
+        self._fragments: dict[str, Markup] = {}
+
+    def preload(self) -> int:
+        """
+        Compile every template in the directory.
+
+        Returns:
+            int: The number of compiled templates.
+        """
+        for path in self.directory.iterdir():
+            if path.suffix in TEMPLATE_SUFFIXES:
+                self.get(path.name)
+        return sum(template is not None for template in self._compiled.values())
+
+    def get(self, name: str) -> Template | None:
+        """
+        Return a compiled template, compiling it on first use.
+
+        Args:
+            name (str): The template file name.
+
+        Returns:
+            Template | None: The template, or None if there is no such file.
+        """
+        try:
+            return self._compiled[name]
+        except KeyError:
+            pass
+        try:
+            template = self.env.get_template(name)
+        except TemplateNotFound:
+            template = None
+        self._compiled[name] = template
+        return template
+
+    def fragment(self, name: str) -> Markup:
+        """
+        Render a static fragment once and return the cached output.
+
+        Args:
+            name (str): The fragment template name.
+
+        Returns:
+            Markup: The rendered fragment, safe to insert into HTML.
+        """
+        rendered = self._fragments.get(name)
+        if rendered is None:
+            template = self.get(name)
+            if template is None:
+                raise TemplateNotFound(name)
+            rendered = self._fragments[name] = Markup(template.render())
+        return rendered
+
+    def render(self, name: str, context: dict) -> tuple[str, str | None]:
+        """
+        Render the HTML part of a message and its plain-text part if there is one.
+
+        Args:
+            name (str): The HTML template name.
+            context (dict): The template variables.
+
+        Returns:
+            tuple[str, str | None]: The HTML part and the plain-text part.
+
+        Raises:
+            TemplateNotFound: If the HTML template does not exist.
+        """
+        html = self.get(name)
+        if html is None:
+            raise TemplateNotFound(name)
+        text = self.get(str(Path(name).with_suffix(".txt")))
+        return html.render(context), text.render(context) if text is not None else None
+
+    def clear(self) -> None:
+        """
+        Forget compiled templates and rendered fragments, e.g. after editing templates.
+        """
+        self._compiled.clear()
+        self._fragments.clear()
+        self.env.cache.clear()
+
+
+# anchored at the project root, so the workers may be started from any directory
+_cache_dir = settings.email_template_cache_dir
+email_templates = EmailTemplates(str(BASE_DIR / settings.email_template_dir),
+                                 str(BASE_DIR / _cache_dir) if _cache_dir else None)
@@ -0,0 +1,327 @@
+import logging
+import time
+
+from redis.exceptions import RedisError
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.conf.config import settings
+from src.database.models import RefreshToken, TokenRevocation
+from src.services.redis_pool import get_redis
+from src.services.user_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+FAMILY_PREFIX = "refresh:"
+USED_PREFIX = "refresh_used:"
+REVOKED_PREFIX = "revoked_before:"
+
+# Outcomes of consuming a refresh token. Only a token that was used before means it was
+# stolen or replayed; an unknown one may simply predate a flushed or new store.
+LIVE, USED, UNKNOWN = "live", "used", "unknown"
+
+
+class MemoryTokenStore:
+    """
+    Refresh token IDs and revocation times kept in process, used when Redis is not configured.
+
+    Like the in-process rate limiter, every operation runs without an ``await`` in between,
+    so it is atomic on the event loop. The state is lost on restart and not shared between
+    worker processes, so it is only the default until ``init`` selects the shared store.
+    """
+    def __init__(self):
+        self._families: dict[str, dict[str, float]] = {}
+        self._used: dict[str, dict[str, float]] = {}
+        self._revoked: dict[str, tuple[float, float]] = {}
+
+    async def add(self, username: str, jti: str, ttl: float) -> None:
+        """
+        Register a newly issued refresh token.
+
+        Args:
+            username (str): The token subject.
+            jti (str): The token ID.
+            ttl (float): The token lifetime in seconds.
+        """
+        now = time.time()
+        for tokens in (self._families.setdefault(username, {}), self._used.setdefault(username, {})):
+            for stale in [key for key, expires_at in tokens.items() if expires_at < now]:
+                del tokens[stale]
+        self._families[username][jti] = now + ttl
+
+    async def consume(self, username: str, jti: str) -> str:
+        """
+        Mark a refresh token as used so it can be used only once.
+
+        Args:
+            username (str): The token subject.
+            jti (str): The token ID.
+
+        Returns:
+            str: ``LIVE`` if the token was live, ``USED`` if it was used before, ``UNKNOWN`` otherwise.
+        """
+        now = time.time()
+        expires_at = self._families.get(username, {}).pop(jti, None)
+        if expires_at is not None and expires_at >= now:
+            self._used.setdefault(username, {})[jti] = expires_at
+            return LIVE
+        if self._used.get(username, {}).get(jti, 0) >= now:
+            return USED
+        return UNKNOWN
+
+    async def revoke_all(self, username: str, ttl: float) -> None:
+        """
+        Revoke every refresh token of a user and every token issued before now.
+
+        Args:
+            username (str): The user name.
+            ttl (float): How long to remember the revocation, the longest token lifetime.
+        """
+        now = time.time()
+        self._families.pop(username, None)
+        self._used.pop(username, None)
+        self._revoked[username] = (now, now + ttl)
+
+    async def revoked_before(self, username: str) -> float | None:
+        """
+        Return the time before which the user's tokens are revoked.
+
+        Args:
+            username (str): The user name.
+
+        Returns:
+            float | None: A Unix timestamp, or None if nothing is revoked.
+        """
+        entry = self._revoked.get(username)
+        if entry is None:
+            return None
+        if entry[1] < time.time():
+            del self._revoked[username]
+            return None
+        return entry[0]
+
+
+class RedisTokenStore:
+    """
+    Refresh token IDs in one Redis SET per user, shared by all workers.
+
+    ``SMOVE`` to the user's set of used tokens reports whether it moved the member, which
+    makes rotation an atomic use-once check. Revocation is a single timestamp key per user,
+    also recorded in the database so it still applies while Redis is unreachable.
+    """
+    def __init__(self, client, fallback: "DatabaseTokenStore | None" = None):
+        """
+        Initialize the store.
+
+        Args:
+            client: The Redis client.
+            fallback (DatabaseTokenStore | None): The store also keeping revocations, the database one by default.
+        """
+        self.client = client
+        self.fallback = fallback or DatabaseTokenStore()
+
+    async def add(self, username: str, jti: str, ttl: float) -> None:
+        """
+        Register a newly issued refresh token.
+
+        Args:
+            username (str): The token subject.
+            jti (str): The token ID.
+            ttl (float): The token lifetime in seconds, the SET expires with its newest token.
+        """
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.sadd(FAMILY_PREFIX + username, jti)
+            pipe.expire(FAMILY_PREFIX + username, int(ttl))
+            pipe.expire(USED_PREFIX + username, int(ttl))
+            await pipe.execute()
+
+    async def consume(self, username: str, jti: str) -> str:
+        """
+        Mark a refresh token as used so it can be used only once.
+
+        Args:
+            username (str): The token subject.
+            jti (str): The token ID.
+
+        Returns:
+            str: ``LIVE`` if the token was live, ``USED`` if it was used before, ``UNKNOWN`` otherwise.
+        """
+        if await self.client.smove(FAMILY_PREFIX + username, USED_PREFIX + username, jti):
+            return LIVE
+        return USED if await self.client.sismember(USED_PREFIX + username, jti) else UNKNOWN
+
+    async def revoke_all(self, username: str, ttl: float) -> None:
+        """
+        Revoke every refresh token of a user and every token issued before now.
+
+        Args:
+            username (str): The user name.
+            ttl (float): How long to remember the revocation, the longest token lifetime.
+        """
+        await self.fallback.revoke_all(username, ttl)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(FAMILY_PREFIX + username, USED_PREFIX + username)
+            pipe.set(REVOKED_PREFIX + username, time.time(), ex=int(ttl))
+            await pipe.execute()
+
+    async def revoked_before(self, username: str) -> float | None:
+        """
+        Return the time before which the user's tokens are revoked.
+
+        Args:
+            username (str): The user name.
+
+        Returns:
+            float | None: A Unix timestamp, or None if nothing is revoked.
+        """
+        value = await self.client.get(REVOKED_PREFIX + username)
+        return float(value) if value is not None else None
+
+
+class DatabaseTokenStore:
+    """
+    Refresh token IDs and revocation times in the database, used when Redis is not configured.
+
+    With Redis it only keeps the revocation times, for ``RedisTokenStore`` to fall back on.
+
+    The state survives restarts and is shared by all worker processes. Consuming a token is
+    a conditional ``UPDATE``, so two workers cannot both rotate the same token. Revocation
+    times are looked up on every authenticated request, so they are cached in process for
+    ``user_cache_ttl`` seconds: a logout everywhere applies at once in the worker that served
+    it and within that time in the others.
+    """
+    def __init__(self, session_maker: async_sessionmaker | None = None):
+        """
+        Initialize the store.
+
+        Args:
+            session_maker (async_sessionmaker | None): The session factory, the application one by default.
+        """
+        self.session_maker = session_maker
+        self._revoked = TTLCache(settings.user_cache_size, settings.user_cache_ttl)
+
+    def _sessions(self) -> async_sessionmaker:
+        if self.session_maker is None:
+            from src.database.db import SessionLocal
+            self.session_maker = SessionLocal
+        return self.session_maker
+
+    async def add(self, username: str, jti: str, ttl: float) -> None:
+        """
+        Register a newly issued refresh token, dropping the user's expired ones.
+
+        Args:
+            username (str): The token subject.
+            jti (str): The token ID.
+            ttl (float): The token lifetime in seconds.
+        """
+        now = time.time()
+        async with self._sessions()() as db:
+            await db.execute(delete(RefreshToken).filter(RefreshToken.user_name == username,
+                                                         RefreshToken.expires_at < now))
+            db.add(RefreshToken(jti=jti, user_name=username, expires_at=now + ttl))
+            await db.commit()
+
+    async def consume(self, username: str, jti: str) -> str:
+        """
+        Mark a refresh token as used so it can be used only once.
+
+        Args:
+            username (str): The token subject.
+            jti (str): The token ID.
+
+        Returns:
+            str: ``LIVE`` if the token was live, ``USED`` if it was used before, ``UNKNOWN`` otherwise.
+        """
+        now = time.time()
+        async with self._sessions()() as db:
+            result = await db.execute(
+                update(RefreshToken).filter(RefreshToken.jti == jti, RefreshToken.user_name == username,
+                                            RefreshToken.used_at.is_(None), RefreshToken.expires_at >= now)
+                .values(used_at=now).execution_options(synchronize_session=False))
+            await db.commit()
+            if result.rowcount == 1:
+                return LIVE
+            used = await db.execute(select(RefreshToken.jti).filter(
+                RefreshToken.jti == jti, RefreshToken.user_name == username, RefreshToken.used_at.is_not(None),
+                RefreshToken.expires_at >= now))
+            return USED if used.scalar_one_or_none() is not None else UNKNOWN
+
+    async def revoke_all(self, username: str, ttl: float) -> None:
+        """
+        Revoke every refresh token of a user and every token issued before now.
+
+        Args:
+            username (str): The user name.
+            ttl (float): How long to remember the revocation, the longest token lifetime.
+        """
+        now = time.time()
+        async with self._sessions()() as db:
+            await db.execute(delete(RefreshToken).filter(RefreshToken.user_name == username))
+            dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+            stmt = dialect.insert(TokenRevocation).values(user_name=username, revoked_at=now, expires_at=now + ttl)
+            await db.execute(stmt.on_conflict_do_update(
+                index_elements=[TokenRevocation.user_name],
+                set_={"revoked_at": stmt.excluded.revoked_at, "expires_at": stmt.excluded.expires_at}))
+            await db.commit()
+        self._revoked.set(username, (now, now + ttl))
+
+    async def revoked_before(self, username: str) -> float | None:
+        """
+        Return the time before which the user's tokens are revoked.
+
+        Args:
+            username (str): The user name.
+
+        Returns:
+            float | None: A Unix timestamp, or None if nothing is revoked.
+        """
+        entry = self._revoked.get(username)
+        if entry is None:
+            async with self._sessions()() as db:
+                row = (await db.execute(select(TokenRevocation.revoked_at, TokenRevocation.expires_at)
+                                        .filter(TokenRevocation.user_name == username))).first()
+            entry = tuple(row) if row is not None else (None, float("inf"))
+            self._revoked.set(username, entry)
+        revoked_at, expires_at = entry
+        return revoked_at if expires_at >= time.time() else None
+
+
+store: MemoryTokenStore | RedisTokenStore | DatabaseTokenStore = MemoryTokenStore()
+
+
+async def init() -> None:
+    """
+    Select the token store, Redis when it is enabled and reachable, the database otherwise.
+
+    Called once from the application lifespan, until then the in-process store is used.
+    """
+    global store
+    client = get_redis()
+    if client is None:
+        store = DatabaseTokenStore()
+        return
+    try:
+        await client.ping()
+    except RedisError:
+        store = DatabaseTokenStore()
+        return
+    store = RedisTokenStore(client)
+
+
+async def revoked_before(username: str) -> float | None:
+    """
+    Look up a user's revocation time, in the database record while Redis is unreachable.
+
+    Args:
+        username (str): The user name.
+
+    Returns:
+        float | None: A Unix timestamp, or None if nothing is revoked.
+    """
+    try:
+        return await store.revoked_before(username)
+    except RedisError as err:
+        logger.warning("Redis unreachable, reading the revocation of %s from the database: %s", username, err)
+        return await store.fallback.revoked_before(username)
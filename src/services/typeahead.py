@@ -0,0 +1,247 @@
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.conf.config import settings
+from src.database.models import Contact
+from src.services import contact_cache
+
+INDEXED_FIELDS = ("name", "second_name", "email", "phone")
+RESULT_FIELDS = ("id",) + INDEXED_FIELDS
+
+
+class UserIndex:
+    """
+    A sorted-array prefix index over one user's contacts.
+
+    Every indexed field value is stored lowercased as a ``(key, contact_id)`` pair in one
+    sorted list, so a prefix lookup is a binary search followed by a short scan.
+    """
+    def __init__(self, rows: List[dict], version: str | None = None):
+        """
+        Build the index from contact rows.
+
+        Args:
+            rows (List[dict]): Contact rows with the ``RESULT_FIELDS`` keys.
+            version (str | None): The owner's ``contact_cache`` version the rows were read at.
+        """
+        self.version = version
+        self.rows = {row["id"]: row for row in rows}
+        self.keys = sorted(pair for row in rows for pair in self._pairs(row))
+
+    @staticmethod
+    def _pairs(row: dict) -> List[tuple[str, int]]:
+        return [(str(row[field]).lower(), row["id"]) for field in INDEXED_FIELDS if row.get(field)]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, row: dict) -> None:
+        """
+        Add or replace a contact in the index.
+
+        Args:
+            row (dict): The contact row.
+        """
+        self.remove(row["id"])
+        self.rows[row["id"]] = row
+        for pair in self._pairs(row):
+            insort(self.keys, pair)
+
+    def remove(self, contact_id: int) -> None:
+        """
+        Remove a contact from the index if it is present.
+
+        Args:
+            contact_id (int): The ID of the contact.
+        """
+        row = self.rows.pop(contact_id, None)
+        if row is None:
+            return
+        for pair in self._pairs(row):
+            position = bisect_left(self.keys, pair)
+            if position < len(self.keys) and self.keys[position] == pair:
+                del self.keys[position]
+
+    def search(self, prefix: str, limit: int) -> List[dict]:
+        """
+        Return contacts with any indexed field starting with a prefix.
+
+        Args:
+            prefix (str): The case-insensitive prefix.
+            limit (int): The maximum number of contacts to return.
+
+        Returns:
+            List[dict]: The matching contact rows, in key order.
+        """
+        prefix = prefix.lower()
+        found: dict = {}
+        position = bisect_left(self.keys, (prefix,))
+        while position < len(self.keys) and len(found) < limit:
+            key, contact_id = self.keys[position]
+            if not key.startswith(prefix):
+                break
+            found.setdefault(contact_id, self.rows[contact_id])
+            position += 1
+        return list(found.values())
+
+
+class TypeaheadIndex:
+    """
+    Per-user prefix indexes kept in memory, evicted least recently used first.
+
+    Indexes are built lazily on a user's first prefix search and kept in sync by the
+    contact repository. Each index records the owner's ``contact_cache`` version it was
+    built at and is rebuilt when the version moved: with Redis that is a write on any
+    worker, without it the version also expires after ``contact_cache_ttl``, which bounds
+    how long a write on another worker goes unseen. A bump by this worker's own write,
+    already applied to the index, moves the index to the new version.
+
+    Writes bump the owner's generation while a build is in flight, a build that raced a
+    write is answered from but not kept. The memory budget is the total number of index
+    entries. Each worker process holds its own indexes.
+    """
+    def __init__(self, max_entries: int):
+        """
+        Initialize an empty set of indexes.
+
+        Args:
+            max_entries (int): The maximum number of index entries over all users.
+        """
+        self.max_entries = max_entries
+        self._users: OrderedDict[int, UserIndex] = OrderedDict()
+        # both only hold the users with a build in flight
+        self._building: dict[int, int] = {}
+        self._generations: dict[int, int] = {}
+        self._entries = 0
+
+    async def search(self, user_id: int, prefix: str, limit: int, db: AsyncSession, version: str) -> List[dict]:
+        """
+        Prefix search a user's contacts, building the user's index on first use or when it is outdated.
+
+        Args:
+            user_id (int): The ID of the user whose contacts are searched.
+            prefix (str): The case-insensitive prefix.
+            limit (int): The maximum number of contacts to return.
+            db (AsyncSession): The session used to build a missing index.
+            version (str): The user's current ``contact_cache`` version, read before the search.
+
+        Returns:
+            List[dict]: The matching contact rows.
+        """
+        index = self._users.get(user_id)
+        if index is not None and index.version != version:
+            self._discard(user_id)
+            index = None
+        if index is None:
+            self._building[user_id] = self._building.get(user_id, 0) + 1
+            generation = self._generations.setdefault(user_id, 0)
+            try:
+                columns = [getattr(Contact, field) for field in RESULT_FIELDS]
+                result = await db.execute(select(*columns).filter(Contact.owner_id == user_id))
+                built = UserIndex([dict(row) for row in result.mappings().all()], version)
+                raced = self._generations[user_id] != generation
+            finally:
+                self._building[user_id] -= 1
+                if not self._building[user_id]:
+                    del self._building[user_id], self._generations[user_id]
+            # another search may have installed an index, or a write landed, while this one read
+            index = self._users.get(user_id)
+            if index is None:
+                if raced:
+                    return built.search(prefix, limit)
+                index = self._users[user_id] = built
+                self._entries += len(index)
+                self._evict(keep=user_id)
+            elif index.version != version:
+                return built.search(prefix, limit)
+        self._users.move_to_end(user_id)
+        return index.search(prefix, limit)
+
+    def _evict(self, keep: int) -> None:
+        while self._entries > self.max_entries and len(self._users) > 1:
+            user_id, index = self._users.popitem(last=False)
+            if user_id == keep:
+                self._users[user_id] = index
+                continue
+            self._entries -= len(index)
+
+    def _discard(self, user_id: int) -> None:
+        index = self._users.pop(user_id, None)
+        if index is not None:
+            self._entries -= len(index)
+
+    def _changed(self, user_id: int) -> None:
+        if user_id in self._generations:
+            self._generations[user_id] += 1
+
+    def _update(self, user_id: int, change) -> None:
+        self._changed(user_id)
+        index = self._users.get(user_id)
+        if index is None:
+            return
+        before = len(index)
+        change(index)
+        self._entries += len(index) - before
+        self._evict(keep=user_id)
+
+    def on_save(self, user_id: int, contact: Contact) -> None:
+        """
+        Reflect a created or updated contact in the user's index, if it is loaded.
+
+        Args:
+            user_id (int): The ID of the contact owner.
+            contact (Contact): The saved contact.
+        """
+        row = {field: getattr(contact, field) for field in RESULT_FIELDS}
+        self._update(user_id, lambda index: index.add(row))
+
+    def on_remove(self, user_id: int, contact_id: int) -> None:
+        """
+        Drop a removed contact from the user's index, if it is loaded.
+
+        Args:
+            user_id (int): The ID of the contact owner.
+            contact_id (int): The ID of the removed contact.
+        """
+        self._update(user_id, lambda index: index.remove(contact_id))
+
+    def on_bump(self, user_id: int, previous: str | None, current: str) -> None:
+        """
+        Move a user's index to the version a write of this worker started.
+
+        The write has already been applied to the index, so it only stays valid if it was
+        at the version the bump replaced, that is if no other write came in between.
+
+        Args:
+            user_id (int): The ID of the contact owner.
+            previous (str | None): The version the bump replaced, None if it is unknown.
+            current (str): The new version.
+        """
+        index = self._users.get(user_id)
+        if index is not None and previous is not None and index.version == previous:
+            index.version = current
+
+    def invalidate(self, user_id: int) -> None:
+        """
+        Drop a user's whole index, it is rebuilt on the next prefix search.
+
+        Args:
+            user_id (int): The ID of the user.
+        """
+        self._changed(user_id)
+        self._discard(user_id)
+
+    def clear(self) -> None:
+        """
+        Drop every index.
+        """
+        self._users.clear()
+        self._entries = 0
+
+
+typeahead = TypeaheadIndex(settings.typeahead_max_entries)
+contact_cache.add_bump_hook(typeahead.on_bump)
@@ -0,0 +1,148 @@
+import json
+import time
+from collections import OrderedDict
+
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.database.models import User
+from src.services.redis_pool import get_redis
+
+REDIS_KEY_PREFIX = "user:"
+# the password hash stays out of both tiers, login reads it from the database
+CACHED_COLUMNS = tuple(column.key for column in User.__table__.columns if column.key != "hashes_password")
+
+
+class TTLCache:
+    """
+    A small LRU cache whose entries also expire after a fixed time to live.
+    """
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize (int): The maximum number of entries kept.
+            ttl (float): The number of seconds an entry stays valid.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        """
+        Return the cached value for a key, or None if it is missing or expired.
+
+        Args:
+            key: The cache key.
+
+        Returns:
+            The cached value or None.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl: float | None = None) -> None:
+        """
+        Store a value, evicting the least recently used entry when the cache is full.
+
+        Args:
+            key: The cache key.
+            value: The value to store.
+            ttl (float | None): The time to live of this entry, the cache's one by default.
+        """
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key) -> None:
+        """
+        Remove a key from the cache if it is present.
+
+        Args:
+            key: The cache key.
+        """
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Remove every entry from the cache.
+        """
+        self._entries.clear()
+
+
+local_cache = TTLCache(settings.user_cache_size, settings.user_cache_ttl)
+
+
+def _to_row(user: User) -> dict:
+    return {key: getattr(user, key) for key in CACHED_COLUMNS}
+
+
+async def get_user(username: str) -> User | None:
+    """
+    Look up an authenticated user in the process cache, then in Redis.
+
+    The returned user is a detached copy built from the cached row, it is safe to read
+    but is not bound to any session and its ``hashes_password`` is None.
+
+    Args:
+        username (str): The token subject (user name).
+
+    Returns:
+        User | None: The cached user, or None on a cache miss.
+    """
+    row = local_cache.get(username)
+    if row is None:
+        client = get_redis()
+        if client is None:
+            return None
+        try:
+            cached = await client.get(REDIS_KEY_PREFIX + username)
+        except RedisError:
+            return None
+        if cached is None:
+            return None
+        row = {key: value for key, value in json.loads(cached).items() if key in CACHED_COLUMNS}
+        local_cache.set(username, row)
+    return User(**row)
+
+
+async def set_user(user: User) -> None:
+    """
+    Store a user row, without the password hash, in the process cache and in Redis.
+
+    Args:
+        user (User): The user loaded from the database.
+    """
+    row = _to_row(user)
+    local_cache.set(user.user_name, row)
+    client = get_redis()
+    if client is not None:
+        try:
+            await client.set(REDIS_KEY_PREFIX + user.user_name, json.dumps(row), ex=settings.user_cache_ttl)
+        except RedisError:
+            pass
+
+
+async def invalidate_user(username: str) -> None:
+    """
+    Drop a user from every cache tier after the user row changed.
+
+    Args:
+        username (str): The user name of the changed user.
+    """
+    local_cache.pop(username)
+    client = get_redis()
+    if client is not None:
+        try:
+            await client.delete(REDIS_KEY_PREFIX + username)
+        except RedisError:
+            pass
@@ -1,11 +1,15 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from main import app
 from src.database.models import Base
-from src.database.db import get_db
+from src.database.db import get_db, get_session_maker
+from src.services import token_store
+from src.services.metrics import instrument_engine
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 
@@ -14,6 +18,11 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# TestClient runs every request on its own event loop, so async connections must not be pooled
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+instrument_engine(async_engine.sync_engine)
+
 
 @pytest.fixture(scope="module")
 def session():
@@ -33,15 +42,17 @@ def session():
 def client(session):
     # Dependency override
 
-    def override_get_db():
-        try:
-            yield session
-        finally:
-            session.close()
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_maker] = lambda: AsyncTestingSessionLocal
+    # the store the application uses without Redis, on the test database
+    previous_store, token_store.store = token_store.store, token_store.DatabaseTokenStore(AsyncTestingSessionLocal)
 
     yield TestClient(app)
+    token_store.store = previous_store
 
 
 @pytest.fixture(scope="module")
@@ -0,0 +1,367 @@
+import csv
+import io
+import json
+from datetime import date
+
+import pytest
+
+from src.database.models import Contact, User
+from src.repository import contacts as repository_contacts
+from src.repository.utils import create_access_token
+from src.services import contact_cache
+from src.services.metrics import max_queries
+from src.services.typeahead import typeahead
+from tests.conftest import AsyncTestingSessionLocal
+
+
+@pytest.fixture(scope="module")
+def owner(session):
+    user = User(user_name="wolverine", email="wolverine@example.com", hashes_password="hash", confirmed=True)
+    session.add(user)
+    session.commit()
+    session.add_all(Contact(name=f"name{i}", second_name=f"second{i}", email=f"contact{i}@example.com",
+                            phone=f"+38050{i:07d}", born_date=date(1990, 1 + i % 12, 1 + i % 28), owner_id=user.id)
+                    for i in range(5))
+    session.commit()
+    return user
+
+
+@pytest.fixture(scope="module")
+def auth_headers(owner):
+    token = create_access_token(data={"sub": owner.user_name})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_get_contacts_pages_with_cursor(client, auth_headers):
+    response = client.get("/api/contacts/", params={"limit": 3}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    first_page = response.json()
+    assert len(first_page) == 3
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get("/api/contacts/", params={"limit": 3, "cursor": cursor}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    second_page = response.json()
+    assert len(second_page) == 2
+    assert "X-Next-Cursor" not in response.headers
+    assert {c["id"] for c in first_page}.isdisjoint(c["id"] for c in second_page)
+
+
+def test_get_contacts_projection(client, auth_headers):
+    response = client.get("/api/contacts/", params={"fields": "name,email"}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert set(response.json()[0]) == {"id", "name", "email"}
+
+
+def test_get_contacts_rejects_unknown_field(client, auth_headers):
+    response = client.get("/api/contacts/", params={"fields": "hashes_password"}, headers=auth_headers)
+    assert response.status_code == 400, response.text
+
+
+def test_get_contacts_rejects_bad_cursor(client, auth_headers):
+    response = client.get("/api/contacts/", params={"cursor": "not-a-cursor"}, headers=auth_headers)
+    assert response.status_code == 400, response.text
+
+
+@pytest.mark.parametrize("path, state", [("/api/contacts/", {"id": True}), ("/api/contacts/search", {"offset": True}),
+                                         ("/api/contacts/search", {"offset": "3"})])
+def test_cursor_values_must_be_integers(client, auth_headers, path, state):
+    cursor = repository_contacts.encode_cursor(state)
+    response = client.get(path, params={"q": "name", "cursor": cursor}, headers=auth_headers)
+    assert response.status_code == 400, response.text
+
+
+def test_export_contacts_ndjson(client, auth_headers):
+    response = client.get("/api/contacts/export", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 5
+    assert rows[0]["born_date"] == "1990-01-01"
+
+
+def test_export_contacts_csv(client, auth_headers):
+    response = client.get("/api/contacts/export", params={"format": "csv"}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 5
+    assert rows[0]["email"] == "contact0@example.com"
+
+
+def test_bulk_create_contacts_json(client, auth_headers):
+    rows = [
+        {"name": "bulk", "second_name": "one", "email": "bulk1@example.com", "phone": "+380671111111",
+         "born_date": "1991-02-03"},
+        {"name": "bulk", "second_name": "dup", "email": "contact0@example.com", "phone": "+380672222222",
+         "born_date": "1991-02-03"},
+        {"name": "bulk", "second_name": "bad", "email": "not-an-email", "phone": "+380673333333",
+         "born_date": "1991-02-03"},
+    ]
+    response = client.post("/api/contacts/bulk", json=rows, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["inserted"] == 1
+    assert data["skipped"] == 1
+    assert sorted(error["row"] for error in data["errors"]) == [1, 2]
+
+
+def test_bulk_create_contacts_csv_abort_on_conflict(client, auth_headers):
+    content = ("name,second_name,email,phone,born_date\n"
+               "csv,one,csv1@example.com,+380674444444,1992-03-04\n"
+               "csv,dup,bulk1@example.com,+380675555555,1992-03-04\n")
+    response = client.post("/api/contacts/bulk", params={"on_conflict": "abort"},
+                           files={"file": ("contacts.csv", content, "text/csv")}, headers=auth_headers)
+    assert response.status_code == 409, response.text
+    response = client.get("/api/contacts/", params={"fields": "email", "limit": 500}, headers=auth_headers)
+    assert "csv1@example.com" not in {row["email"] for row in response.json()}
+
+
+@pytest.mark.parametrize("file_name, content", [
+    ("latin1.csv", b"name,second_name,email,phone,born_date\n"
+                   b"latin,one,latin1@example.com,+380677777777,1992-03-04\n"
+                   b"Ren\xe9,two,latin2@example.com,+380678888888,1992-03-04\n"),
+    ("utf16.ndjson", '{"name": "wide"}\n'.encode("utf-16")),
+])
+def test_bulk_create_contacts_rejects_non_utf8_file(client, auth_headers, file_name, content):
+    response = client.post("/api/contacts/bulk", files={"file": (file_name, content)}, headers=auth_headers)
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"] == "File must be UTF-8 encoded"
+    response = client.get("/api/contacts/", params={"fields": "email", "limit": 500}, headers=auth_headers)
+    assert "latin1@example.com" not in {row["email"] for row in response.json()}
+
+
+def test_upcoming_birthdays(client, auth_headers):
+    today = date.today()
+    born = today.replace(year=1990) if (today.month, today.day) != (2, 29) else date(1992, 2, 29)
+    row = {"name": "birthday", "second_name": "today", "email": "birthday@example.com", "phone": "+380676666666",
+           "born_date": born.isoformat()}
+    assert client.post("/api/contacts/bulk", json=[row], headers=auth_headers).json()["inserted"] == 1
+
+    response = client.get("/api/contacts/birth", params={"days": 0}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert "birthday@example.com" in {contact["email"] for contact in response.json()}
+
+
+def test_search_contacts_by_substring(client, auth_headers):
+    response = client.get("/api/contacts/search", params={"q": "econd3"}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert [contact["second_name"] for contact in response.json()] == ["second3"]
+
+
+def test_search_contacts_ranks_prefix_first_and_pages(client, auth_headers):
+    response = client.get("/api/contacts/search", params={"q": "na", "limit": 2}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 2
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get("/api/contacts/search", params={"q": "na", "limit": 2, "cursor": cursor},
+                          headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert all(contact["name"].startswith("name") for contact in response.json())
+
+
+def test_search_contacts_prefix_mode(client, auth_headers):
+    response = client.get("/api/contacts/search", params={"q": "SECOND1", "mode": "prefix"}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    contacts = response.json()
+    assert [contact["second_name"] for contact in contacts] == ["second1"]
+    assert set(contacts[0]) == {"id", "name", "second_name", "email", "phone"}
+
+
+def test_get_contact_etag_and_invalidation(client, owner, auth_headers):
+    contact_id = client.get("/api/contacts/", params={"limit": 1}, headers=auth_headers).json()[0]["id"]
+    response = client.get(f"/api/contacts/{contact_id}", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    etag = response.headers["ETag"]
+
+    response = client.get(f"/api/contacts/{contact_id}", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+    body = {**client.get(f"/api/contacts/{contact_id}", headers=auth_headers).json(), "name": "renamed",
+            "owner_id": owner.id}
+    response = client.put(f"/api/contacts/{contact_id}", json=body, headers=auth_headers)
+    assert response.status_code == 200, response.text
+
+    response = client.get(f"/api/contacts/{contact_id}", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200, response.text
+    assert response.headers["ETag"] != etag
+    assert response.json()["name"] == "renamed"
+
+
+def test_get_contacts_page_etag(client, auth_headers):
+    response = client.get("/api/contacts/", params={"limit": 2}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    etag = response.headers["ETag"]
+    response = client.get("/api/contacts/", params={"limit": 2}, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    response = client.get("/api/contacts/", params={"limit": 3}, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200, response.text
+    assert "X-Next-Cursor" in response.headers
+
+
+def test_search_contacts_etag(client, auth_headers):
+    params = {"q": "second"}
+    response = client.get("/api/contacts/search", params=params, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+    response = client.get("/api/contacts/search", params=params, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    response = client.get("/api/contacts/search", params={"q": "second1"},
+                          headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200, response.text
+
+
+def test_search_contacts_etag_does_not_depend_on_the_local_version(client, auth_headers):
+    params = {"q": "second"}
+    etag = client.get("/api/contacts/search", params=params, headers=auth_headers).headers["ETag"]
+    # another worker, or this one after the local version expired
+    contact_cache.local_versions.clear()
+    response = client.get("/api/contacts/search", params=params, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_large_listing_is_gzipped(client, auth_headers):
+    response = client.get("/api/contacts/", params={"limit": 500}, headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert response.status_code == 200, response.text
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert len(response.json()) >= 5
+
+    response = client.get("/api/contacts/", params={"limit": 1}, headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+
+
+def test_contact_reads_stay_within_query_budget(client, owner, auth_headers):
+    # The user lookup, unless cached, and the page; the revalidation and the cached read need none
+    with max_queries(2):
+        response = client.get("/api/contacts/", params={"limit": 2}, headers=auth_headers)
+    with max_queries(0):
+        client.get("/api/contacts/", params={"limit": 2},
+                   headers={**auth_headers, "If-None-Match": response.headers["ETag"]})
+        client.get("/api/contacts/", params={"limit": 2}, headers=auth_headers)
+    # The fingerprint and the ranked match
+    with max_queries(2):
+        client.get("/api/contacts/search", params={"q": "name"}, headers=auth_headers)
+    with max_queries(1):
+        client.get("/api/contacts/birth", headers=auth_headers)
+
+
+def test_put_replaces_every_field(client, owner, auth_headers):
+    contact_id = client.get("/api/contacts/", params={"limit": 1}, headers=auth_headers).json()[0]["id"]
+    body = {"name": "Replaced", "second_name": "Fields", "email": "replaced@example.com", "phone": "+380991112233",
+            "born_date": "1985-12-31", "owner_id": owner.id}
+    response = client.put(f"/api/contacts/{contact_id}", json=body, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert {key: response.json()[key] for key in body if key != "owner_id"} == \
+        {key: value for key, value in body.items() if key != "owner_id"}
+
+
+def test_patch_changes_only_given_fields(client, session, owner, auth_headers):
+    contact = Contact(name="Patch", second_name="Me", email="patch@example.com", phone="+380990000001",
+                      born_date=date(1990, 3, 3), owner_id=owner.id)
+    session.add(contact)
+    session.commit()
+    with max_queries(1):
+        response = client.patch(f"/api/contacts/{contact.id}", json={"second_name": "Patched",
+                                                                     "born_date": "1990-07-08"}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["name"] == "Patch"
+    assert response.json()["second_name"] == "Patched"
+    session.expire_all()
+    assert session.get(Contact, contact.id).birthday_ordinal == 708
+
+    response = client.get(f"/api/contacts/{contact.id}", headers=auth_headers)
+    assert response.json()["second_name"] == "Patched"
+
+    response = client.patch(f"/api/contacts/{contact.id}", json={"email": "contact1@example.com"},
+                            headers=auth_headers)
+    assert response.status_code == 409, response.text
+    response = client.patch("/api/contacts/999999", json={"name": "Nobody"}, headers=auth_headers)
+    assert response.status_code == 404, response.text
+
+
+def test_delete_in_one_statement(client, session, owner, auth_headers):
+    contact = Contact(name="Delete", second_name="Me", email="delete@example.com", phone="+380990000002",
+                      born_date=date(1990, 3, 3), owner_id=owner.id)
+    session.add(contact)
+    session.commit()
+    with max_queries(1):
+        response = client.delete(f"/api/contacts/{contact.id}", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["email"] == "delete@example.com"
+    response = client.delete(f"/api/contacts/{contact.id}", headers=auth_headers)
+    assert response.status_code == 404
+
+
+def test_batch_operations_in_one_transaction(client, session, owner, auth_headers):
+    contacts = [Contact(name=f"Batch{i}", second_name="Sync", email=f"batch{i}@example.com", phone=f"+38098000000{i}",
+                        born_date=date(1990, 3, 3), owner_id=owner.id) for i in range(4)]
+    session.add_all(contacts)
+    session.commit()
+    ids = [contact.id for contact in contacts]
+    operations = [
+        {"op": "get", "id": ids[0]},
+        {"op": "update", "id": ids[1], "body": {"name": "Renamed", "born_date": "1991-11-05"}},
+        {"op": "update", "id": ids[2], "body": {"phone": "+380980000099"}},
+        {"op": "delete", "id": ids[3]},
+        {"op": "get", "id": 999999},
+    ]
+    # delete, owned ids, one executemany UPDATE per set of changed columns, read back
+    with max_queries(5):
+        response = client.post("/api/contacts/batch", json={"operations": operations}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    results = response.json()["results"]
+    assert [(result["op"], result["id"], result["status"]) for result in results] == \
+        [(operation["op"], operation["id"], 200) for operation in operations[:4]] + [("get", 999999, 404)]
+    assert results[1]["contact"]["name"] == "Renamed"
+    assert results[1]["contact"]["born_date"] == "1991-11-05"
+    assert results[2]["contact"]["phone"] == "+380980000099"
+    assert results[3]["contact"]["email"] == "batch3@example.com"
+
+    session.expire_all()
+    assert session.get(Contact, ids[1]).birthday_ordinal == 1105
+    assert session.get(Contact, ids[3]) is None
+    assert client.get(f"/api/contacts/{ids[1]}", headers=auth_headers).json()["name"] == "Renamed"
+
+
+def test_batch_conflict_rolls_back(client, session, owner, auth_headers):
+    contact_ids = [contact["id"] for contact in
+                   client.get("/api/contacts/", params={"limit": 2}, headers=auth_headers).json()]
+    first = client.get(f"/api/contacts/{contact_ids[0]}", headers=auth_headers).json()
+    operations = [{"op": "update", "id": contact_ids[0], "body": {"name": "Rolled back"}},
+                  {"op": "update", "id": contact_ids[1], "body": {"email": first["email"]}}]
+    response = client.post("/api/contacts/batch", json={"operations": operations}, headers=auth_headers)
+    assert response.status_code == 409, response.text
+    assert client.get(f"/api/contacts/{contact_ids[0]}", headers=auth_headers).json()["name"] == first["name"]
+
+
+def test_batch_is_seen_by_a_prefix_search_built_before_its_commit(client, session, owner, auth_headers, monkeypatch):
+    contacts = [Contact(name=f"Racer{i}", second_name="Sync", email=f"late{i}@example.com", phone=f"+38097000000{i}",
+                        born_date=date(1990, 3, 3), owner_id=owner.id) for i in range(2)]
+    session.add_all(contacts)
+    session.commit()
+    typeahead.invalidate(owner.id)
+    get_contacts_by_ids = repository_contacts.get_contacts_by_ids
+
+    async def search_then_read(*args, **kwargs):
+        # a prefix search of another request, served between the batch's writes and its commit
+        async with AsyncTestingSessionLocal() as other:
+            await typeahead.search(owner.id, "racer", 10, other, await contact_cache.version(owner.id))
+        return await get_contacts_by_ids(*args, **kwargs)
+    monkeypatch.setattr(repository_contacts, "get_contacts_by_ids", search_then_read)
+
+    operations = [{"op": "update", "id": contacts[0].id, "body": {"name": "Renamed"}},
+                  {"op": "delete", "id": contacts[1].id}]
+    response = client.post("/api/contacts/batch", json={"operations": operations}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    monkeypatch.undo()
+
+    response = client.get("/api/contacts/search", params={"q": "racer", "mode": "prefix"}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert response.json() == []
+
+
+def test_batch_rejects_repeated_ids(client, auth_headers):
+    operations = [{"op": "get", "id": 1}, {"op": "delete", "id": 1}]
+    response = client.post("/api/contacts/batch", json={"operations": operations}, headers=auth_headers)
+    assert response.status_code == 400, response.text
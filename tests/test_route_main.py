@@ -0,0 +1,4 @@
+def test_root_is_rate_limited(client):
+    responses = [client.get("/") for _ in range(3)]
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert "Retry-After" in responses[-1].headers
@@ -0,0 +1,19 @@
+def test_pool_status(client):
+    response = client.get("/api/metrics/pool")
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["pool"] == "InstrumentedQueuePool"
+    assert {"checked_out", "overflow", "wait_seconds_max"} <= set(data)
+
+
+def test_prometheus_metrics_by_route_template(client):
+    client.post("/api/users/login", data={"username": "nobody", "password": "password"})
+    response = client.get("/metrics")
+    assert response.status_code == 200, response.text
+    lines = response.text.splitlines()
+    assert 'http_requests_total{method="POST",route="/api/users/login",status="401"} 1' in lines
+    assert "# TYPE db_pool_checkouts_total counter" in lines
+    queries = [line for line in lines
+               if line.startswith('db_queries_per_request_sum{method="POST",route="/api/users/login"}')]
+    assert queries and float(queries[0].split()[-1]) >= 1
+
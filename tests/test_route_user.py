@@ -1,6 +1,19 @@
+import asyncio
+import io
+from tempfile import SpooledTemporaryFile
 from unittest.mock import MagicMock
 
+import pytest
+from PIL import Image
+
 from src.database.models import User
+from src.repository.pass_utils import get_password_hash
+from src.repository.utils import create_access_token, create_email_token, create_refresh_token
+from src.services import avatars
+from src.services.avatars import LocalStorage
+from src.services import token_store
+from src.services.metrics import max_queries
+from tests.conftest import AsyncTestingSessionLocal
 
 
 def test_create_user(client, user, monkeypatch):
@@ -67,3 +80,155 @@ def test_create_user(client, user, monkeypatch):
 #     assert response.status_code == 401, response.text
 #     data = response.json()
 #     assert data["detail"] == "Invalid email"
+
+
+def test_update_avatar_runs_in_background(client, session, monkeypatch, tmp_path):
+    monkeypatch.setattr("src.services.avatars._storage", LocalStorage(str(tmp_path), "/static/avatars"))
+    current_user = User(user_name="avatar_user", email="avatar_user@example.com", hashes_password="hash")
+    session.add(current_user)
+    session.commit()
+    token = create_access_token(data={"sub": current_user.user_name})
+    image = io.BytesIO()
+    Image.new("RGB", (600, 400), "red").save(image, format="JPEG")
+
+    response = client.patch("/api/users/avatar", files={"file": ("avatar.jpg", image.getvalue(), "image/jpeg")},
+                            headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 202, response.text
+    assert response.json() == {"status": "pending"}
+    with Image.open(tmp_path / f"{current_user.id}.png") as avatar:
+        assert avatar.size == (250, 250)
+    session.expire_all()
+    assert session.query(User).filter(User.user_name == "avatar_user").first().avatar == \
+        f"/static/avatars/{current_user.id}.png"
+
+
+def test_local_storage_stays_in_its_directory(tmp_path):
+    storage = LocalStorage(str(tmp_path / "avatars"), "/static/avatars")
+    for name in ("../escaped", "x/../../escaped"):
+        with pytest.raises(ValueError):
+            storage.save(name, b"avatar", b"thumbnail")
+    assert not (tmp_path / "escaped.png").exists()
+    assert storage.save("7", b"avatar", b"thumbnail") == "/static/avatars/7.png"
+
+
+def spooled_image(size: tuple[int, int]) -> SpooledTemporaryFile:
+    spooled = SpooledTemporaryFile()
+    Image.new("RGB", size, "red").save(spooled, format="PNG")
+    spooled.seek(0)
+    return spooled
+
+
+# Pillow's own limit raises DecompressionBombError at twice its value, avatar_max_pixels a ValueError
+@pytest.mark.parametrize("target, name", [(Image, "MAX_IMAGE_PIXELS"), (avatars.settings, "avatar_max_pixels")])
+def test_oversized_avatar_is_dropped(monkeypatch, tmp_path, caplog, target, name):
+    monkeypatch.setattr(avatars, "_storage", LocalStorage(str(tmp_path), "/static/avatars"))
+    monkeypatch.setattr(target, name, 1000)
+    asyncio.run(avatars.process_avatar(spooled_image((100, 100)), 1, "bomb@example.com", AsyncTestingSessionLocal))
+    assert "Avatar processing failed for user 1" in caplog.text
+    assert not list(tmp_path.iterdir())
+
+
+def test_avatar_of_deleted_user_is_dropped(session, monkeypatch, tmp_path, caplog):
+    monkeypatch.setattr(avatars, "_storage", LocalStorage(str(tmp_path), "/static/avatars"))
+    asyncio.run(avatars.process_avatar(spooled_image((300, 300)), 404, "deleted@example.com",
+                                       AsyncTestingSessionLocal))
+    assert "User 404 was deleted before the avatar was stored" in caplog.text
+
+
+def test_update_avatar_rejects_large_file(client, session, monkeypatch):
+    monkeypatch.setattr("src.services.avatars.settings.avatar_max_bytes", 10)
+    token = create_access_token(data={"sub": "avatar_user"})
+    response = client.patch("/api/users/avatar", files={"file": ("avatar.jpg", b"x" * 100, "image/jpeg")},
+                            headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 413, response.text
+
+
+def login(client, user_name: str) -> dict:
+    response = client.post("/api/users/login", data={"username": user_name, "password": "Qwer1234."})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def refresh(client, refresh_token: str):
+    return client.get("/api/users/refresh_token", headers={"Authorization": f"Bearer {refresh_token}"})
+
+
+@pytest.fixture(scope="module")
+def rotation_user(session):
+    session.add(User(user_name="rotation_user", email="rotation_user@example.com",
+                     hashes_password=get_password_hash("Qwer1234."), avatar="avatar.png"))
+    session.commit()
+    return "rotation_user"
+
+
+def test_refresh_token_rotation_and_reuse_detection(client, rotation_user):
+    tokens = login(client, rotation_user)
+
+    response = refresh(client, tokens["access_token"])
+    assert response.status_code == 401, response.text
+
+    response = refresh(client, tokens["refresh_token"])
+    assert response.status_code == 200, response.text
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+
+    response = refresh(client, tokens["refresh_token"])
+    assert response.status_code == 401, response.text
+    response = refresh(client, rotated["refresh_token"])
+    assert response.status_code == 401, response.text
+    response = client.get("/api/users/me/", headers={"Authorization": f"Bearer {rotated['access_token']}"})
+    assert response.status_code == 401, response.text
+
+
+def test_logout_all_revokes_issued_tokens(client, rotation_user):
+    tokens = login(client, rotation_user)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.get("/api/users/me/", headers=headers).status_code == 200
+
+    response = client.post("/api/users/logout_all", headers=headers)
+    assert response.status_code == 200, response.text
+    assert client.get("/api/users/me/", headers=headers).status_code == 401
+    assert refresh(client, tokens["refresh_token"]).status_code == 401
+
+    tokens = login(client, rotation_user)
+    response = client.get("/api/users/me/", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert response.status_code == 200, response.text
+
+
+def test_refresh_survives_restart_and_unknown_token_is_not_theft(client, rotation_user, monkeypatch):
+    tokens = login(client, rotation_user)
+    # a restarted worker gets a new store on the same database
+    monkeypatch.setattr(token_store, "store", token_store.DatabaseTokenStore(AsyncTestingSessionLocal))
+    response = refresh(client, tokens["refresh_token"])
+    assert response.status_code == 200, response.text
+    rotated = response.json()
+
+    never_issued = create_refresh_token(data={"sub": rotation_user})
+    assert refresh(client, never_issued).status_code == 401
+    response = client.get("/api/users/me/", headers={"Authorization": f"Bearer {rotated['access_token']}"})
+    assert response.status_code == 200, response.text
+    assert refresh(client, rotated["refresh_token"]).status_code == 200
+
+
+def test_confirmed_email_loads_the_user_once(client, session):
+    session.add(User(user_name="unconfirmed", email="unconfirmed@example.com", hashes_password="unconfirmed-hash"))
+    session.commit()
+    token = create_email_token({"sub": "unconfirmed@example.com"})
+    with max_queries(2):
+        response = client.get(f"/api/users/confirmed_email/{token}")
+    assert response.json() == {"message": "Email confirmed"}
+    session.expire_all()
+    assert session.query(User).filter_by(user_name="unconfirmed").one().confirmed
+
+
+def test_login_with_duplicate_user_name(client, session):
+    for index in range(2):
+        session.add(User(user_name="twin", email=f"twin{index}@example.com",
+                         hashes_password=get_password_hash(f"Twin{index}pass."), avatar="avatar.png"))
+    session.commit()
+    response = client.post("/api/users/login", data={"username": "twin", "password": "Twin0pass."})
+    assert response.status_code == 200, response.text
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    response = client.get("/api/users/me/", headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["email"] == "twin0@example.com"
@@ -0,0 +1,66 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from src.services import contact_cache
+
+
+class TestContactCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        contact_cache.local_cache.clear()
+        contact_cache.local_versions.clear()
+
+    async def test_version_is_stable_until_bumped(self):
+        version = await contact_cache.version(1)
+        self.assertEqual(await contact_cache.version(1), version)
+        await contact_cache.bump(1)
+        self.assertNotEqual(await contact_cache.version(1), version)
+
+    async def test_bump_makes_cached_entries_unreachable(self):
+        version = await contact_cache.version(1)
+        await contact_cache.store(1, version, "contact:5", {"id": 5})
+        self.assertEqual(await contact_cache.lookup(1, version, "contact:5"), {"id": 5})
+        await contact_cache.bump(1)
+        self.assertIsNone(await contact_cache.lookup(1, await contact_cache.version(1), "contact:5"))
+
+    async def test_versions_are_per_owner(self):
+        version = await contact_cache.version(1)
+        await contact_cache.bump(2)
+        self.assertEqual(await contact_cache.version(1), version)
+
+    async def test_shared_version_needs_redis(self):
+        self.assertIsNone(await contact_cache.shared_version(1))
+        redis = AsyncMock()
+        redis.get.return_value = None
+        with patch("src.services.contact_cache.get_redis", return_value=redis):
+            self.assertEqual(await contact_cache.shared_version(1), "0")
+
+    async def test_bump_hooks_get_the_replaced_version(self):
+        bumps = []
+        with patch.object(contact_cache, "_bump_hooks", [lambda *args: bumps.append(args)]):
+            version = await contact_cache.version(1)
+            await contact_cache.bump(1)
+            redis = AsyncMock()
+            redis.incr.return_value = 8
+            with patch("src.services.contact_cache.get_redis", return_value=redis):
+                await contact_cache.bump(1)
+        self.assertEqual(bumps, [(1, version, bumps[0][2]), (1, "7", "8")])
+        self.assertNotEqual(bumps[0][2], version)
+
+    def test_etag_depends_on_owner_version_and_key(self):
+        etag = contact_cache.etag(1, "v", "contact:5")
+        self.assertEqual(etag, contact_cache.etag(1, "v", "contact:5"))
+        self.assertNotEqual(etag, contact_cache.etag(2, "v", "contact:5"))
+        self.assertNotEqual(etag, contact_cache.etag(1, "w", "contact:5"))
+        self.assertNotEqual(etag, contact_cache.etag(1, "v", "contact:6"))
+
+    def test_not_modified(self):
+        self.assertTrue(contact_cache.not_modified('"a", "b"', '"b"'))
+        self.assertTrue(contact_cache.not_modified('W/"b"', '"b"'))
+        self.assertTrue(contact_cache.not_modified("*", '"b"'))
+        self.assertFalse(contact_cache.not_modified('"a"', '"b"'))
+        self.assertFalse(contact_cache.not_modified(None, '"b"'))
+
+
+if __name__ == '__main__':
+    unittest.main()
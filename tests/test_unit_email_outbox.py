@@ -0,0 +1,101 @@
+import asyncio
+import socket
+from aiosmtpd.controller import Controller
+from sqlalchemy import select
+
+from src.database.models import EmailOutbox, utcnow
+from src.services import email
+from tests.conftest import AsyncTestingSessionLocal
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, smtp_session, envelope):
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def smtp_options(port: int) -> dict:
+    return {"hostname": "127.0.0.1", "port": port, "use_tls": False, "start_tls": False}
+
+
+async def queue_and_drain(worker: email.OutboxWorker, recipient: str) -> EmailOutbox:
+    async with AsyncTestingSessionLocal() as db:
+        await email.send_email(recipient, "deadpool", "http://testserver/", db)
+    await worker.drain()
+    await worker.stop()
+    async with AsyncTestingSessionLocal() as db:
+        return (await db.execute(select(EmailOutbox).filter(EmailOutbox.recipient == recipient))).scalar_one()
+
+
+def test_outbox_delivers_over_smtp(session):
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    try:
+        worker = email.OutboxWorker(AsyncTestingSessionLocal, smtp_options(controller.port), concurrency=2, rate=0)
+        entry = asyncio.run(queue_and_drain(worker, "outbox@example.com"))
+    finally:
+        controller.stop()
+    assert entry.status == email.SENT
+    assert entry.attempts == 1
+    assert entry.sent_at is not None
+    assert handler.messages[0].rcpt_tos == ["outbox@example.com"]
+    assert b"http://testserver/api/users/confirmed_email/" in handler.messages[0].content
+
+
+def test_outbox_backs_off_when_smtp_is_down(session):
+    worker = email.OutboxWorker(AsyncTestingSessionLocal, smtp_options(free_port()), concurrency=1, rate=0)
+    entry = asyncio.run(queue_and_drain(worker, "retry@example.com"))
+    assert entry.status == email.PENDING
+    assert entry.attempts == 1
+    assert entry.last_error
+    assert entry.next_attempt_at > utcnow()
+
+
+def drain_twice(worker: email.OutboxWorker, recipient: str, template: str) -> EmailOutbox:
+    async def run():
+        async with AsyncTestingSessionLocal() as db:
+            db.add(EmailOutbox(recipient=recipient, subject="Broken", template=template, context={},
+                               next_attempt_at=utcnow()))
+            await db.commit()
+        for _ in range(2):
+            await worker.drain()
+            async with AsyncTestingSessionLocal() as db:
+                entry = (await db.execute(select(EmailOutbox).filter(EmailOutbox.recipient == recipient))).scalar_one()
+                # make the retry due right away
+                entry.next_attempt_at = utcnow()
+                await db.commit()
+        await worker.stop()
+        return entry
+    return asyncio.run(run())
+
+
+def test_outbox_fails_message_with_missing_template(session, monkeypatch):
+    monkeypatch.setattr(email.settings, "email_max_attempts", 2)
+    worker = email.OutboxWorker(AsyncTestingSessionLocal, smtp_options(free_port()), concurrency=1, rate=0)
+    entry = drain_twice(worker, "missing@example.com", "missing.template.html")
+    assert entry.status == email.FAILED
+    assert entry.attempts == 2
+    assert entry.last_error.startswith("TemplateNotFound")
+
+
+def test_outbox_fails_message_on_unexpected_error(session, monkeypatch):
+    def broken(entry):
+        raise ValueError("bad header")
+
+    monkeypatch.setattr(email.settings, "email_max_attempts", 2)
+    monkeypatch.setattr(email, "render_message", broken)
+    worker = email.OutboxWorker(AsyncTestingSessionLocal, smtp_options(free_port()), concurrency=1, rate=0)
+    entry = drain_twice(worker, "poison@example.com", "email.template.html")
+    assert entry.status == email.FAILED
+    assert entry.attempts == 2
+    assert entry.last_error == "ValueError: bad header"
@@ -0,0 +1,31 @@
+import unittest
+from unittest.mock import patch
+
+from fastapi import HTTPException
+
+from src.repository import pass_utils
+
+
+class TestHashPool(unittest.IsolatedAsyncioTestCase):
+
+    async def test_hash_and_verify(self):
+        hashed = await pass_utils.async_get_password_hash("Qwer1234.")
+        self.assertTrue(await pass_utils.async_verify_password("Qwer1234.", hashed))
+        self.assertFalse(await pass_utils.async_verify_password("wrong", hashed))
+
+    async def test_metrics_hook_reports_operation(self):
+        calls = []
+        pass_utils.add_metrics_hook(lambda operation, latency, depth: calls.append((operation, depth)))
+        await pass_utils.async_get_password_hash("Qwer1234.")
+        self.assertIn(("hash", 0), calls)
+
+    async def test_saturated_pool_returns_503(self):
+        with patch.object(pass_utils.settings, "hash_queue_limit", 0):
+            with self.assertRaises(HTTPException) as ctx:
+                await pass_utils.async_get_password_hash("Qwer1234.")
+        self.assertEqual(ctx.exception.status_code, 503)
+        self.assertIn("Retry-After", ctx.exception.headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
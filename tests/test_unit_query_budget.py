@@ -0,0 +1,80 @@
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, text
+
+from src.services import metrics
+from src.services.metrics import QueryBudgetExceeded, RequestStats, instrument_engine, max_queries
+
+engine = create_engine("sqlite://")
+instrument_engine(engine)
+
+
+def run(*statements):
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            conn.execute(text(statement), parameters)
+
+
+class TestMaxQueries(unittest.TestCase):
+
+    def test_counts_statements_within_budget(self):
+        with max_queries(2) as stats:
+            run(("SELECT :x", {"x": 1}), ("SELECT :x", {"x": 2}))
+        self.assertEqual(stats.queries, 2)
+        self.assertFalse(stats.duplicates())
+
+    def test_exceeding_budget_fails_with_statements(self):
+        with self.assertRaises(QueryBudgetExceeded) as raised:
+            with max_queries(1):
+                run(("SELECT :x", {"x": 1}), ("SELECT :x", {"x": 1}))
+        self.assertIn("2 SQL statements executed, the budget is 1", str(raised.exception))
+        self.assertIn("2 x SELECT ?", str(raised.exception))
+
+    def test_decorator(self):
+        @max_queries(1)
+        def two_queries():
+            run(("SELECT 1", {}), ("SELECT 2", {}))
+
+        with self.assertRaises(QueryBudgetExceeded):
+            two_queries()
+        self.assertEqual(metrics._active_budgets, [])
+
+    def test_other_errors_propagate(self):
+        with self.assertRaises(ValueError):
+            with max_queries(0):
+                run(("SELECT 1", {}))
+                raise ValueError
+
+
+class TestRequestStats(unittest.TestCase):
+
+    def test_duplicates_need_same_parameters(self):
+        stats = RequestStats()
+        stats.record("SELECT ?", (1,), 0.1)
+        stats.record("SELECT ?", (1,), 0.1)
+        stats.record("SELECT ?", (2,), 0.1)
+        self.assertEqual(stats.duplicates(), {("SELECT ?", "(1,)"): 2})
+        self.assertEqual(stats.queries, 3)
+        self.assertAlmostEqual(stats.seconds, 0.3)
+
+    def test_statements_are_only_counted_when_tracked(self):
+        stats = RequestStats(track_statements=False)
+        stats.record("SELECT ?", (1,), 0.1)
+        stats.record("SELECT ?", (1,), 0.1)
+        self.assertEqual(stats.queries, 2)
+        self.assertEqual(stats.statements, {})
+        self.assertFalse(stats.duplicates())
+
+    def test_request_over_budget_is_logged(self):
+        stats = RequestStats()
+        stats.record("SELECT ?", (1,), 0.1)
+        stats.record("SELECT ?", (1,), 0.1)
+        with patch.object(metrics.settings, "sql_query_budget", 1), \
+                patch.object(metrics.settings, "sql_log_duplicates", True), \
+                self.assertLogs("src.services.metrics", "WARNING") as logs:
+            metrics._check_request_queries(("GET", "/budget"), stats)
+        self.assertEqual(len(logs.output), 2)
+        self.assertIn("repeated SQL statements", logs.output[0])
+        self.assertIn("executed 2 SQL statements, the budget is 1", logs.output[1])
+        self.assertEqual(metrics.db_duplicate_queries.values[("GET", "/budget")], 1)
@@ -0,0 +1,114 @@
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import NullPool
+
+from src.database.models import Base, Contact, User
+from src.repository import contacts as repository_contacts
+from src.repository import users as repository_users
+from src.schemas import CreteContact
+
+USERS = 20
+CONTACTS_PER_USER = 1000
+TABLES = ("contacts", "users")
+
+
+class TestQueryPlans(unittest.IsolatedAsyncioTestCase):
+    """
+    Every statement a repository function sends must reach contacts and users through an index.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.url = f"sqlite:///{Path(cls.directory.name) / 'plans.db'}"
+        cls.engine = create_engine(cls.url)
+        Base.metadata.create_all(cls.engine)
+        with cls.engine.begin() as conn:
+            conn.execute(insert(User), [dict(id=user_id, user_name=f"user{user_id}", email=f"user{user_id}@example.com",
+                                             hashes_password=f"hash{user_id}") for user_id in range(1, USERS + 1)])
+            conn.execute(insert(Contact), [
+                dict(name=f"name{i}", second_name=f"second{i}", email=f"c{i}@example.com", phone=f"+380{i:09d}",
+                     born_date=date(1990, 1 + i % 12, 1 + i % 28), birthday_ordinal=(1 + i % 12) * 100 + 1 + i % 28,
+                     owner_id=1 + i % USERS)
+                for i in range(USERS * CONTACTS_PER_USER)
+            ])
+            conn.execute(text("ANALYZE"))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+        cls.directory.cleanup()
+
+    async def asyncSetUp(self):
+        self.async_engine = create_async_engine(self.url.replace("sqlite://", "sqlite+aiosqlite://"),
+                                                poolclass=NullPool)
+        self.statements = []
+        event.listen(self.async_engine.sync_engine, "before_cursor_execute", self._capture)
+        self.session = async_sessionmaker(self.async_engine, expire_on_commit=False)()
+
+    async def asyncTearDown(self):
+        await self.session.close()
+        await self.async_engine.dispose()
+
+    def _capture(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            self.statements.append((statement, parameters))
+
+    def assertIndexed(self, ordered: bool = False):
+        """
+        Fail if a captured statement scans a table, or with ``ordered`` if it sorts outside an index.
+        """
+        self.assertTrue(self.statements)
+        with self.engine.connect() as conn:
+            for statement, parameters in self.statements:
+                plan = [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+                for step in plan:
+                    if step.startswith("SCAN") and step.split()[1] in TABLES:
+                        self.fail(f"full scan of {step.split()[1]}:\n{statement}\n" + "\n".join(plan))
+                    if ordered and step.startswith("USE TEMP B-TREE"):
+                        self.fail(f"sort outside an index:\n{statement}\n" + "\n".join(plan))
+        self.statements.clear()
+
+    async def test_get_contacts(self):
+        await repository_contacts.get_contacts(7, self.session, limit=50)
+        await repository_contacts.get_contacts(7, self.session, limit=50, after_id=9000)
+        await repository_contacts.get_contacts(7, self.session, limit=50, fields=["name", "email"])
+        self.assertIndexed(ordered=True)
+
+    async def test_export_contacts(self):
+        async for _ in repository_contacts.export_contacts(7, self.session, batch_size=500):
+            pass
+        self.assertIndexed(ordered=True)
+
+    async def test_get_contact(self):
+        await repository_contacts.get_contact(6, 7, self.session)
+        self.assertIndexed()
+
+    async def test_update_contact(self):
+        body = CreteContact(name="renamed", second_name="second", email="renamed@example.com", phone="+380999999999",
+                            owner_id=7, born_date=date(1990, 1, 1))
+        await repository_contacts.update_contact(26, 7, body, self.session)
+        self.assertIndexed()
+
+    async def test_search_contacts(self):
+        await repository_contacts.search_contacts("name12", 7, self.session, limit=20)
+        await repository_contacts.search_contacts("na", 7, self.session, limit=20)
+        self.assertIndexed()
+
+    async def test_birthday(self):
+        await repository_contacts.birthday(7, self.session, days=7)
+        self.assertIndexed()
+
+    async def test_get_user(self):
+        await repository_users.get_user_by_username("user7", self.session)
+        await repository_users.get_user_by_email("user7@example.com", self.session)
+        self.assertIndexed()
+
+
+if __name__ == '__main__':
+    unittest.main()
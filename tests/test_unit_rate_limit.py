@@ -0,0 +1,31 @@
+import unittest
+from unittest.mock import patch
+
+from src.services.rate_limit import MemoryBackend
+
+
+class TestMemoryBackend(unittest.IsolatedAsyncioTestCase):
+
+    async def test_bucket_allows_capacity_then_rejects(self):
+        backend = MemoryBackend()
+        with patch("src.services.rate_limit.time.monotonic", return_value=100.0):
+            self.assertEqual(await backend.hit("key", 2, 10), 0)
+            self.assertEqual(await backend.hit("key", 2, 10), 0)
+            self.assertAlmostEqual(await backend.hit("key", 2, 10), 5.0)
+
+    async def test_bucket_refills_over_time(self):
+        backend = MemoryBackend()
+        with patch("src.services.rate_limit.time.monotonic", return_value=100.0):
+            await backend.hit("key", 1, 10)
+        with patch("src.services.rate_limit.time.monotonic", return_value=110.0):
+            self.assertEqual(await backend.hit("key", 1, 10), 0)
+
+    async def test_keys_are_independent_and_bounded(self):
+        backend = MemoryBackend(max_keys=1)
+        await backend.hit("a", 1, 10)
+        self.assertEqual(await backend.hit("b", 1, 10), 0)
+        self.assertEqual(await backend.hit("a", 1, 10), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,10 @@
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, AsyncMock
 from datetime import date
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models import Contact, User
-from src.schemas import CreteContact
+from src.schemas import ContactUpdate, CreteContact
 from src.repository.contacts import (
     search_contacts,
     get_contact,
@@ -13,31 +13,35 @@ from src.repository.contacts import (
     remove_contact,
     create_contact,
     birthday,
+    birthday_window,
+    contact_values,
 )
 
 
 class TestContacts(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self) -> None:
-        self.session = MagicMock(spec=Session)
+        self.session = AsyncMock(spec=AsyncSession)
+        self.result = MagicMock()
+        self.session.execute.return_value = self.result
         self.user = User(id=1)
 
     async def test_get_contacts(self):
         contacts = [Contact(), Contact(), Contact()]
 
-        self.session.query().filter().all.return_value = contacts
+        self.result.scalars().all.return_value = contacts
         result = await get_contacts(user_id=self.user.id, db=self.session)
         print(result)
         self.assertEqual(result, contacts)
 
     async def test_get_contact_found(self):
         contact = Contact()
-        self.session.query().filter().first.return_value = contact
+        self.result.scalar_one_or_none.return_value = contact
         result = await get_contact(contact_id=1, user_id=self.user.id, db=self.session)
         self.assertEqual(result, contact)
 
     async def test_get_contact_not_found(self):
-        self.session.query().filter().first.return_value = None
+        self.result.scalar_one_or_none.return_value = None
         result = await get_contact(contact_id=1, user_id=self.user.id, db=self.session)
         self.assertIsNone(result)
 
@@ -51,13 +55,13 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
 
     async def test_remove_contact_found(self):
         contact = Contact()
-        self.session.query().filter().first.return_value = contact
+        self.result.scalar_one_or_none.return_value = contact
         result = await remove_contact(contact_id=1, user_id=self.user.id, db=self.session)
         self.assertEqual(result, contact)
 
     #
     async def test_remove_note_not_found(self):
-        self.session.query().filter().first.return_value = None
+        self.result.scalar_one_or_none.return_value = None
         result = await remove_contact(contact_id=1, user_id=self.user.id, db=self.session)
         self.assertIsNone(result)
 
@@ -65,11 +69,43 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
         body = CreteContact(name="test_update", second_name='sn_upd', email='upd@example.com', phone='547896321',
                             owner_id=1, born_date=date.today())
         contact = Contact(name=body.name)
-        self.session.query().filter().first.return_value = contact
+        self.result.scalar_one_or_none.return_value = contact
         self.session.commit.return_value = None
         result = await update_contact(contact_id=1, user_id=self.user.id, body=body, db=self.session)
         self.assertEqual(result, contact)
 
+    async def test_update_contact_without_changes_only_reads(self):
+        contact = Contact(name="unchanged")
+        self.result.scalar_one_or_none.return_value = contact
+        result = await update_contact(contact_id=1, user_id=self.user.id, body=ContactUpdate(), db=self.session)
+        self.assertEqual(result, contact)
+        self.session.commit.assert_not_called()
+
+    def test_contact_values_are_partial(self):
+        values = contact_values(ContactUpdate(phone="123", born_date=date(2000, 2, 29), name=None))
+        self.assertEqual(values, {"phone": "123", "born_date": date(2000, 2, 29), "birthday_ordinal": 229})
+
+    async def test_birthday(self):
+        contacts = [Contact()]
+        self.result.scalars().all.return_value = contacts
+        result = await birthday(user_id=self.user.id, db=self.session, days=7)
+        self.assertEqual(result, contacts)
+
+
+class TestBirthdayWindow(unittest.TestCase):
+
+    def test_window_within_year(self):
+        self.assertEqual(birthday_window(date(2025, 6, 10), 7), (610, 617))
+
+    def test_window_wraps_new_year(self):
+        self.assertEqual(birthday_window(date(2025, 12, 28), 7), (1228, 104))
+
+    def test_feb_29_included_in_non_leap_year(self):
+        self.assertEqual(birthday_window(date(2025, 2, 21), 7), (221, 229))
+
+    def test_whole_year(self):
+        self.assertIsNone(birthday_window(date(2025, 2, 21), 365))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,62 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src.conf.config import BASE_DIR
+from src.services.templating import EmailTemplates, email_templates
+
+
+class TestEmailTemplates(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = tempfile.TemporaryDirectory()
+        root = Path(self.directory.name)
+        (root / "_footer.html").write_text("<p>The Team</p>")
+        (root / "welcome.html").write_text('<p>Hi {{ name }}</p>{{ fragment("_footer.html") }}')
+        (root / "welcome.txt").write_text("Hi {{ name }}")
+        (root / "html_only.html").write_text("<b>{{ name }}</b>")
+        self.templates = EmailTemplates(self.directory.name, self.cache.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+        self.cache.cleanup()
+
+    def test_preload_compiles_every_template(self):
+        self.assertEqual(self.templates.preload(), 4)
+        self.assertTrue(any(Path(self.cache.name).iterdir()))
+
+    def test_render_html_and_text_parts(self):
+        html, text = self.templates.render("welcome.html", {"name": "<Logan>"})
+        self.assertEqual(html, "<p>Hi &lt;Logan&gt;</p><p>The Team</p>")
+        self.assertEqual(text, "Hi <Logan>")
+
+    def test_render_without_text_part(self):
+        html, text = self.templates.render("html_only.html", {"name": "Logan"})
+        self.assertEqual(html, "<b>Logan</b>")
+        self.assertIsNone(text)
+
+    def test_fragment_is_rendered_once(self):
+        self.templates.render("welcome.html", {"name": "Logan"})
+        footer = self.templates.get("_footer.html")
+        with patch.object(footer, "render", side_effect=AssertionError("rendered again")):
+            html, _ = self.templates.render("welcome.html", {"name": "Wade"})
+        self.assertEqual(html, "<p>Hi Wade</p><p>The Team</p>")
+
+    def test_templates_are_not_reloaded_from_disk(self):
+        self.templates.render("html_only.html", {"name": "Logan"})
+        with patch.object(self.templates.env, "get_template", side_effect=AssertionError("loaded again")):
+            self.templates.render("html_only.html", {"name": "Wade"})
+
+
+class TestDefaultTemplates(unittest.TestCase):
+
+    def test_directory_does_not_depend_on_working_directory(self):
+        self.assertTrue(email_templates.directory.is_absolute())
+        self.assertEqual(email_templates.directory, BASE_DIR / "templates")
+        self.assertTrue((email_templates.directory / "email.template.html").is_file())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import time
+import unittest
+from unittest.mock import patch
+
+from jose import jwt
+
+from src.repository import utils
+
+
+class TestDecodeAccessToken(unittest.TestCase):
+
+    def setUp(self):
+        utils.access_token_cache.clear()
+
+    def test_verified_token_is_cached(self):
+        token = utils.create_access_token({"sub": "deadpool"})
+        with patch.object(utils, "decode_jwt", wraps=utils.decode_jwt) as decode:
+            first = utils.decode_access_token(token)
+            second = utils.decode_access_token(token)
+        self.assertEqual(first.username, "deadpool")
+        self.assertIs(second, first)
+        decode.assert_called_once()
+
+    def test_cached_token_expires_with_exp(self):
+        token = jwt.encode({"sub": "deadpool", "exp": int(time.time()) + 60}, utils.SECRET_KEY,
+                           algorithm=utils.ALGORITHM)
+        with patch("src.services.user_cache.time.monotonic", return_value=0):
+            utils.decode_access_token(token)
+        with patch("src.services.user_cache.time.monotonic", return_value=30), \
+                patch.object(utils, "decode_jwt", side_effect=utils.JWTError):
+            self.assertEqual(utils.decode_access_token(token).username, "deadpool")
+        with patch("src.services.user_cache.time.monotonic", return_value=61), \
+                patch.object(utils, "decode_jwt", side_effect=utils.JWTError):
+            self.assertIsNone(utils.decode_access_token(token))
+
+    def test_invalid_token_is_not_cached(self):
+        token = jwt.encode({"sub": "deadpool"}, "wrong-key", algorithm=utils.ALGORITHM)
+        self.assertIsNone(utils.decode_access_token(token))
+        self.assertIsNone(utils.decode_access_token("not-a-token"))
+        self.assertEqual(len(utils.access_token_cache._entries), 0)
+
+    def test_pyjwt_backend_decodes_jose_tokens(self):
+        decode = utils.jwt_backend("pyjwt")
+        self.assertEqual(decode(utils.create_access_token({"sub": "deadpool"}))["sub"], "deadpool")
+        expired = jwt.encode({"sub": "deadpool", "exp": int(time.time()) - 10}, utils.SECRET_KEY,
+                             algorithm=utils.ALGORITHM)
+        with self.assertRaises(utils.JWTError):
+            decode(expired)
+
+
+if __name__ == '__main__':
+    unittest.main()
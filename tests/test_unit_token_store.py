@@ -0,0 +1,129 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from redis.exceptions import ConnectionError
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import NullPool
+
+from src.database.models import Base
+from src.services import token_store
+from src.services.token_store import DatabaseTokenStore, MemoryTokenStore, RedisTokenStore, LIVE, USED, UNKNOWN
+
+
+class TokenStoreBehaviour:
+    """
+    The behaviour every token store shares, mixed into one test case per store.
+    """
+
+    def make_store(self):
+        raise NotImplementedError
+
+    async def asyncSetUp(self):
+        self.store = self.make_store()
+
+    async def test_token_can_be_consumed_once(self):
+        await self.store.add("deadpool", "a", ttl=60)
+        self.assertEqual(await self.store.consume("deadpool", "a"), LIVE)
+        self.assertEqual(await self.store.consume("deadpool", "a"), USED)
+
+    async def test_unknown_token_is_not_reuse(self):
+        self.assertEqual(await self.store.consume("deadpool", "missing"), UNKNOWN)
+
+    async def test_token_of_another_user_is_unknown(self):
+        await self.store.add("deadpool", "a", ttl=60)
+        self.assertEqual(await self.store.consume("wolverine", "a"), UNKNOWN)
+
+    async def test_expired_token_is_rejected(self):
+        with patch("src.services.token_store.time.time", return_value=0):
+            await self.store.add("deadpool", "a", ttl=60)
+        with patch("src.services.token_store.time.time", return_value=61):
+            self.assertEqual(await self.store.consume("deadpool", "a"), UNKNOWN)
+
+    async def test_revoke_all_drops_tokens_and_records_time(self):
+        await self.store.add("deadpool", "a", ttl=60)
+        with patch("src.services.token_store.time.time", return_value=100):
+            await self.store.revoke_all("deadpool", ttl=60)
+            self.assertEqual(await self.store.revoked_before("deadpool"), 100)
+        self.assertEqual(await self.store.consume("deadpool", "a"), UNKNOWN)
+        self.assertIsNone(await self.store.revoked_before("wolverine"))
+
+    async def test_revocation_is_forgotten_after_ttl(self):
+        with patch("src.services.token_store.time.time", return_value=100):
+            await self.store.revoke_all("deadpool", ttl=60)
+        with patch("src.services.token_store.time.time", return_value=161):
+            self.assertIsNone(await self.store.revoked_before("deadpool"))
+
+
+class TestMemoryTokenStore(TokenStoreBehaviour, unittest.IsolatedAsyncioTestCase):
+
+    def make_store(self):
+        return MemoryTokenStore()
+
+
+class TemporaryDatabase:
+    """
+    A SQLite database file with the application tables, dropped after each test.
+    """
+
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        path = Path(self.directory.name) / "tokens.db"
+        Base.metadata.create_all(create_engine(f"sqlite:///{path}"))
+        self.engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+        self.session_maker = async_sessionmaker(self.engine, expire_on_commit=False)
+        await super().asyncSetUp()
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+        self.directory.cleanup()
+
+
+class TestDatabaseTokenStore(TemporaryDatabase, TokenStoreBehaviour, unittest.IsolatedAsyncioTestCase):
+
+    def make_store(self):
+        return DatabaseTokenStore(self.session_maker)
+
+    async def test_tokens_survive_a_restart(self):
+        await self.store.add("deadpool", "a", ttl=60)
+        await self.store.add("deadpool", "b", ttl=60)
+        self.assertEqual(await self.store.consume("deadpool", "a"), LIVE)
+        with patch("src.services.token_store.time.time", return_value=100):
+            await self.store.revoke_all("wolverine", ttl=60)
+
+        restarted = self.make_store()
+        self.assertEqual(await restarted.consume("deadpool", "a"), USED)
+        self.assertEqual(await restarted.consume("deadpool", "b"), LIVE)
+        with patch("src.services.token_store.time.time", return_value=120):
+            self.assertEqual(await restarted.revoked_before("wolverine"), 100)
+
+
+
+class TestRedisRevocationFallback(TemporaryDatabase, unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.client = MagicMock()
+        pipe = MagicMock()
+        pipe.execute = AsyncMock()
+        self.client.pipeline.return_value.__aenter__ = AsyncMock(return_value=pipe)
+        self.client.pipeline.return_value.__aexit__ = AsyncMock(return_value=False)
+        self.store = RedisTokenStore(self.client, DatabaseTokenStore(self.session_maker))
+
+    async def test_revocation_holds_while_redis_is_unreachable(self):
+        with patch("src.services.token_store.time.time", return_value=100):
+            await self.store.revoke_all("deadpool", ttl=60)
+        self.client.get = AsyncMock(side_effect=ConnectionError("down"))
+        # a worker that did not serve the logout
+        self.store.fallback = DatabaseTokenStore(self.session_maker)
+        with patch.object(token_store, "store", self.store), \
+                patch("src.services.token_store.time.time", return_value=120), \
+                self.assertLogs("src.services.token_store", "WARNING"):
+            self.assertEqual(await token_store.revoked_before("deadpool"), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
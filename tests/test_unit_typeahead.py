@@ -0,0 +1,113 @@
+import unittest
+from unittest.mock import MagicMock
+
+from src.database.models import Contact
+from src.services.typeahead import TypeaheadIndex, UserIndex
+
+
+def row(contact_id: int, name: str) -> dict:
+    return {"id": contact_id, "name": name, "second_name": "Smith", "email": f"{name.lower()}@example.com",
+            "phone": f"+38050000000{contact_id}"}
+
+
+class TestUserIndex(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.index = UserIndex([row(1, "Anna"), row(2, "Andrew"), row(3, "Bob")])
+
+    def test_prefix_search_is_case_insensitive(self):
+        self.assertEqual({r["id"] for r in self.index.search("an", 10)}, {1, 2})
+
+    def test_contact_matched_by_several_fields_is_returned_once(self):
+        self.assertEqual([r["id"] for r in self.index.search("bob", 10)], [3])
+
+    def test_update_and_remove(self):
+        self.index.add(row(3, "Annabel"))
+        self.assertEqual({r["id"] for r in self.index.search("ann", 10)}, {1, 3})
+        self.assertEqual(self.index.search("bob", 10), [])
+        self.index.remove(1)
+        self.assertEqual([r["id"] for r in self.index.search("ann", 10)], [3])
+
+    def test_limit(self):
+        self.assertEqual(len(self.index.search("", 2)), 2)
+
+
+class TestTypeaheadIndex(unittest.TestCase):
+
+    def test_evicts_least_recently_used_user(self):
+        typeahead = TypeaheadIndex(max_entries=10)
+        typeahead._users[1] = UserIndex([row(1, "Anna")])
+        typeahead._users[2] = UserIndex([row(2, "Bob")])
+        typeahead._entries = 8
+        typeahead.on_save(2, Contact(id=3, name="Carl", second_name="Smith", email="carl@example.com",
+                                     phone="+380500000003"))
+        self.assertNotIn(1, typeahead._users)
+        self.assertIn(2, typeahead._users)
+
+
+class TestTypeaheadBuild(unittest.IsolatedAsyncioTestCase):
+
+    def make_db(self, rows: list, during_read=None) -> MagicMock:
+        """
+        A session whose one query returns ``rows``, calling ``during_read`` while it is awaited.
+        """
+        async def execute(statement):
+            if during_read:
+                await during_read()
+            result = MagicMock()
+            result.mappings.return_value.all.return_value = rows
+            return result
+        db = MagicMock()
+        db.execute = execute
+        return db
+
+    async def test_concurrent_builds_count_entries_once(self):
+        typeahead = TypeaheadIndex(max_entries=100)
+
+        async def other_search():
+            await typeahead.search(1, "an", 10, self.make_db([row(1, "Anna")]), "v1")
+        await typeahead.search(1, "an", 10, self.make_db([row(1, "Anna")], during_read=other_search), "v1")
+        self.assertEqual(typeahead._entries, len(typeahead._users[1]))
+
+    async def test_build_that_raced_a_write_is_not_kept(self):
+        typeahead = TypeaheadIndex(max_entries=100)
+
+        async def write():
+            typeahead.on_save(1, Contact(id=2, name="Andrew", second_name="Smith", email="andrew@example.com",
+                                         phone="+380500000002"))
+        found = await typeahead.search(1, "an", 10, self.make_db([row(1, "Anna")], during_read=write), "v1")
+        self.assertEqual([r["id"] for r in found], [1])
+        self.assertNotIn(1, typeahead._users)
+        self.assertEqual(typeahead._entries, 0)
+
+        found = await typeahead.search(1, "an", 10, self.make_db([row(1, "Anna"), row(2, "Andrew")]), "v1")
+        self.assertEqual({r["id"] for r in found}, {1, 2})
+        self.assertIn(1, typeahead._users)
+        # generations are only kept while a build is in flight
+        self.assertEqual((typeahead._building, typeahead._generations), ({}, {}))
+
+    async def test_index_is_rebuilt_when_the_version_moved(self):
+        typeahead = TypeaheadIndex(max_entries=100)
+        await typeahead.search(1, "an", 10, self.make_db([row(1, "Anna")]), "v1")
+        # a write served by another worker
+        found = await typeahead.search(1, "an", 10, self.make_db([row(2, "Andrew")]), "v2")
+        self.assertEqual([r["id"] for r in found], [2])
+        self.assertEqual(typeahead._entries, len(typeahead._users[1]))
+
+    async def test_own_write_moves_the_index_to_the_new_version(self):
+        typeahead = TypeaheadIndex(max_entries=100)
+        await typeahead.search(1, "an", 10, self.make_db([row(1, "Anna")]), "v1")
+        typeahead.on_save(1, Contact(id=2, name="Andrew", second_name="Smith", email="andrew@example.com",
+                                     phone="+380500000002"))
+        typeahead.on_bump(1, "v1", "v2")
+        found = await typeahead.search(1, "an", 10, self.make_db([]), "v2")
+        self.assertEqual({r["id"] for r in found}, {1, 2})
+
+        # the bump of a write that skipped a version is not adopted
+        typeahead.on_bump(1, "v3", "v4")
+        found = await typeahead.search(1, "an", 10, self.make_db([row(1, "Anna")]), "v4")
+        self.assertEqual([r["id"] for r in found], [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
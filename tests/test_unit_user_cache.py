@@ -0,0 +1,70 @@
+import json
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from src.database.models import User
+from src.services import user_cache
+from src.services.user_cache import TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_expired_entry_is_missing(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        with patch("src.services.user_cache.time.monotonic", return_value=0):
+            cache.set("a", 1)
+        with patch("src.services.user_cache.time.monotonic", return_value=61):
+            self.assertIsNone(cache.get("a"))
+
+
+class TestUserCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        user_cache.local_cache.clear()
+        self.user = User(id=1, user_name="deadpool", email="deadpool@example.com", hashes_password="hash",
+                         confirmed=False, avatar=None)
+
+    async def test_cached_user_is_detached_copy(self):
+        await user_cache.set_user(self.user)
+        result = await user_cache.get_user("deadpool")
+        self.assertIsNot(result, self.user)
+        self.assertEqual(result.id, 1)
+        self.assertEqual(result.email, "deadpool@example.com")
+
+    async def test_password_hash_is_not_cached(self):
+        redis = AsyncMock()
+        with patch("src.services.user_cache.get_redis", return_value=redis):
+            await user_cache.set_user(self.user)
+        stored = json.loads(redis.set.call_args.args[1])
+        self.assertNotIn("hashes_password", stored)
+        self.assertNotIn("hashes_password", user_cache.local_cache.get("deadpool"))
+        self.assertIsNone((await user_cache.get_user("deadpool")).hashes_password)
+
+    async def test_password_hash_of_an_older_redis_entry_is_dropped(self):
+        redis = AsyncMock()
+        redis.get.return_value = json.dumps({"id": 1, "user_name": "deadpool", "email": "deadpool@example.com",
+                                             "hashes_password": "hash", "confirmed": False, "avatar": None})
+        with patch("src.services.user_cache.get_redis", return_value=redis):
+            result = await user_cache.get_user("deadpool")
+        self.assertEqual(result.id, 1)
+        self.assertIsNone(result.hashes_password)
+        self.assertNotIn("hashes_password", user_cache.local_cache.get("deadpool"))
+
+    async def test_invalidate_user(self):
+        await user_cache.set_user(self.user)
+        await user_cache.invalidate_user("deadpool")
+        self.assertIsNone(await user_cache.get_user("deadpool"))
+
+
+if __name__ == '__main__':
+    unittest.main()